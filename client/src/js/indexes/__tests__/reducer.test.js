@@ -43,6 +43,16 @@ describe("Indexes Reducer", () => {
             const result = reducer(state, action);
             expect(result).toEqual(state);
         });
+
+        it("increment modified_otu_count by the number of listed changes in current ref", () => {
+            const state = { refId: "foo", modified_otu_count: 3 };
+            const action = {
+                type: WS_INSERT_HISTORY,
+                data: [{ reference: { id: "foo" } }, { reference: { id: "bar" } }, { reference: { id: "foo" } }]
+            };
+            const result = reducer(state, action);
+            expect(result).toEqual({ ...state, modified_otu_count: 5 });
+        });
     });
 
     describe("should handle WS_INSERT_INDEX", () => {
@@ -1,3 +1,4 @@
+import { castArray, filter } from "lodash-es";
 import {
     WS_INSERT_INDEX,
     WS_UPDATE_INDEX,
@@ -22,11 +23,15 @@ export const initialState = {
 
 export default function indexesReducer(state = initialState, action) {
     switch (action.type) {
-        case WS_INSERT_HISTORY:
-            if (action.data.reference.id === state.refId) {
-                return { ...state, modified_otu_count: state.modified_otu_count + 1 };
+        case WS_INSERT_HISTORY: {
+            // Bulk inserts dispatch a list of changes that can belong to different references.
+            const count = filter(castArray(action.data), change => change.reference.id === state.refId).length;
+
+            if (count) {
+                return { ...state, modified_otu_count: state.modified_otu_count + count };
             }
             return state;
+        }
 
         case WS_INSERT_INDEX:
             if (action.data.reference.id === state.refId) {
@@ -158,6 +158,10 @@ const nuvsDescriptions = {
         title: "Eliminate Subtraction",
         description: "Map against the subtraction index and eliminate reads that match."
     },
+    eliminate_reads: {
+        title: "Eliminate Reads",
+        description: "Map against the OTU and subtraction indexes at the same time and eliminate reads that match."
+    },
     reunite_pairs: {
         title: "Reunite Pairs",
         description: "Ensure all remaining read pairs are paired correctly after subtraction."
@@ -83,6 +83,39 @@ describe("OTUs Reducer:", () => {
             const result = reducer(state, action);
             expect(result).toEqual({ ...state, documents: [action.data] });
         });
+
+        it("insert only entries for the current reference when a list is dispatched", () => {
+            const state = {
+                fetched: true,
+                refId: "123abc",
+                documents: [{ id: "a", name: "Alpha", reference: { id: "123abc" } }],
+                page: 0,
+                per_page: 3
+            };
+            const action = {
+                type: WS_INSERT_OTU,
+                data: [
+                    { id: "c", name: "Gamma", reference: { id: "123abc" } },
+                    { id: "d", name: "Delta", reference: { id: "other" } },
+                    { id: "b", name: "Beta", reference: { id: "123abc" } }
+                ]
+            };
+            const result = reducer(state, action);
+            expect(result).toEqual({
+                ...state,
+                documents: [state.documents[0], action.data[2], action.data[0]]
+            });
+        });
+
+        it("if no listed entries are for the current reference, return state", () => {
+            const state = { refId: "foo" };
+            const action = {
+                type: WS_INSERT_OTU,
+                data: [{ id: "test", reference: { id: "bar" } }]
+            };
+            const result = reducer(state, action);
+            expect(result).toEqual(state);
+        });
     });
 
     describe("should handle WS_UPDATE_OTU", () => {
@@ -1,4 +1,4 @@
-import { find, map } from "lodash-es";
+import { castArray, filter, find, map } from "lodash-es";
 import {
     ADD_ISOLATE,
     ADD_SEQUENCE,
@@ -107,12 +107,16 @@ export default function OTUsReducer(state = initialState, action) {
 
             return state;
 
-        case WS_INSERT_OTU:
-            if (action.data.reference.id === state.refId) {
-                return insert(state, action, "name");
+        case WS_INSERT_OTU: {
+            // Bulk inserts dispatch a list of OTUs that can belong to different references.
+            const otus = filter(castArray(action.data), otu => otu.reference.id === state.refId);
+
+            if (otus.length) {
+                return insert(state, { ...action, data: otus }, "name");
             }
 
             return state;
+        }
 
         case WS_UPDATE_OTU:
             if (action.data.reference.id === state.refId) {
@@ -1,4 +1,4 @@
-import { reject, map, includes, sortBy, unionBy } from "lodash-es";
+import { castArray, reject, map, includes, sortBy, unionBy } from "lodash-es";
 
 export const updateDocuments = (state, action, sortKey, sortReverse) => {
     const existing = action.data.page === 1 ? [] : state.documents || [];
@@ -17,7 +17,7 @@ export const updateDocuments = (state, action, sortKey, sortReverse) => {
 };
 
 export const insert = (state, action, sortKey, sortReverse = false) => {
-    const documents = sortBy(unionBy(state.documents || [], [action.data], "id"), sortKey);
+    const documents = sortBy(unionBy(state.documents || [], castArray(action.data), "id"), sortKey);
 
     if (sortReverse) {
         documents.reverse();
@@ -1,3 +1,4 @@
+import numpy
 import pytest
 
 import virtool.analyses.utils
@@ -30,3 +31,56 @@ def test_get_json_path(name):
     """
     path = virtool.analyses.utils.join_analysis_json_path("/data", "bar", "foo")
     assert path == "/data/samples/foo/analysis/bar/results.json"
+
+
+def test_load_aodp_results(tmpdir):
+    """
+    Test that columnar AODP results are converted to hit dicts.
+
+    """
+    path = str(tmpdir.join(virtool.analyses.utils.AODP_RESULTS_FILENAME))
+
+    numpy.savez(
+        path,
+        id=numpy.array(["read_1", "read_4"]),
+        sequence_id=numpy.array(["foo", "bar"]),
+        identity=numpy.array([100.0, 97.5]),
+        matched_length=numpy.array([78, 80]),
+        read_length=numpy.array([78, 82]),
+        min_cluster=numpy.array([1, 3]),
+        max_cluster=numpy.array([2, 3]),
+        count=numpy.array([12, 1]),
+        otu_id=numpy.array(["baz", "baz"]),
+        otu_version=numpy.array([2, 2])
+    )
+
+    assert virtool.analyses.utils.load_aodp_results(path) == [
+        {
+            "id": "read_1",
+            "sequence_id": "foo",
+            "identity": 100.0,
+            "matched_length": 78,
+            "read_length": 78,
+            "min_cluster": 1,
+            "max_cluster": 2,
+            "count": 12,
+            "otu": {
+                "version": 2,
+                "id": "baz"
+            }
+        },
+        {
+            "id": "read_4",
+            "sequence_id": "bar",
+            "identity": 97.5,
+            "matched_length": 80,
+            "read_length": 82,
+            "min_cluster": 3,
+            "max_cluster": 3,
+            "count": 1,
+            "otu": {
+                "version": 2,
+                "id": "baz"
+            }
+        }
+    ]
@@ -0,0 +1,67 @@
+import pytest
+
+
+@pytest.mark.parametrize("ensured", [True, False])
+async def test_get_indexes(ensured, spawn_client):
+    """
+    Test that missing indexes are reported before indexes are ensured and that hot queries use the declared indexes
+    afterwards.
+
+    """
+    client = await spawn_client(authorize=True, administrator=True)
+
+    await client.db.history.insert_one({"_id": "foo.0", "otu": {"id": "foo", "version": 0}})
+
+    if ensured:
+        await client.db.ensure_indexes()
+
+    resp = await client.get("/api/db/indexes")
+
+    assert resp.status == 200
+
+    body = await resp.json()
+
+    history = next(c for c in body["collections"] if c["name"] == "history")
+
+    if ensured:
+        assert history["missing"] == []
+    else:
+        assert "otu.id_1_otu.version_-1" in history["missing"]
+
+    query = next(q for q in body["queries"] if q["collection"] == "history" and q["query"] == {"otu.id": ""})
+
+    if ensured:
+        assert query["indexes"] == ["otu.id_1_otu.version_-1"]
+    else:
+        assert query["collection_scan"] is True
+
+
+async def test_get_indexes_not_admin(spawn_client, resp_is):
+    client = await spawn_client(authorize=True)
+
+    resp = await client.get("/api/db/indexes")
+
+    assert await resp_is.not_permitted(resp, "Requires administrative privilege")
+
+
+async def test_get_metrics(spawn_client):
+    """
+    Test that operations issued while handling a request are reported by the metrics endpoint.
+
+    """
+    client = await spawn_client(authorize=True, administrator=True)
+
+    await client.get("/api/otus")
+
+    resp = await client.get("/api/db/metrics")
+
+    assert resp.status == 200
+
+    body = await resp.json()
+
+    assert body["flagged_requests"] == []
+
+    assert {(o["collection"], o["command"]) for o in body["operations"]} >= {
+        ("otus", "find"),
+        ("sessions", "find")
+    }
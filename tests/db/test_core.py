@@ -1,3 +1,4 @@
+import pymongo.errors
 import pymongo.results
 import pytest
 from aiohttp.test_utils import make_mocked_coro
@@ -146,6 +147,57 @@ class TestCollection:
             {"_id": "baz", "tag": 1}
         ]
 
+    @pytest.mark.parametrize("attr_silent", [True, False])
+    @pytest.mark.parametrize("param_silent", [True, False])
+    async def test_insert_many(self, attr_silent, param_silent, test_motor, create_test_collection):
+        """
+        Test that documents are inserted in chunks and that one message is dispatched per chunk unless suppressed.
+
+        """
+        collection = create_test_collection(silent=attr_silent)
 
+        documents = [{"_id": f"foo_{i}", "tag": i} for i in range(5)]
+
+        inserted = await collection.insert_many(documents, chunk_size=2, silent=param_silent)
+
+        assert inserted == documents
+
+        assert await test_motor.samples.count_documents({}) == 5
+
+        if attr_silent or param_silent:
+            assert collection.dispatch.called is False
+        else:
+            assert collection.dispatch.call_count == 3
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    async def test_insert_many_regenerate_id(self, ordered, mocker, test_motor, create_test_collection):
+        """
+        Test that generated ids colliding with existing documents are regenerated and the documents are retried.
+
+        """
+        collection = create_test_collection()
+
+        await test_motor.samples.insert_one({"_id": "foo"})
+
+        mocker.patch("virtool.utils.random_alphanumeric", side_effect=["bar", "foo", "baz", "qux"])
+
+        await collection.insert_many([{"tag": 1}, {"tag": 2}, {"tag": 3}], ordered=ordered)
+
+        assert await test_motor.samples.find({}, sort=[("tag", 1)]).to_list(None) == [
+            {"_id": "foo"},
+            {"_id": "bar", "tag": 1},
+            {"_id": "qux", "tag": 2},
+            {"_id": "baz", "tag": 3}
+        ]
+
+    async def test_insert_many_duplicate(self, test_motor, create_test_collection):
+        """
+        Test that a duplicate key error is raised for documents with user-defined ids.
+
+        """
+        collection = create_test_collection()
 
+        await test_motor.samples.insert_one({"_id": "foo"})
 
+        with pytest.raises(pymongo.errors.BulkWriteError):
+            await collection.insert_many([{"_id": "bar"}, {"_id": "foo"}])
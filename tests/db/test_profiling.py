@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import pytest
+
+import virtool.db.profiling
+import virtool.metrics
+
+
+@pytest.mark.parametrize("duration,index", [(0.5, 0), (1, 0), (7, 3), (10000, -1)])
+def test_operation_stats(duration, index):
+    """
+    Test that observed durations are counted in the correct histogram bucket.
+
+    """
+    stats = virtool.db.profiling.OperationStats()
+
+    stats.observe(duration)
+    stats.observe(duration, failed=True)
+
+    assert stats.count == 2
+    assert stats.failures == 1
+    assert stats.buckets[index] == 2
+    assert sum(stats.buckets) == 2
+    assert stats.to_dict()["mean"] == duration
+
+
+@pytest.mark.parametrize("count,flagged", [(20, False), (21, True)])
+def test_record_request(count, flagged):
+    """
+    Test that requests issuing more than :const:`N_PLUS_ONE_THRESHOLD` operations are flagged.
+
+    """
+    profiler = virtool.db.profiling.Profiler()
+    profile = virtool.db.profiling.RequestProfile()
+
+    for _ in range(count - 1):
+        profile.add("sequences", "find_one")
+
+    profile.add("otus", "find_one")
+
+    profiler.record_request("GET", "/api/otus/foo", profile)
+
+    if flagged:
+        assert len(profiler.flagged) == 1
+
+        assert profiler.flagged[0]["operations"] == [
+            {"collection": "sequences", "operation": "find_one", "count": count - 1},
+            {"collection": "otus", "operation": "find_one", "count": 1}
+        ]
+    else:
+        assert len(profiler.flagged) == 0
+
+
+@pytest.mark.parametrize("command_name,command,expected", [
+    ("find", {"find": "otus", "filter": {}}, "otus"),
+    ("getMore", {"getMore": 12345, "collection": "history"}, "history"),
+    ("isMaster", {"isMaster": 1}, None),
+    ("endSessions", {"endSessions": []}, None)
+])
+def test_get_command_collection(command_name, command, expected):
+    assert virtool.db.profiling.get_command_collection(command_name, command) == expected
+
+
+@pytest.mark.parametrize("failed", [True, False])
+def test_command_listener(failed):
+    """
+    Test that commands targeting collections are reported to the profiler with their duration in milliseconds.
+
+    """
+    profiler = virtool.db.profiling.Profiler()
+    listener = virtool.db.profiling.CommandListener(profiler)
+
+    listener.started(SimpleNamespace(
+        command_name="find",
+        command={"find": "otus"},
+        connection_id=("localhost", 27017),
+        request_id=1
+    ))
+
+    listener.started(SimpleNamespace(
+        command_name="isMaster",
+        command={"isMaster": 1},
+        connection_id=("localhost", 27017),
+        request_id=2
+    ))
+
+    for request_id, command_name in [(1, "find"), (2, "isMaster")]:
+        event = SimpleNamespace(
+            command_name=command_name,
+            connection_id=("localhost", 27017),
+            request_id=request_id,
+            duration_micros=3000
+        )
+
+        if failed:
+            listener.failed(event)
+        else:
+            listener.succeeded(event)
+
+    assert list(profiler.stats) == [("otus", "find")]
+
+    stats = profiler.stats[("otus", "find")]
+
+    assert stats.count == 1
+    assert stats.failures == int(failed)
+    assert stats.total == 3
+
+
+@pytest.mark.parametrize("profiled", [True, False])
+def test_profiled_collection(profiled, mocker):
+    """
+    Test that operations are counted in the request profile in the current context and other attributes are passed
+    through.
+
+    """
+    motor_collection = mocker.Mock()
+    motor_collection.name = "otus"
+    motor_collection.find_one.return_value = "foo"
+
+    collection = virtool.db.profiling.ProfiledCollection(motor_collection)
+
+    profile = virtool.db.profiling.RequestProfile()
+
+    token = virtool.db.profiling.request_profile.set(profile if profiled else None)
+
+    try:
+        assert collection.find_one({"_id": "bar"}) == "foo"
+        assert collection.database is motor_collection.database
+    finally:
+        virtool.db.profiling.request_profile.reset(token)
+
+    motor_collection.find_one.assert_called_with({"_id": "bar"})
+
+    assert profile.count == int(profiled)
+
+
+def test_export():
+    """
+    Test that operation statistics are loaded into the metrics registry in seconds.
+
+    """
+    profiler = virtool.db.profiling.Profiler()
+
+    profiler.observe("otus", "find", 2000)
+
+    metrics = virtool.metrics.Metrics()
+
+    profiler.export(metrics)
+
+    rendered = metrics.render()
+
+    assert 'virtool_db_operation_duration_seconds_bucket{collection="otus",command="find",le="2.5"} 1' in rendered
+    assert 'virtool_db_operation_duration_seconds_bucket{collection="otus",command="find",le="1"} 0' in rendered
+    assert 'virtool_db_operation_duration_seconds_sum{collection="otus",command="find"} 2' in rendered
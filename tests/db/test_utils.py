@@ -1,3 +1,4 @@
+import pymongo
 import pytest
 
 import virtool.db.utils
@@ -52,3 +53,97 @@ class TestApplyProjection:
             virtool.db.utils.apply_projection({}, "_id")
 
         assert "Invalid type for projection: <class 'str'>" in str(excinfo.value)
+
+
+class TestDiffIndexes:
+
+    def test_create_missing(self):
+        """
+        Test that declared indexes that don't exist are returned for creation.
+
+        """
+        declared = [
+            pymongo.IndexModel("sample.id"),
+            pymongo.IndexModel([("created_at", pymongo.DESCENDING)])
+        ]
+
+        existing = {
+            "_id_": {"key": [("_id", 1)]},
+            "sample.id_1": {"key": [("sample.id", 1)]}
+        }
+
+        to_create, to_drop = virtool.db.utils.diff_indexes(declared, existing)
+
+        assert [model.document["name"] for model in to_create] == ["created_at_-1"]
+        assert to_drop == []
+
+    def test_drop_undeclared(self):
+        """
+        Test that existing indexes that are no longer declared are dropped, but never the `_id` index.
+
+        """
+        existing = {
+            "_id_": {"key": [("_id", 1)]},
+            "otu.id_1": {"key": [("otu.id", 1)]}
+        }
+
+        to_create, to_drop = virtool.db.utils.diff_indexes([], existing)
+
+        assert to_create == []
+        assert to_drop == ["otu.id_1"]
+
+    def test_recreate_changed(self):
+        """
+        Test that an existing index with the same name but different options is dropped and recreated.
+
+        """
+        declared = [
+            pymongo.IndexModel("id", unique=True)
+        ]
+
+        existing = {
+            "id_1": {"key": [("id", 1)]}
+        }
+
+        to_create, to_drop = virtool.db.utils.diff_indexes(declared, existing)
+
+        assert [model.document["name"] for model in to_create] == ["id_1"]
+        assert to_drop == ["id_1"]
+
+    def test_unchanged(self):
+        declared = [
+            pymongo.IndexModel("expiresAt", expireAfterSeconds=0),
+            pymongo.IndexModel([("otu.id", pymongo.ASCENDING), ("otu.version", pymongo.DESCENDING)])
+        ]
+
+        existing = {
+            "_id_": {"key": [("_id", 1)]},
+            "expiresAt_1": {"key": [("expiresAt", 1)], "expireAfterSeconds": 0},
+            "otu.id_1_otu.version_-1": {"key": [("otu.id", 1), ("otu.version", -1)]}
+        }
+
+        assert virtool.db.utils.diff_indexes(declared, existing) == ([], [])
+
+
+@pytest.mark.parametrize("plan,expected", [
+    ({"stage": "COLLSCAN"}, {
+        "stages": ["COLLSCAN"],
+        "indexes": [],
+        "collection_scan": True
+    }),
+    ({"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "sample.id_1"}}, {
+        "stages": ["FETCH", "IXSCAN"],
+        "indexes": ["sample.id_1"],
+        "collection_scan": False
+    }),
+    ({"stage": "SORT", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN", "indexName": "name_1"},
+        {"stage": "COLLSCAN"}
+    ]}}, {
+        "stages": ["SORT", "OR", "IXSCAN", "COLLSCAN"],
+        "indexes": ["name_1"],
+        "collection_scan": True
+    })
+], ids=["collscan", "ixscan", "or"])
+def test_summarize_plan(plan, expected):
+    assert virtool.db.utils.summarize_plan(plan) == expected
@@ -1,6 +1,9 @@
 import pytest
 import datetime
 
+import virtool.history.db
+import virtool.otus.utils
+
 
 @pytest.fixture
 def test_change(static_time):
@@ -330,3 +333,33 @@ def create_mock_history(dbi):
         return otu
 
     return func
+
+
+@pytest.fixture
+def create_otu_versions(dbi, test_merged_otu):
+    """
+    Insert an OTU at version 5 and the changes that record its history. Each version has a different abbreviation.
+    Returns the joined versions of the OTU and the change documents.
+
+    Changes are composed when the returned function is called so that :const:`virtool.history.db.SNAPSHOT_INTERVAL` can
+    be patched first.
+
+    """
+    async def func():
+        versions = [dict(test_merged_otu, version=0, abbreviation="V0")]
+
+        changes = [virtool.history.db.compose_change("create", None, versions[0], "Created", "test")]
+
+        for version in range(1, 6):
+            versions.append(dict(versions[-1], version=version, abbreviation=f"V{version}"))
+            changes.append(virtool.history.db.compose_change("edit", versions[-2], versions[-1], "Edited", "test"))
+
+        otu, sequences = virtool.otus.utils.split(versions[-1])
+
+        await dbi.otus.insert_one(otu)
+        await dbi.sequences.insert_many(sequences)
+        await dbi.history.insert_many([dict(change) for change in changes])
+
+        return versions, changes
+
+    return func
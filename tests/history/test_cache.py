@@ -0,0 +1,117 @@
+from aiohttp.test_utils import make_mocked_coro
+
+import pytest
+
+import virtool.history.cache
+import virtool.metrics
+
+
+@pytest.fixture
+def cache():
+    return virtool.history.cache.PatchedOTUCache(metrics=virtool.metrics.Metrics())
+
+
+def test_get(cache, test_merged_otu):
+    """
+    Test that cached OTUs are returned as copies and that hits and misses are counted.
+
+    """
+    assert cache.get("6116cba1", 0) is None
+
+    cache.put("6116cba1", 0, test_merged_otu)
+
+    patched = cache.get("6116cba1", 0)
+
+    assert patched == test_merged_otu
+
+    patched["isolates"].clear()
+
+    assert cache.get("6116cba1", 0) == test_merged_otu
+
+    assert cache.metrics.patched_otu_cache_requests._values == {
+        ("hit",): 2,
+        ("miss",): 1
+    }
+
+
+@pytest.mark.parametrize("limit", ["entries", "bytes"])
+def test_put(limit, test_merged_otu):
+    """
+    Test that the least recently used entries are evicted when either limit is exceeded and that the size of the cache
+    is tracked.
+
+    """
+    cache = virtool.history.cache.PatchedOTUCache()
+
+    cache.put("foo", 0, test_merged_otu)
+
+    size = cache.size
+
+    if limit == "entries":
+        cache.max_entries = 2
+    else:
+        cache.max_bytes = size * 2
+
+    cache.put("foo", 1, test_merged_otu)
+
+    # Make version 0 the most recently used entry.
+    cache.get("foo", 0)
+
+    cache.put("foo", 2, test_merged_otu)
+
+    assert len(cache) == 2
+    assert cache.size == size * 2
+
+    assert cache.get("foo", 1) is None
+    assert cache.get("foo", 0) == cache.get("foo", 2) == test_merged_otu
+
+
+def test_put_too_large(test_merged_otu):
+    cache = virtool.history.cache.PatchedOTUCache(max_bytes=10)
+
+    cache.put("foo", 0, test_merged_otu)
+
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_invalidate(cache, test_merged_otu):
+    for otu_id in ["foo", "bar"]:
+        for version in range(4):
+            cache.put(otu_id, version, test_merged_otu)
+
+    size = cache.size
+
+    cache.invalidate("foo", 2)
+
+    assert len(cache) == 6
+    assert cache.size == size * 6 // 8
+
+    assert cache.get("foo", 1) == test_merged_otu
+    assert cache.get("foo", 2) is None
+    assert cache.get("bar", 3) == test_merged_otu
+
+
+@pytest.mark.parametrize("cached", [False, True])
+async def test_get_patched_otu(cached, mocker, cache, test_merged_otu):
+    m_patch_to_version = mocker.patch(
+        "virtool.history.db.patch_to_version",
+        make_mocked_coro((None, test_merged_otu, []))
+    )
+
+    app = {
+        "patched_otu_cache": cache
+    }
+
+    if cached:
+        cache.put("6116cba1", 2, dict(test_merged_otu, version=2))
+
+    patched = await virtool.history.cache.get_patched_otu(app, "6116cba1", 2)
+
+    if cached:
+        assert patched == dict(test_merged_otu, version=2)
+        assert m_patch_to_version.called is False
+    else:
+        assert patched == test_merged_otu
+        assert cache.get("6116cba1", 2) == test_merged_otu
+        m_patch_to_version.assert_called_with(app, "6116cba1", 2)
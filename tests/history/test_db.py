@@ -1,9 +1,12 @@
 import datetime
 from aiohttp.test_utils import make_mocked_coro
 
+import pymongo.errors
 import pytest
 
 import virtool.history.db
+import virtool.history.utils
+import virtool.references.db
 
 
 class TestAdd:
@@ -95,6 +98,67 @@ class TestAdd:
         snapshot.assert_match(document)
 
 
+@pytest.mark.parametrize("too_large", [False, True])
+async def test_add_many(too_large, mocker, dbi, static_time, test_otu_edit):
+    """
+    Test that change documents are inserted together and that diffs too large to store in a document are written to
+    diff files.
+
+    """
+    app = {
+        "db": dbi,
+        "settings": {
+            "data_path": "/foo/bar"
+        }
+    }
+
+    if too_large:
+        mocker.patch("virtool.history.db.MAX_DOCUMENT_SIZE", 10)
+
+    m_write_diff_file = mocker.patch("virtool.history.utils.write_diff_file", make_mocked_coro())
+
+    old, new = test_otu_edit
+
+    documents = [
+        virtool.history.db.compose_change("edit", old, new, "Edited Prunus virus E", "test"),
+        virtool.history.db.compose_change("remove", new, None, "Removed Prunus virus E", "test")
+    ]
+
+    assert await virtool.history.db.add_many(app, documents) == documents
+
+    inserted = await dbi.history.find().sort("_id").to_list(None)
+
+    assert [d["_id"] for d in inserted] == ["6116cba1.1", "6116cba1.removed"]
+
+    if too_large:
+        assert all(d["diff"] == "file" for d in inserted)
+        assert m_write_diff_file.call_count == 2
+    else:
+        assert [d["diff"] for d in inserted] == [documents[0]["diff"], documents[1]["diff"]]
+        assert m_write_diff_file.called is False
+
+
+@pytest.mark.parametrize("version", [1, 2, 3, 4])
+def test_compose_change_snapshot(version, mocker, test_otu_edit):
+    """
+    Test that snapshots of the new OTU are only included in changes with versions that are multiples of the snapshot
+    interval.
+
+    """
+    mocker.patch("virtool.history.db.SNAPSHOT_INTERVAL", 2)
+
+    old, new = test_otu_edit
+
+    new = dict(new, version=version)
+
+    document = virtool.history.db.compose_change("edit", old, new, "Edited Prunus virus E", "test")
+
+    if version % 2:
+        assert "snapshot" not in document
+    else:
+        assert document["snapshot"] == new
+
+
 @pytest.mark.parametrize("file", [True, False])
 async def test_get(file, mocker, snapshot, dbi):
     await dbi.history.insert_one({
@@ -192,3 +256,206 @@ async def test_patch_to_version(remove, snapshot, dbi,  create_mock_history):
     snapshot.assert_match(current)
     snapshot.assert_match(patched)
     snapshot.assert_match(reverted_change_ids)
+
+
+@pytest.mark.parametrize("interval", [2, 20])
+async def test_patch_to_version_snapshot(interval, mocker, dbi, create_otu_versions):
+    """
+    Test that patching starts from the nearest snapshot when one exists. Diffs made after the snapshot are emptied, so
+    the result is only correct if they are not applied.
+
+    """
+    mocker.patch("virtool.history.db.SNAPSHOT_INTERVAL", interval)
+
+    app = {
+        "db": dbi
+    }
+
+    versions, _ = await create_otu_versions()
+
+    if interval == 2:
+        await dbi.history.update_many({"otu.version": {"$gt": 2}}, {"$set": {"diff": []}})
+
+    current, patched, reverted_change_ids = await virtool.history.db.patch_to_version(app, "6116cba1", 1)
+
+    assert current == versions[5]
+    assert patched == versions[1]
+    assert sorted(reverted_change_ids) == ["6116cba1.2", "6116cba1.3", "6116cba1.4", "6116cba1.5"]
+
+
+@pytest.mark.parametrize("too_large", [False, True])
+async def test_prepare_for_storage(too_large, mocker, test_merged_otu):
+    """
+    Test that long sequences are compressed before the size of the change is checked and that diffs that are still too
+    large are written to diff files.
+
+    """
+    app = {
+        "settings": {
+            "data_path": "/foo/bar"
+        }
+    }
+
+    if too_large:
+        mocker.patch("virtool.history.db.MAX_DOCUMENT_SIZE", 10)
+
+    m_write_diff_file = mocker.patch("virtool.history.utils.write_diff_file", make_mocked_coro())
+
+    test_merged_otu["isolates"][0]["sequences"][0]["sequence"] = "ATGC" * 500
+
+    document = virtool.history.db.compose_change("create", None, test_merged_otu, "Created Prunus virus F", "test")
+
+    prepared = await virtool.history.db.prepare_for_storage(app, document)
+
+    if too_large:
+        assert prepared["diff"] == "file"
+        m_write_diff_file.assert_called_with("/foo/bar", "6116cba1", 0, document["diff"])
+    else:
+        assert isinstance(prepared["diff"]["isolates"][0]["sequences"][0]["sequence"], bytes)
+        assert virtool.history.utils.decompress_sequences(prepared["diff"]) == document["diff"]
+        assert m_write_diff_file.called is False
+
+    # The composed change is not modified.
+    assert document["diff"] == test_merged_otu
+
+
+async def test_processor(test_merged_otu):
+    """
+    Test that compressed sequences are restored in diffs dispatched to clients.
+
+    """
+    test_merged_otu["isolates"][0]["sequences"][0]["sequence"] = "ATGC" * 500
+
+    document = {
+        "_id": "6116cba1.0",
+        "diff": virtool.history.utils.compress_sequences(test_merged_otu)
+    }
+
+    assert await virtool.history.db.processor(None, document) == {
+        "id": "6116cba1.0",
+        "diff": test_merged_otu
+    }
+
+
+async def test_update_reference_stats(mocker, dbi):
+    """
+    Test that the reference statistics are incremented for a batch of changes and that the number of modified OTUs is
+    recomputed from the inserted unbuilt changes.
+
+    """
+    await dbi.history.insert_many([
+        {"_id": "bar.1", "otu": {"id": "bar", "version": 1}, "reference": {"id": "ref"}, "index": {"id": "unbuilt"}},
+        {"_id": "bar.2", "otu": {"id": "bar", "version": 2}, "reference": {"id": "ref"}, "index": {"id": "unbuilt"}},
+        {"_id": "foo.0", "otu": {"id": "foo", "version": 0}, "reference": {"id": "ref"}, "index": {"id": "unbuilt"}},
+        {"_id": "far.0", "otu": {"id": "far", "version": 0}, "reference": {"id": "other"}, "index": {"id": "unbuilt"}},
+        {"_id": "baz.3", "otu": {"id": "baz", "version": 3}, "reference": {"id": "ref"}, "index": {"id": "foo"}}
+    ])
+
+    m_increment_stats = mocker.patch("virtool.references.db.increment_stats", make_mocked_coro())
+
+    documents = [
+        {"otu": {"id": "foo", "version": 0}, "reference": {"id": "ref"}},
+        {"otu": {"id": "bar", "version": 2}, "reference": {"id": "ref"}},
+        {"otu": {"id": "boo", "version": "removed"}, "reference": {"id": "ref"}},
+        {"otu": {"id": "far", "version": 0}, "reference": {"id": "other"}}
+    ]
+
+    await virtool.history.db.update_reference_stats(dbi, documents)
+
+    m_increment_stats.assert_any_call(
+        dbi,
+        "ref",
+        otu_count=0,
+        unbuilt_change_count=3,
+        modified_otu_count=2
+    )
+
+    m_increment_stats.assert_any_call(
+        dbi,
+        "other",
+        otu_count=1,
+        unbuilt_change_count=1,
+        modified_otu_count=1
+    )
+
+
+@pytest.mark.parametrize("fail", [False, True])
+async def test_add_stats(fail, dbi, static_time, test_otu_edit):
+    """
+    Test that the reference statistics are only updated once the change has been inserted and that an OTU with existing
+    unbuilt changes is not counted as modified twice.
+
+    """
+    app = {
+        "db": dbi,
+        "settings": {
+            "data_path": "/foo/bar"
+        }
+    }
+
+    old, new = test_otu_edit
+
+    stats = {
+        "latest_build": None,
+        "otu_count": 1,
+        "unbuilt_change_count": 1,
+        "modified_otu_count": 1
+    }
+
+    await dbi.references.insert_one({"_id": "hxn167", "stats": stats})
+
+    await dbi.history.insert_one({
+        "_id": "6116cba1.0",
+        "otu": {"id": "6116cba1", "version": 0},
+        "reference": {"id": "hxn167"},
+        "index": {"id": "unbuilt", "version": "unbuilt"}
+    })
+
+    if fail:
+        # An existing change with the same id makes the insert fail.
+        await dbi.history.insert_one({"_id": "6116cba1.1"})
+
+        with pytest.raises(pymongo.errors.DuplicateKeyError):
+            await virtool.history.db.add(app, "edit", old, new, "Edited Prunus virus E", "test")
+
+        assert (await dbi.references.find_one("hxn167"))["stats"] == stats
+
+    else:
+        await virtool.history.db.add(app, "edit", old, new, "Edited Prunus virus E", "test")
+
+        assert (await dbi.references.find_one("hxn167"))["stats"] == {
+            "latest_build": None,
+            "otu_count": 1,
+            "unbuilt_change_count": 2,
+            "modified_otu_count": 1
+        }
+
+
+async def test_revert_stats(dbi, create_mock_history):
+    """
+    Test that reverting a change clears the stored reference statistics and that they are computed correctly from the
+    remaining changes when next requested.
+
+    """
+    await create_mock_history(remove=False)
+
+    await dbi.references.insert_one({
+        "_id": "hxn167",
+        "stats": {
+            "latest_build": None,
+            "otu_count": 1,
+            "unbuilt_change_count": 4,
+            "modified_otu_count": 1
+        }
+    })
+
+    await virtool.history.db.revert({"db": dbi}, "6116cba1.2")
+
+    assert "stats" not in await dbi.references.find_one("hxn167")
+
+    assert await virtool.references.db.get_stats(dbi, "hxn167") == {
+        "latest_build": None,
+        "otu_count": 1,
+        "unbuilt_change_count": 2,
+        "modified_otu_count": 1
+    }
@@ -0,0 +1,24 @@
+import virtool.history.migrate
+
+
+async def test_add_snapshots(mocker, dbi, create_otu_versions):
+    """
+    Test that snapshots are added to existing changes with versions that are multiples of the snapshot interval.
+
+    """
+    app = {
+        "db": dbi
+    }
+
+    versions, _ = await create_otu_versions()
+
+    mocker.patch("virtool.history.db.SNAPSHOT_INTERVAL", 2)
+
+    await virtool.history.migrate.add_snapshots(app)
+
+    changes = {change["otu"]["version"]: change async for change in dbi.history.find()}
+
+    assert changes[2]["snapshot"] == versions[2]
+    assert changes[4]["snapshot"] == versions[4]
+
+    assert all("snapshot" not in changes[version] for version in (0, 1, 3, 5))
@@ -1,6 +1,9 @@
 import json
 import os
 import sys
+from copy import deepcopy
+
+import dictdiffer
 import pytest
 
 import virtool.history.utils
@@ -24,6 +27,49 @@ def test_calculate_diff(test_otu_edit):
     ].sort()
 
 
+@pytest.mark.parametrize("length", [10, 600])
+def test_compress_sequences(length, test_merged_otu):
+    """
+    Test that only long sequence strings are compressed and that decompressing restores the original value.
+
+    """
+    test_merged_otu["isolates"][0]["sequences"][0]["sequence"] = "ATGC" * length
+
+    compressed = virtool.history.utils.compress_sequences(test_merged_otu)
+
+    sequence = compressed["isolates"][0]["sequences"][0]["sequence"]
+
+    assert isinstance(sequence, bytes) is (length == 600)
+    assert compressed["name"] == test_merged_otu["name"]
+    assert virtool.history.utils.decompress_sequences(compressed) == test_merged_otu
+
+
+def test_compact_diff(test_merged_otu):
+    """
+    Test that long sequences in changed, added, and removed sequences are compressed and that the diff can be applied
+    after decompression.
+
+    """
+    test_merged_otu["isolates"][0]["sequences"][0]["sequence"] = "ATGC" * 300
+
+    new = deepcopy(test_merged_otu)
+
+    new["isolates"][0]["sequences"][0]["sequence"] = "ATGA" * 300
+    new["isolates"][0]["sequences"].append(dict(new["isolates"][0]["sequences"][0], _id="foo"))
+
+    diff = virtool.history.utils.calculate_diff(test_merged_otu, new)
+
+    compacted = virtool.history.utils.compact_diff(diff)
+
+    assert compacted != diff
+    assert len(str(compacted)) < len(str(diff)) / 5
+
+    decompressed = virtool.history.utils.decompress_sequences(compacted)
+
+    assert dictdiffer.patch(decompressed, deepcopy(test_merged_otu)) == new
+    assert dictdiffer.patch(dictdiffer.swap(decompressed), deepcopy(new)) == test_merged_otu
+
+
 @pytest.mark.parametrize("document,description", [
     # Name and abbreviation.
     ({
@@ -41,6 +87,20 @@ def test_compose_create_description(document, description):
     assert virtool.history.utils.compose_create_description(document) == description
 
 
+@pytest.mark.parametrize("verb,abbreviation,description", [
+    ("import", "TMV", "Imported Tobacco mosaic virus (TMV)"),
+    ("remote", "", "Remoted Tobacco mosaic virus"),
+    ("clone", "TMV", "Cloned Tobacco mosaic virus (TMV)")
+])
+def test_compose_insert_description(verb, abbreviation, description):
+    document = {
+        "name": "Tobacco mosaic virus",
+        "abbreviation": abbreviation
+    }
+
+    assert virtool.history.utils.compose_insert_description(verb, document) == description
+
+
 @pytest.mark.parametrize("name,abbreviation,old_abbreviation,schema,description", [
     # Only change name.
     (
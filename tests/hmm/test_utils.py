@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+import virtool.hmm.utils
+
+
+def test_join_pressed_path():
+    assert virtool.hmm.utils.join_pressed_path("/mnt/data", 12) == "/mnt/data/hmm/pressed/12"
+
+
+def test_press_profiles(mocker, tmpdir):
+    """
+    Test that the pressed files are moved into place with their checksums and made read-only.
+
+    """
+    profiles_path = tmpdir.join("profiles.hmm")
+    profiles_path.write("HMMER3/f")
+
+    pressed_path = os.path.join(str(tmpdir), "hmm", "pressed", "12")
+
+    def m_run(command, **kwargs):
+        assert command[0] == "hmmpress"
+
+        for suffix in virtool.hmm.utils.PRESSED_SUFFIXES:
+            with open(f"{command[1]}.{suffix}", "w") as f:
+                f.write(suffix)
+
+    mocker.patch("subprocess.run", m_run)
+
+    virtool.hmm.utils.press_profiles(str(profiles_path), pressed_path)
+
+    assert sorted(os.listdir(pressed_path)) == [
+        "checksums.json",
+        "profiles.hmm.h3f",
+        "profiles.hmm.h3i",
+        "profiles.hmm.h3m",
+        "profiles.hmm.h3p"
+    ]
+
+    assert os.stat(os.path.join(pressed_path, "profiles.hmm.h3m")).st_mode & 0o777 == 0o444
+
+    assert virtool.hmm.utils.check_pressed_profiles(pressed_path)
+
+
+@pytest.mark.parametrize("error", [None, "missing", "checksum", "corrupt"])
+def test_check_pressed_profiles(error, tmpdir):
+    checksums = dict()
+
+    for suffix in virtool.hmm.utils.PRESSED_SUFFIXES:
+        path = tmpdir.join(f"profiles.hmm.{suffix}")
+        path.write(suffix)
+        checksums[f"profiles.hmm.{suffix}"] = virtool.hmm.utils.calculate_checksum(str(path))
+
+    if error != "checksum":
+        tmpdir.join("checksums.json").write(json.dumps(checksums))
+
+    if error == "missing":
+        os.remove(str(tmpdir.join("profiles.hmm.h3p")))
+
+    if error == "corrupt":
+        tmpdir.join("profiles.hmm.h3m").write("foo")
+
+    assert virtool.hmm.utils.check_pressed_profiles(str(tmpdir)) is (error is None)
+
+
+@pytest.mark.parametrize("keep", [None, 12])
+def test_remove_pressed_profiles(keep, tmpdir):
+    pressed = tmpdir.mkdir("hmm").mkdir("pressed")
+
+    pressed.mkdir("11").join("profiles.hmm.h3m").write("foo")
+    pressed.mkdir("12").join("profiles.hmm.h3m").write("bar")
+
+    virtool.hmm.utils.remove_pressed_profiles(str(tmpdir), keep)
+
+    assert os.listdir(str(pressed)) == (["12"] if keep else [])
@@ -111,9 +111,39 @@ async def test_processor(mocker, dbi):
     }
 
 
+async def test_processor_stored(dbi):
+    """
+    Test that counts stored in the index document are used without querying history.
+
+    """
+    document = {
+        "_id": "baz",
+        "change_count": 3,
+        "modified_otu_count": 1
+    }
+
+    assert await virtool.indexes.db.processor(dbi, document) == {
+        "id": "baz",
+        "change_count": 3,
+        "modified_otu_count": 1
+    }
+
+
 async def test_tag_unbuilt_changes(dbi, create_mock_history):
     await create_mock_history(False)
 
+    await dbi.indexes.insert_one({"_id": "foo"})
+
+    await dbi.references.insert_one({
+        "_id": "hxn167",
+        "stats": {
+            "latest_build": None,
+            "otu_count": 1,
+            "unbuilt_change_count": 4,
+            "modified_otu_count": 1
+        }
+    })
+
     async for document in dbi.history.find():
         await dbi.history.insert_one({
             **document,
@@ -131,3 +161,16 @@ async def test_tag_unbuilt_changes(dbi, create_mock_history):
 
     assert await dbi.history.count_documents({"reference.id": "foobar", "index.id": "unbuilt"}) == 4
     assert await dbi.history.count_documents({"reference.id": "hxn167", "index.id": "foo", "index.version": 5}) == 4
+
+    assert await dbi.indexes.find_one("foo") == {
+        "_id": "foo",
+        "change_count": 4,
+        "modified_otu_count": 1
+    }
+
+    assert (await dbi.references.find_one("hxn167"))["stats"] == {
+        "latest_build": None,
+        "otu_count": 1,
+        "unbuilt_change_count": 0,
+        "modified_otu_count": 0
+    }
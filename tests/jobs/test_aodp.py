@@ -98,3 +98,69 @@ def test_fetch_index(mock_job):
         TEST_REF_PATH,
         mock_job.params["local_index_path"],
     )
+
+
+def test_deduplicate_joined_reads(tmpdir):
+    """
+    Test that each unique sequence is written once in order of first appearance and that reads are counted.
+
+    """
+    joined_path = tmpdir.join("flash.extendedFrags.fastq")
+    output_path = tmpdir.join("unique.fa")
+
+    joined_path.write("".join(f"@read_{i}\n{sequence}\n+\n{'I' * len(sequence)}\n" for i, sequence in enumerate([
+        "ACGT",
+        "GGCA",
+        "ACGT",
+        "TTAG",
+        "ACGT",
+        "GGCA"
+    ])))
+
+    counts = virtool.jobs.aodp.deduplicate_joined_reads(str(joined_path), str(output_path))
+
+    assert counts == {
+        "read_1": 3,
+        "read_2": 2,
+        "read_3": 1
+    }
+
+    assert output_path.read() == ">read_1\nACGT\n>read_2\nGGCA\n>read_3\nTTAG\n"
+
+
+def test_read_aodp_output(tmpdir):
+    """
+    Test that AODP output is read into arrays and that unmatched reads and matches below the identity threshold are
+    dropped.
+
+    """
+    path = tmpdir.join("aodp.out")
+
+    path.write(
+        "read_1\tfoo\t100%\t78\t78\t1\t2\n"
+        "read_2\t-\t-\t0\t80\t0\t0\n"
+        "read_3\tbar\t<80%\t40\t90\t0\t0\n"
+        "read_4\tbar\t97.5%\t80\t82\t3\t3\n"
+    )
+
+    columns = virtool.jobs.aodp.read_aodp_output(str(path))
+
+    assert {key: value.tolist() for key, value in columns.items()} == {
+        "id": ["read_1", "read_4"],
+        "sequence_id": ["foo", "bar"],
+        "identity": [100.0, 97.5],
+        "matched_length": [78, 80],
+        "read_length": [78, 82],
+        "min_cluster": [1, 3],
+        "max_cluster": [2, 3]
+    }
+
+
+def test_read_aodp_output_malformed(tmpdir):
+    path = tmpdir.join("aodp.out")
+    path.write("read_1\tfoo\t100%\t78\n")
+
+    with pytest.raises(ValueError) as excinfo:
+        virtool.jobs.aodp.read_aodp_output(str(path))
+
+    assert "Expected 7 fields per line in AODP output" in str(excinfo.value)
@@ -1,5 +1,6 @@
 import pytest
 import filecmp
+import gzip
 import json
 import os
 import pickle
@@ -111,6 +112,45 @@ def test_map_subtraction(mock_job):
     mock_job.eliminate_subtraction()
 
 
+@pytest.mark.parametrize("stream_reads", [True, False])
+def test_stage_list(stream_reads, mock_job):
+    """
+    Test that both elimination stages are replaced with :meth:`.eliminate_reads` when `nuvs_stream_reads` is enabled.
+
+    """
+    mock_job.settings["nuvs_stream_reads"] = stream_reads
+
+    job = virtool.jobs.nuvs.Job(mock_job.db_connection_string, "virtool", mock_job.settings, "foo", mock_job.q)
+
+    stages = [method.__name__ for method in job._stage_list]
+
+    if stream_reads:
+        assert stages[2:4] == ["eliminate_reads", "reunite_pairs"]
+    else:
+        assert stages[2:5] == ["eliminate_otus", "eliminate_subtraction", "reunite_pairs"]
+
+
+def test_eliminate_reads(mocker, mock_job):
+    m_run_pipeline = mocker.patch.object(mock_job, "run_pipeline")
+
+    mock_job.eliminate_reads()
+
+    otu_command, subtraction_command = m_run_pipeline.call_args[0][0]
+
+    assert otu_command[otu_command.index("--un") + 1] == "/dev/stdout"
+    assert otu_command[-2:] == ["-S", os.devnull]
+
+    assert subtraction_command[subtraction_command.index("-U") + 1] == "-"
+
+    # The job's processors are shared between the two mappings.
+    assert otu_command[otu_command.index("-p") + 1] == "4"
+    assert subtraction_command[subtraction_command.index("-p") + 1] == "4"
+    assert subtraction_command[subtraction_command.index("--un") + 1] == os.path.join(
+        mock_job.params["analysis_path"],
+        "unmapped_hosts.fq"
+    )
+
+
 @pytest.mark.parametrize("is_paired", [False, True], ids=["unpaired", "paired"])
 def test_reunite_pairs(is_paired, mock_job):
     """
@@ -155,6 +195,34 @@ def test_reunite_pairs(is_paired, mock_job):
             assert lines == unite[key]
 
 
+@pytest.mark.parametrize("compressed", [False, True])
+def test_write_unmapped_mates(compressed, tmpdir):
+    """
+    Test that only the reads with ids in the unmapped FASTQ file are written and that compressed read files are
+    handled.
+
+    """
+    with open(os.path.join(NUVS_PATH, "unite.json"), "r") as f:
+        unite = json.load(f)
+
+    unmapped_path = tmpdir.join("unmapped_hosts.fq")
+    unmapped_path.write("\n".join(unite["separate"]) + "\n")
+
+    read_path = str(tmpdir.join("reads_1.fq.gz" if compressed else "reads_1.fq"))
+
+    with (gzip.open if compressed else open)(read_path, "wt") as f:
+        f.write("\n".join(unite["left"]) + "\n")
+
+    unmapped_ids = virtool.jobs.nuvs.read_unmapped_ids(str(unmapped_path))
+
+    output_path = str(tmpdir.join("unmapped_1.fq"))
+
+    assert virtool.jobs.nuvs.write_unmapped_mates(read_path, output_path, unmapped_ids) == 4
+
+    with open(output_path, "r") as f:
+        assert [line.rstrip() for line in f] == unite["united_left"]
+
+
 @pytest.mark.parametrize("is_paired", [False, True], ids=["unpaired", "paired"])
 def test_assemble(is_paired, mock_job):
     os.mkdir(mock_job.params["analysis_path"])
@@ -216,6 +284,25 @@ def test_process_fasta(mock_job):
     )
 
 
+def test_find_orfs():
+    """
+    Test that ORFs found for a batch of contigs are indexed and formatted for the results.
+
+    """
+    sequences = [sequence for _, sequence in virtool.bio.read_fasta(os.path.join(NUVS_PATH, "scaffolds_u.fa"))][:10]
+
+    result = virtool.jobs.nuvs.find_orfs(sequences)
+
+    assert len(result) == len(sequences)
+
+    for sequence, orfs in zip(sequences, result):
+        expected = virtool.bio.find_orfs(sequence)
+
+        assert [orf["index"] for orf in orfs] == list(range(len(expected)))
+        assert all(orf["hits"] == [] and "nuc" not in orf for orf in orfs)
+        assert [orf["pro"] for orf in orfs] == [orf["pro"] for orf in expected]
+
+
 def test_press_hmm(mock_job):
     os.mkdir(mock_job.params["analysis_path"])
 
@@ -236,7 +323,48 @@ def test_press_hmm(mock_job):
     assert all("profiles.hmm." + suffix in listing for suffix in ["h3p", "h3m", "h3f", "h3i"])
 
 
-def test_vfam(mock_job, dbs):
+FOO_PROTEIN = (
+    "MVAVRAPRRKRASATDLYKTCKAAGTCPPDVIPKIEGSTLADKILQWSGLGIFLGGLGIGTGTGSGGRTGYIPLGGGGRPSVVDIGPTRPPIIIEPVGPTEPSIVT"
+    "LVEESSIIQSGAPIPTFSGGNGFELTTSSATTPAVLDITPSAGTVHVTSTNIQNPLYIEPPIDIPQAGEASGHIFTTTSTAGTHSYEEIPMEVFASTNGTGLEPIS"
+    "STPIPGIQRVSAPRLYSKAYQQVKVTDPNFIGNPSTFVTFDNPAYEPIDETLTYASSSTVAPDPDFLDIIALHRPALTSRKGTVRYSRLGQKATMKTRSGKQIGAT"
+    "VHYYHDISPIQSFAEHEEIELQPLHTSTHSSAPLFDIYADPDTVPSIHTPRMSYSPTTLPVPRYASNVFSSINTSTTNVTVPLSTSFELPVYSGSDIYTPTSSPTW"
+    "PSLPPPPTTNLPAIVVHGDNYYLWPYIYLIHKRRKRMPYFFSDGFVAY"
+)
+
+BAR_PROTEIN = (
+    "MSSLVSETSNSEVGSQMESPGRGGQSIDAPSSSCFKVRARNLFLTYSKCNLTAVFLLEYISSLLKKYCPTYIYVAQEAHKDGSHHLHCIIQCSKYVRTTSAKFFDI"
+    "KEFHPNVQNPRMPKKALSYCKKSPISEAEYGVFQEIKRPRKKKADAPSTKDAKMAEIIKSSTNKEDYLSMVRKSFPFDWATRLQQFQFSAESLFPSTPPPYVDPFG"
+    "MPSQDTHPVIGAWLRDELYTDRSPTERRRSLYICGPTRTGKTSWARSLGSHNYWQHSVDFLHVIQNARYNVIDDIPFKFVPCWKGLVGSQKDITVNPKYGKKRLLS"
+    "NGIPCIILVNEDEDWLQQMQPSQADWFNANAVVHYMYSGESFFEAL"
+)
+
+FOO_HITS = [
+    {
+        'best_bias': 440.3,
+        'best_e': 5e-135,
+        'best_score': 4.5,
+        'full_bias': 4.5,
+        'full_e': 3.9e-135,
+        'full_score': 440.7,
+        'hit': 'bar'
+    }
+]
+
+BAR_HITS = [
+    {
+        'best_bias': 400.7,
+        'best_e': 1.7e-123,
+        'best_score': 0.8,
+        'full_bias': 0.8,
+        'full_e': 1.4e-123,
+        'full_score': 401.0,
+        'hit': 'foo'
+    }
+]
+
+
+@pytest.fixture
+def vfam_job(mock_job, dbs):
     os.mkdir(mock_job.params["analysis_path"])
 
     dbs.hmm.insert_many([
@@ -250,85 +378,97 @@ def test_vfam(mock_job, dbs):
         }
     ])
 
-    with open(os.path.join(mock_job.params["analysis_path"], "orfs.fa"), "w") as f:
-        f.write(">sequence_0.0\n")
-        f.write(
-            "MVAVRAPRRKRASATDLYKTCKAAGTCPPDVIPKIEGSTLADKILQWSGLGIFLGGLGIGTGTGSGGRTGYIPLGGGGRPSVVDIGPTRPPIIIEPVGPTEPSIVT"
-            "LVEESSIIQSGAPIPTFSGGNGFELTTSSATTPAVLDITPSAGTVHVTSTNIQNPLYIEPPIDIPQAGEASGHIFTTTSTAGTHSYEEIPMEVFASTNGTGLEPIS"
-            "STPIPGIQRVSAPRLYSKAYQQVKVTDPNFIGNPSTFVTFDNPAYEPIDETLTYASSSTVAPDPDFLDIIALHRPALTSRKGTVRYSRLGQKATMKTRSGKQIGAT"
-            "VHYYHDISPIQSFAEHEEIELQPLHTSTHSSAPLFDIYADPDTVPSIHTPRMSYSPTTLPVPRYASNVFSSINTSTTNVTVPLSTSFELPVYSGSDIYTPTSSPTW"
-            "PSLPPPPTTNLPAIVVHGDNYYLWPYIYLIHKRRKRMPYFFSDGFVAY"
-        )
-        f.write("\n>sequence_2.0\n")
-        f.write(
-            "MSSLVSETSNSEVGSQMESPGRGGQSIDAPSSSCFKVRARNLFLTYSKCNLTAVFLLEYISSLLKKYCPTYIYVAQEAHKDGSHHLHCIIQCSKYVRTTSAKFFDI"
-            "KEFHPNVQNPRMPKKALSYCKKSPISEAEYGVFQEIKRPRKKKADAPSTKDAKMAEIIKSSTNKEDYLSMVRKSFPFDWATRLQQFQFSAESLFPSTPPPYVDPFG"
-            "MPSQDTHPVIGAWLRDELYTDRSPTERRRSLYICGPTRTGKTSWARSLGSHNYWQHSVDFLHVIQNARYNVIDDIPFKFVPCWKGLVGSQKDITVNPKYGKKRLLS"
-            "NGIPCIILVNEDEDWLQQMQPSQADWFNANAVVHYMYSGESFFEAL"
-        )
-
     for suffix in ["h3p", "h3m", "h3f", "h3i"]:
         shutil.copyfile(
             os.path.join(NUVS_PATH, "test.hmm." + suffix),
             os.path.join(mock_job.params["analysis_path"], "profiles.hmm." + suffix)
         )
 
+    mock_job.params.update({
+        "hmm_path": os.path.join(mock_job.params["analysis_path"], "profiles.hmm"),
+        "hmm_release_id": 11
+    })
+
     mock_job.results = [
         {
             "orfs": [
-                {"name": "Foo"}
+                {"name": "Foo", "pro": FOO_PROTEIN}
             ]
         },
-        {},
+        {
+            "orfs": []
+        },
         {
             "orfs": [
-                {"name": "Bar"}
+                {"name": "Bar", "pro": BAR_PROTEIN}
             ]
         }
     ]
 
-    mock_job.vfam()
+    return mock_job
+
+
+def test_vfam(vfam_job, dbs):
+    """
+    Test that ORF proteins are searched with ``hmmscan`` and that the hits are annotated and cached for the HMM release.
+
+    """
+    vfam_job.vfam()
 
-    assert mock_job.results == [
+    assert vfam_job.results == [
         {
-            'orfs': [
-                {
-                    'name': 'Foo',
-                    'hits': [
-                        {
-                            'best_bias': 440.3,
-                            'best_e': 5e-135,
-                            'best_score': 4.5,
-                            'full_bias': 4.5,
-                            'full_e': 3.9e-135,
-                            'full_score': 440.7,
-                            'hit': 'bar'
-                        }
-                    ]
-                }
+            "orfs": [
+                {"name": "Foo", "pro": FOO_PROTEIN, "hits": FOO_HITS}
             ]
         },
-        {},
         {
-            'orfs': [
-                {
-                    'name': 'Bar',
-                    'hits': [
-                        {
-                            'best_bias': 400.7,
-                            'best_e': 1.7e-123,
-                            'best_score': 0.8,
-                            'full_bias': 0.8,
-                            'full_e': 1.4e-123,
-                            'full_score': 401.0,
-                            'hit': 'foo'
-                        }
-                    ]
-                }
+            "orfs": []
+        },
+        {
+            "orfs": [
+                {"name": "Bar", "pro": BAR_PROTEIN, "hits": BAR_HITS}
             ]
         }
     ]
 
+    cached = dbs.hmm_hits.find_one({"hash": virtool.jobs.nuvs.hash_protein(FOO_PROTEIN)}, {"_id": False})
+
+    assert cached["release_id"] == 11
+    assert [hit["cluster"] for hit in cached["hits"]] == [9]
+
+
+def test_vfam_cached(mocker, vfam_job, dbs):
+    """
+    Test that ``hmmscan`` only searches proteins that don't have cached hits for the installed HMM release.
+
+    """
+    cached_hits = [dict(FOO_HITS[0], cluster=9)]
+    cached_hits[0].pop("hit")
+
+    dbs.hmm_hits.insert_many([
+        {
+            "hash": virtool.jobs.nuvs.hash_protein(FOO_PROTEIN),
+            "release_id": 11,
+            "hits": cached_hits
+        },
+        {
+            "hash": virtool.jobs.nuvs.hash_protein(BAR_PROTEIN),
+            "release_id": 10,
+            "hits": list()
+        }
+    ])
+
+    m_scan_proteins = mocker.patch.object(vfam_job, "scan_proteins", return_value={
+        virtool.jobs.nuvs.hash_protein(BAR_PROTEIN): list()
+    })
+
+    vfam_job.vfam()
+
+    m_scan_proteins.assert_called_with({virtool.jobs.nuvs.hash_protein(BAR_PROTEIN): BAR_PROTEIN})
+
+    assert vfam_job.results[0]["orfs"][0]["hits"] == FOO_HITS
+    assert "hits" not in vfam_job.results[2]["orfs"][0]
+
 
 def test_import_results(mock_job, dbs):
     """
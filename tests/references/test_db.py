@@ -1,3 +1,6 @@
+import copy
+import gzip
+import json
 import os
 import sys
 from aiohttp.test_utils import make_mocked_coro
@@ -5,6 +8,7 @@ from aiohttp.test_utils import make_mocked_coro
 import pytest
 
 import virtool.references.db
+import virtool.references.utils
 import virtool.errors
 
 RIGHTS = {
@@ -159,6 +163,116 @@ async def test_create_manifest(dbi, test_otu):
     }
 
 
+async def test_get_manifest_otus(mocker, dbi, test_otu, test_sequence, test_merged_otu):
+    """
+    Test that OTUs at their manifest versions are joined from the database and that changed OTUs are patched.
+
+    """
+    await dbi.otus.insert_many([
+        test_otu,
+        dict(test_otu, _id="foo", version=3)
+    ])
+
+    await dbi.sequences.insert_one(test_sequence)
+
+    patched = dict(test_merged_otu, _id="foo", version=2)
+
+    m_patch_to_version = mocker.patch(
+        "virtool.history.db.patch_to_version",
+        make_mocked_coro((None, patched, []))
+    )
+
+    app = {
+        "db": dbi
+    }
+
+    otus = await virtool.references.db.get_manifest_otus(app, {"foo": 2, "6116cba1": 0})
+
+    assert otus == [patched, test_merged_otu]
+
+    m_patch_to_version.assert_called_with(app, "foo", 2)
+
+
+@pytest.mark.parametrize("stored", [True, False])
+async def test_get_stats(stored, dbi, static_time):
+    """
+    Test that stored statistics are returned as they are and that missing statistics are computed and stored.
+
+    """
+    stats = {
+        "latest_build": None,
+        "otu_count": 12,
+        "unbuilt_change_count": 5,
+        "modified_otu_count": 3
+    }
+
+    await dbi.references.insert_one({"_id": "foo", "stats": stats} if stored else {"_id": "foo"})
+
+    await dbi.otus.insert_many([{"_id": "a", "reference": {"id": "foo"}}, {"_id": "b", "reference": {"id": "bar"}}])
+
+    await dbi.history.insert_many([
+        {"_id": "a.0", "otu": {"id": "a"}, "reference": {"id": "foo"}, "index": {"id": "unbuilt"}},
+        {"_id": "a.1", "otu": {"id": "a"}, "reference": {"id": "foo"}, "index": {"id": "unbuilt"}},
+        {"_id": "b.0", "otu": {"id": "b"}, "reference": {"id": "bar"}, "index": {"id": "unbuilt"}}
+    ])
+
+    await dbi.indexes.insert_one({
+        "_id": "baz",
+        "version": 0,
+        "created_at": static_time.datetime,
+        "ready": True,
+        "reference": {"id": "foo"},
+        "user": {"id": "bob"}
+    })
+
+    if not stored:
+        stats = {
+            "latest_build": {
+                "id": "baz",
+                "version": 0,
+                "created_at": static_time.datetime,
+                "user": {"id": "bob"}
+            },
+            "otu_count": 1,
+            "unbuilt_change_count": 2,
+            "modified_otu_count": 1
+        }
+
+    assert await virtool.references.db.get_stats(dbi, "foo") == stats
+    assert (await dbi.references.find_one("foo"))["stats"] == stats
+
+
+@pytest.mark.parametrize("stored", [True, False])
+async def test_increment_stats(stored, dbi):
+    """
+    Test that stored statistics are incremented, that the modified OTU count is set, and that missing statistics are not
+    partially created.
+
+    """
+    stats = {
+        "latest_build": None,
+        "otu_count": 12,
+        "unbuilt_change_count": 5,
+        "modified_otu_count": 3
+    }
+
+    await dbi.references.insert_one({"_id": "foo", "stats": stats} if stored else {"_id": "foo"})
+
+    await virtool.references.db.increment_stats(dbi, "foo", otu_count=-1, unbuilt_change_count=2, modified_otu_count=1)
+
+    document = await dbi.references.find_one("foo")
+
+    if stored:
+        assert document["stats"] == {
+            "latest_build": None,
+            "otu_count": 11,
+            "unbuilt_change_count": 7,
+            "modified_otu_count": 1
+        }
+    else:
+        assert "stats" not in document
+
+
 class TestEdit:
 
     @pytest.mark.parametrize("control_exists", [True, False])
@@ -338,3 +452,231 @@ async def test_delete_group_or_user(field, dbi):
         "groups": [subdocuments[1]] if field == "groups" else subdocuments,
         "users": [subdocuments[1]] if field == "users" else subdocuments
     }
+
+
+async def test_insert_joined_otus(mocker, dbi, static_time, test_merged_otu):
+    """
+    Test that OTUs are inserted in batches along with their sequences and history changes, and that progress is
+    reported after each batch.
+
+    """
+    mocker.patch("virtool.references.db.IMPORT_BATCH_SIZE", 2)
+
+    app = {
+        "db": dbi,
+        "settings": {
+            "data_path": "/foo/bar"
+        }
+    }
+
+    otus = list()
+
+    for index in range(3):
+        otu = copy.deepcopy(test_merged_otu)
+
+        otu.update({
+            "_id": f"remote_{index}",
+            "name": f"Virus {index}",
+            "abbreviation": ""
+        })
+
+        otu["isolates"][0]["sequences"][0].update({
+            "_id": f"sequence_{index}",
+            "accession": f"sequence_{index}"
+        })
+
+        otus.append(otu)
+
+    progress_handler = make_mocked_coro()
+
+    otu_ids = await virtool.references.db.insert_joined_otus(
+        app,
+        otus,
+        static_time.datetime,
+        "foo",
+        "bob",
+        "remote",
+        remote=True,
+        progress_handler=progress_handler
+    )
+
+    assert len(otu_ids) == 3
+
+    assert [call[0] for call in progress_handler.call_args_list] == [(2,), (1,)]
+
+    async for otu in dbi.otus.find():
+        assert otu["_id"] in otu_ids
+        assert otu["reference"] == {"id": "foo"}
+        assert otu["remote"]["id"].startswith("remote_")
+
+    assert await dbi.sequences.count_documents({"otu_id": {"$in": otu_ids}}) == 3
+
+    changes = await dbi.history.find().sort("description").to_list(None)
+
+    assert [c["description"] for c in changes] == ["Remoted Virus 0", "Remoted Virus 1", "Remoted Virus 2"]
+    assert {c["otu"]["id"] for c in changes} == set(otu_ids)
+    assert all(c["method_name"] == "remote" and c["otu"]["version"] == 0 for c in changes)
+
+
+async def test_update_remote_otus(dbi, static_time, test_merged_otu):
+    """
+    Test that unchanged OTUs are skipped, that changed OTUs are updated with history, that new OTUs are inserted, and
+    that hashes are stored on existing OTUs that didn't have one.
+
+    """
+    async def run_in_process(func, *args):
+        return func(*args)
+
+    app = {
+        "db": dbi,
+        "run_in_process": run_in_process,
+        "settings": {
+            "data_path": "/foo/bar"
+        }
+    }
+
+    otus = list()
+
+    for index in range(4):
+        otu = copy.deepcopy(test_merged_otu)
+
+        otu.update({
+            "_id": f"remote_{index}",
+            "name": f"Virus {index}",
+            "abbreviation": ""
+        })
+
+        otu["isolates"][0]["sequences"][0].update({
+            "_id": f"sequence_{index}",
+            "accession": f"sequence_{index}"
+        })
+
+        otus.append(otu)
+
+    otu_ids = await virtool.references.db.insert_joined_otus(
+        app,
+        copy.deepcopy(otus[:3]),
+        static_time.datetime,
+        "foo",
+        "bob",
+        "remote",
+        remote=True
+    )
+
+    await dbi.otus.update_one({"_id": otu_ids[2]}, {"$unset": {"remote.hash": ""}})
+
+    otus[1]["isolates"][0]["sequences"][0]["sequence"] = "ATAGAGA"
+
+    hashes = [virtool.references.utils.compute_otu_hash(otu) for otu in otus]
+
+    updated_otu_ids = await virtool.references.db.update_remote_otus(
+        app,
+        otus,
+        static_time.datetime,
+        "foo",
+        "bob"
+    )
+
+    assert len(updated_otu_ids) == 2
+    assert updated_otu_ids[1] == otu_ids[1]
+
+    # Only the changed OTU is dispatched, as a single document. The OTU that only had its hash stored is not.
+    otu_dispatches = [c[0][2] for c in dbi.dispatch.call_args_list if c[0][:2] == ("otus", "update")]
+
+    assert [otu["id"] for otu in otu_dispatches] == [otu_ids[1]]
+
+    assert await dbi.otus.count_documents({}) == 4
+    assert await dbi.sequences.count_documents({}) == 4
+
+    sequence = await dbi.sequences.find_one({"remote.id": "sequence_1"})
+    assert sequence["sequence"] == "ATAGAGA"
+
+    async for otu in dbi.otus.find():
+        index = int(otu["remote"]["id"][-1])
+
+        assert otu["version"] == (1 if index == 1 else 0)
+        assert otu["remote"]["last_synced_version"] == otu["version"]
+        assert otu["remote"]["hash"] == hashes[index]
+
+    changes = await dbi.history.find({"description": {"$not": {"$regex": "^Remoted Virus [0-2]"}}}).to_list(None)
+
+    assert sorted(c["description"] for c in changes) == ["Remoted Virus 3", "Updated Virus 1"]
+
+
+@pytest.mark.parametrize("error", [None, "duplicate", "invalid"])
+async def test_import_reference_file(error, tmpdir, dbi, static_time, test_merged_otu):
+    """
+    Test that OTUs are streamed from a reference file into the database and that they are removed if the file contains
+    errors.
+
+    """
+    async def run_in_thread(func, *args):
+        return func(*args)
+
+    app = {
+        "db": dbi,
+        "run_in_process": run_in_thread,
+        "run_in_thread": run_in_thread,
+        "settings": {
+            "data_path": str(tmpdir)
+        }
+    }
+
+    otus = list()
+
+    for index in range(3):
+        otu = copy.deepcopy(test_merged_otu)
+
+        otu.update({
+            "_id": f"remote_{index}",
+            "name": f"Virus {index}",
+            "abbreviation": ""
+        })
+
+        otu["isolates"][0]["sequences"][0].update({
+            "_id": f"sequence_{index}",
+            "accession": f"sequence_{index}"
+        })
+
+        otus.append(otu)
+
+    if error == "duplicate":
+        otus[2]["name"] = "Virus 0"
+
+    if error == "invalid":
+        del otus[1]["isolates"][0]["sequences"][0]["sequence"]
+
+    path = os.path.join(str(tmpdir), "reference.json.gz")
+
+    with gzip.open(path, "wt") as f:
+        json.dump({"data_type": "genome", "organism": "virus", "otus": otus}, f)
+
+    progress_handler = make_mocked_coro()
+
+    metadata, errors = await virtool.references.db.import_reference_file(
+        app,
+        path,
+        "foo",
+        static_time.datetime,
+        "bob",
+        "import",
+        progress_handler=progress_handler
+    )
+
+    assert metadata == {
+        "data_type": "genome",
+        "organism": "virus"
+    }
+
+    assert sum(call[0][0] for call in progress_handler.call_args_list) == os.path.getsize(path)
+
+    if error:
+        assert [e["id"] for e in errors] == ["duplicate_names" if error == "duplicate" else "invalid_otus"]
+        assert await dbi.otus.count_documents({}) == 0
+        assert await dbi.sequences.count_documents({}) == 0
+        assert await dbi.history.count_documents({}) == 0
+    else:
+        assert errors == []
+        assert await dbi.otus.count_documents({"reference.id": "foo"}) == 3
+        assert await dbi.sequences.count_documents({"reference.id": "foo"}) == 3
+        assert await dbi.history.count_documents({"reference.id": "foo"}) == 3
@@ -1,5 +1,12 @@
+import copy
+import gzip
+import io
+import json
+import os
+
 import pytest
 
+import virtool.otus.utils
 import virtool.references.utils
 
 
@@ -270,3 +277,258 @@ def test_get_sequence_schema(require_id):
             "required": True
         }
     }
+
+
+@pytest.mark.parametrize("remote", [True, False])
+def test_prepare_otu(remote, static_time, test_merged_otu):
+    test_merged_otu["isolates"][0]["sequences"][0]["accession"] = "KX269872"
+
+    otu_hash = virtool.references.utils.compute_otu_hash(test_merged_otu)
+
+    otu, sequences = virtool.references.utils.prepare_otu(
+        test_merged_otu,
+        static_time.datetime,
+        "foo",
+        "bob",
+        remote=remote
+    )
+
+    assert "_id" not in otu
+    assert "sequences" not in otu["isolates"][0]
+
+    assert otu["created_at"] == static_time.datetime
+    assert otu["imported"] is True
+    assert otu["version"] == 0
+    assert otu["reference"] == {"id": "foo"}
+    assert otu["user"] == {"id": "bob"}
+
+    if remote:
+        assert otu["remote"] == {
+            "id": "6116cba1",
+            "hash": otu_hash,
+            "last_synced_version": 0
+        }
+    else:
+        assert "remote" not in otu
+
+    assert sequences == [{
+        "otu_id": "6116cba1",
+        "isolate_id": "cab8b360",
+        "accession": "KX269872",
+        "definition": "Prunus virus F isolate 8816-s2 segment RNA2 polyprotein 2 gene, complete cds.",
+        "host": "sweet cherry",
+        "sequence": "TGTTTAAGAGATTAAACAACCGCTTTC",
+        "segment": None,
+        "reference": {
+            "id": "foo"
+        },
+        "remote": {
+            "id": "KX269872"
+        }
+    }]
+
+
+def test_compute_otu_hash(test_merged_otu):
+    """
+    Test that the hash ignores isolate and sequence order and fields that aren't exported, and that it changes when
+    exported content changes.
+
+    """
+    sequence = dict(test_merged_otu["isolates"][0]["sequences"][0], accession="KX269872")
+    isolate = test_merged_otu["isolates"][0]
+
+    test_merged_otu["isolates"] = [
+        dict(isolate, sequences=[sequence, dict(sequence, _id="foo")]),
+        dict(isolate, id="bar", default=False, sequences=[dict(sequence, _id="baz")])
+    ]
+
+    otu_hash = virtool.references.utils.compute_otu_hash(test_merged_otu)
+
+    reordered = copy.deepcopy(test_merged_otu)
+    reordered["isolates"].reverse()
+    reordered["isolates"][1]["sequences"].reverse()
+
+    assert virtool.references.utils.compute_otu_hash(reordered) == otu_hash
+
+    assert virtool.references.utils.compute_otu_hash(dict(test_merged_otu, version=5, verified=True)) == otu_hash
+
+    reordered["isolates"][0]["sequences"][0]["sequence"] = "ATAGAGA"
+
+    assert virtool.references.utils.compute_otu_hash(reordered) != otu_hash
+
+    assert virtool.references.utils.compute_otu_hashes([test_merged_otu, dict(test_merged_otu, hash="foo")]) == [
+        otu_hash,
+        "foo"
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_iter_json_object(chunk_size, indent):
+    data = {
+        "otus": [{"_id": str(i), "name": f"Virus {i}", "values": [1.5e3, -20, True, None, "a\"b}]"]} for i in range(7)],
+        "data_type": "genome",
+        "version": 12345,
+        "nested": {
+            "list": [1, 2, {"key": "}"}]
+        }
+    }
+
+    handle = io.StringIO(json.dumps(data, indent=indent))
+
+    members = list(virtool.references.utils.iter_json_object(handle, "otus", 3, chunk_size=chunk_size))
+
+    assert [(key, len(value)) for key, value in members if key == "otus"] == [("otus", 3), ("otus", 3), ("otus", 1)]
+
+    assert [value for key, value in members if key != "otus"] == [
+        data["data_type"],
+        data["version"],
+        data["nested"]
+    ]
+
+    assert [otu for key, value in members if key == "otus" for otu in value] == data["otus"]
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("{}", []),
+    ('{"otus": []}', [("otus", [])]),
+    ('{"organism": "virus", "otus": [1]}', [("organism", "virus"), ("otus", [1])])
+])
+def test_iter_json_object_empty(text, expected):
+    assert list(virtool.references.utils.iter_json_object(io.StringIO(text), "otus", 3)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '{"otus": [1, 2',
+    '{"a": 1 "b": 2}',
+    '[1, 2]',
+    '{"otus": [1,, 2]}',
+    '{"a": 1}x'
+])
+def test_iter_json_object_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(virtool.references.utils.iter_json_object(io.StringIO(text), "otus", 3))
+
+
+def test_iter_reference_file(tmpdir):
+    path = os.path.join(str(tmpdir), "reference.json.gz")
+
+    data = {
+        "data_type": "genome",
+        "otus": [{"_id": str(i)} for i in range(5)],
+        "organism": "virus"
+    }
+
+    with gzip.open(path, "wt") as f:
+        json.dump(data, f)
+
+    with open(path, "rb") as handle:
+        fields = list(virtool.references.utils.iter_reference_file(handle, 2))
+
+    assert [(key, value) for key, value, _ in fields] == [
+        ("data_type", "genome"),
+        ("otus", data["otus"][:2]),
+        ("otus", data["otus"][2:4]),
+        ("otus", data["otus"][4:]),
+        ("organism", "virus")
+    ]
+
+    positions = [position for _, _, position in fields]
+
+    assert positions == sorted(positions)
+    assert positions[-1] == os.path.getsize(path)
+
+
+def test_summarize_otu(test_merged_otu):
+    assert virtool.references.utils.summarize_otu(test_merged_otu) == {
+        "_id": "6116cba1",
+        "name": "Prunus virus F",
+        "abbreviation": "PVF",
+        "isolates": [
+            {
+                "id": "cab8b360",
+                "sequences": [{"_id": "KX269872"}]
+            }
+        ]
+    }
+
+
+@pytest.mark.parametrize("invalid", [False, True])
+def test_check_otus(invalid, test_merged_otu):
+    test_merged_otu["isolates"][0]["sequences"][0]["accession"] = "KX269872"
+
+    otu = copy.deepcopy(test_merged_otu)
+
+    if invalid:
+        del otu["isolates"][0]["sequences"][0]["sequence"]
+
+    summaries, issues, invalid_otus = virtool.references.utils.check_otus([test_merged_otu, otu])
+
+    assert summaries[0] == virtool.references.utils.summarize_otu(test_merged_otu)
+
+    if invalid:
+        assert len(summaries) == 1
+        assert issues == [virtool.otus.utils.verify(test_merged_otu), None]
+        assert invalid_otus == [{
+            "_id": "6116cba1",
+            "name": "Prunus virus F",
+            "issues": {
+                "otu": None,
+                "isolates": {},
+                "sequences": {
+                    "KX269872": {"sequence": ["required field"]}
+                }
+            }
+        }]
+    else:
+        assert len(summaries) == 2
+        assert invalid_otus == []
+
+
+@pytest.mark.parametrize("cache", [True, False])
+async def test_export_writer(cache, tmpdir, test_merged_otu):
+    """
+    Test that the compressed chunks form a valid gzipped export and that the same data is written to the cache file.
+
+    """
+    async def run(func, *args):
+        return func(*args)
+
+    test_merged_otu["isolates"][0]["sequences"][0]["accession"] = "KX269872"
+
+    path = os.path.join(str(tmpdir), "reference.json.gz") if cache else None
+
+    writer = virtool.references.utils.ExportWriter(path, run, run)
+
+    otus = [dict(copy.deepcopy(test_merged_otu), _id=f"otu_{index}") for index in range(3)]
+
+    data = await writer.write_start({"data_type": "genome", "organism": "virus"})
+    data += await writer.write_otus(otus[:2])
+    data += await writer.write_otus([])
+    data += await writer.write_otus(otus[2:])
+    data += await writer.write_end()
+
+    await writer.close()
+
+    assert json.loads(gzip.decompress(data)) == {
+        "data_type": "genome",
+        "organism": "virus",
+        "otus": virtool.references.utils.clean_export_list(otus)
+    }
+
+    if cache:
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+
+def test_join_export_path():
+    settings = {
+        "data_path": "/mnt/data"
+    }
+
+    path = virtool.references.utils.join_export_path(settings, "foo", "bar", {"data_type": "genome"})
+
+    assert path.startswith("/mnt/data/references/foo/bar/reference.")
+    assert path.endswith(".json.gz")
+
+    assert path != virtool.references.utils.join_export_path(settings, "foo", "bar", {"data_type": "barcode"})
@@ -8,6 +8,15 @@ from snapshottest import GenericRepr, Snapshot
 snapshots = Snapshot()
 
 snapshots['test_schema 1'] = {
+    'compression_workers': {
+        'coerce': GenericRepr("<class 'int'>"),
+        'default': 1,
+        'type': 'integer'
+    },
+    'cpu_workers': {
+        'coerce': GenericRepr("<class 'int'>"),
+        'type': 'integer'
+    },
     'data_path': {
         'default': 'data',
         'type': 'string'
@@ -33,6 +42,11 @@ snapshots['test_schema 1'] = {
         'default': 'localhost',
         'type': 'string'
     },
+    'io_workers': {
+        'coerce': GenericRepr("<class 'int'>"),
+        'default': 5,
+        'type': 'integer'
+    },
     'lg_mem': {
         'coerce': GenericRepr("<class 'int'>"),
         'default': 8,
@@ -48,6 +62,11 @@ snapshots['test_schema 1'] = {
         'default': 8,
         'type': 'integer'
     },
+    'nuvs_stream_reads': {
+        'coerce': GenericRepr('<function to_bool at 0x100000000>'),
+        'default': True,
+        'type': 'boolean'
+    },
     'port': {
         'coerce': GenericRepr("<class 'int'>"),
         'default': 9950,
@@ -3,9 +3,12 @@ import concurrent.futures
 
 import aiohttp.client
 import aiohttp.web
+from aiohttp.test_utils import make_mocked_coro
 
 import virtool.app
+import virtool.config
 import virtool.dispatcher
+import virtool.executors
 import virtool.settings.schema
 import virtool.jobs.manager
 
@@ -33,9 +36,17 @@ async def test_init_executors(loop):
     """
     app = aiohttp.web.Application()
 
+    app["settings"] = {
+        "io_workers": 3
+    }
+
     await virtool.app.init_executors(app)
 
     assert isinstance(app["executor"], concurrent.futures.ThreadPoolExecutor)
+    assert app["executor"]._max_workers == 3
+
+    assert set(app["executors"]) == {"io", "cpu", "compression"}
+    assert app["executors"]["compression"].limit == 1
 
     def func(*args):
         return sum(args)
@@ -44,6 +55,40 @@ async def test_init_executors(loop):
 
     assert result == 14
 
+    virtool.executors.shutdown_executors(app["executors"])
+
+
+async def test_init_job_manager(mocker, loop, tmpdir):
+    """
+    Test that the job manager can be created from the state set up by the preceding ``on_startup`` callbacks.
+
+    """
+    app = aiohttp.web.Application()
+
+    app["setup"] = None
+
+    app["settings"] = {
+        **virtool.config.get_defaults(),
+        "data_path": str(tmpdir),
+        "no_job_manager": False
+    }
+
+    app["db"] = mocker.Mock()
+
+    m_scheduler = mocker.Mock(spawn=make_mocked_coro())
+    mocker.patch("aiojobs.aiohttp.get_scheduler_from_app", return_value=m_scheduler)
+    mocker.patch.object(virtool.jobs.manager.IntegratedManager, "run", mocker.Mock())
+
+    await virtool.app.init_metrics(app)
+    await virtool.app.init_executors(app)
+    await virtool.app.init_dispatcher(app)
+    await virtool.app.init_job_manager(app)
+
+    assert isinstance(app["jobs"], virtool.jobs.manager.IntegratedManager)
+    assert m_scheduler.spawn.called
+
+    virtool.executors.shutdown_executors(app["executors"])
+
 
 async def test_init_http_client(app):
     await virtool.app.init_http_client(app)
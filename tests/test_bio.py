@@ -1,3 +1,5 @@
+import gzip
+import io
 import json
 import os
 import pickle
@@ -81,6 +83,73 @@ def mock_blast_server(monkeypatch, loop, aiohttp_server):
     return server
 
 
+@pytest.mark.parametrize("compressed", [False, True])
+def test_open_decompressed(compressed, mocker, tmpdir):
+    """
+    Test that plain and GZIP-compressed files are read as bytes. The :mod:`gzip` fallback is used when `pigz` is not
+    installed.
+
+    """
+    mocker.patch("shutil.which", return_value=None)
+
+    path = str(tmpdir.join("test.fq"))
+
+    with (gzip.open if compressed else open)(path, "wb") as f:
+        f.write(b"@read\nACGT\n+\nIIII\n")
+
+    with virtool.bio.open_decompressed(path) as f:
+        assert f.read() == b"@read\nACGT\n+\nIIII\n"
+
+
+def test_iter_lines():
+    """
+    Test that lines split between chunks are joined and that line endings are removed.
+
+    """
+    f = io.BytesIO(b"@read_1\r\nACGT\nIIII\r\nlast")
+
+    lines = [line for lines in virtool.bio.iter_lines(f, chunk_size=5) for line in lines]
+
+    assert lines == [b"@read_1", b"ACGT", b"IIII", b"last"]
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_read_fasta_batches(compressed, mocker, tmpdir):
+    mocker.patch("shutil.which", return_value=None)
+
+    path = str(tmpdir.join("test.fa"))
+
+    with (gzip.open if compressed else open)(path, "wb") as f:
+        f.write(b">test_1\nATAGAG\nTACA\n>test_2\nCCTC\n>test_3\nGACT\n")
+
+    assert list(virtool.bio.read_fasta_batches(path, batch_size=2, chunk_size=7)) == [
+        [(b"test_1", b"ATAGAGTACA"), (b"test_2", b"CCTC")],
+        [(b"test_3", b"GACT")]
+    ]
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_read_fastq_batches(compressed, mocker, tmpdir):
+    """
+    Test that records split between chunks are parsed correctly and that no batch is larger than `batch_size`.
+
+    """
+    mocker.patch("shutil.which", return_value=None)
+
+    path = str(tmpdir.join("test.fq"))
+
+    records = [(f"@read_{i}".encode(), b"ACGTN" * (i + 1), b"IIIII" * (i + 1)) for i in range(7)]
+
+    with (gzip.open if compressed else open)(path, "wb") as f:
+        for record in records:
+            f.write(b"%s\n%s\n+\n%s\n" % record)
+
+    batches = list(virtool.bio.read_fastq_batches(path, batch_size=2, chunk_size=11))
+
+    assert all(0 < len(batch) <= 2 for batch in batches)
+    assert [record for batch in batches for record in batch] == records
+
+
 @pytest.mark.parametrize("illegal", [False, True])
 def test_read_fasta(illegal, tmpdir):
     tmpfile = tmpdir.join("test.fa")
@@ -171,6 +240,19 @@ def test_translate(sequence, expected):
     assert virtool.bio.translate(sequence) == expected
 
 
+@pytest.mark.parametrize("frame", [0, 1, 2])
+def test_translate_encoded(frame):
+    """
+    Test that encoded sequences are translated in the requested frame and that case is ignored.
+
+    """
+    sequence = "ATAGGGATTAGAGACACAGATAAGGAGAGATATAGAACATGTGACGTACGTACGATCTGAGCTA"
+
+    encoded = virtool.bio.encode_nucleotides(sequence.lower())
+
+    assert virtool.bio.translate_encoded(encoded, frame) == virtool.bio.translate(sequence[frame:])
+
+
 def test_find_orfs(orf_containing):
     result = virtool.bio.find_orfs(orf_containing)
 
@@ -178,6 +260,16 @@ def test_find_orfs(orf_containing):
         assert pickle.load(f) == result
 
 
+def test_find_orfs_in_sequences(orf_containing):
+    result = virtool.bio.find_orfs_in_sequences([orf_containing, "ATG" * 50, orf_containing[::-1]])
+
+    assert result == [
+        virtool.bio.find_orfs(orf_containing),
+        [],
+        virtool.bio.find_orfs(orf_containing[::-1])
+    ]
+
+
 @pytest.mark.parametrize("missing", ["accession", "taxid", "title", None])
 @pytest.mark.parametrize("sciname", ["Vitis", None])
 def test_format_blast_hit(missing, sciname):
@@ -1,3 +1,6 @@
+import copy
+import os
+
 import pytest
 import virtool.config
 import virtool.utils
@@ -5,10 +8,15 @@ import virtool.utils
 
 def test_schema(snapshot):
     """
-    Check that schema has not changed.
+    Check that schema has not changed. The default number of CPU workers depends on the host, so it is checked
+    separately.
 
     """
-    snapshot.assert_match(virtool.config.SCHEMA)
+    schema = copy.deepcopy(virtool.config.SCHEMA)
+
+    assert schema["cpu_workers"].pop("default") == os.cpu_count()
+
+    snapshot.assert_match(schema)
 
 
 def test_get_defaults(mocker):
@@ -1,6 +1,7 @@
 import pytest
 
 import virtool.api.json
+import virtool.metrics
 from virtool.dispatcher import Dispatcher
 
 
@@ -329,3 +330,29 @@ async def test_writer_not_callable():
         await Dispatcher().dispatch("otus", "update", {"test": True}, writer="writer")
 
     assert "writer must be callable" in str(excinfo.value)
+
+
+async def test_dispatch_metrics(create_test_connection):
+    """
+    Test that dispatches and open connections are recorded when a metrics registry is passed to the dispatcher.
+
+    """
+    metrics = virtool.metrics.Metrics()
+
+    dispatcher = Dispatcher(metrics)
+
+    m = create_test_connection()
+    m.user_id = "test"
+
+    dispatcher.add_connection(m)
+
+    assert metrics.websocket_connections._values == {(): 1}
+
+    await dispatcher.dispatch("otus", "update", {"test": True})
+    await dispatcher.dispatch("otus", "update", {"test": False})
+
+    assert metrics.dispatches._values == {("otus", "update"): 2}
+
+    dispatcher.remove_connection(m)
+
+    assert metrics.websocket_connections._values == {(): 0}
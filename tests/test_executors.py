@@ -0,0 +1,100 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+import pytest
+
+import virtool.executors
+import virtool.metrics
+
+
+@pytest.fixture
+def thread_executor():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+async def test_run(thread_executor):
+    metrics = virtool.metrics.Metrics()
+
+    executor = virtool.executors.Executor("io", thread_executor, 2, metrics)
+
+    assert await executor.run(sum, [1, 5, 6, 2]) == 14
+
+    assert executor.queued == 0
+    assert executor.active == 0
+
+    assert metrics.executor_tasks._values == {("io",): 1}
+    assert metrics.executor_task_duration._values[("io",)][2] == 1
+    assert metrics.executor_wait_duration._values[("io",)][2] == 1
+
+
+async def test_run_exception(thread_executor):
+    """
+    Test that exceptions raised by the function propagate and that the executor slot is released.
+
+    """
+    executor = virtool.executors.Executor("io", thread_executor, 1)
+
+    def func():
+        raise ValueError("Bad")
+
+    with pytest.raises(ValueError):
+        await executor.run(func)
+
+    assert executor.active == 0
+
+    assert await executor.run(sum, [1, 2]) == 3
+
+
+async def test_run_limit(thread_executor):
+    """
+    Test that no more than `limit` tasks run at once and that excess tasks are counted as queued.
+
+    """
+    executor = virtool.executors.Executor("io", thread_executor, 1)
+
+    event = threading.Event()
+
+    first = asyncio.ensure_future(executor.run(event.wait))
+    second = asyncio.ensure_future(executor.run(event.wait))
+
+    await asyncio.sleep(0.05)
+
+    assert executor.active == 1
+    assert executor.queued == 1
+
+    event.set()
+
+    await asyncio.gather(first, second)
+
+    assert executor.active == 0
+    assert executor.queued == 0
+
+
+@pytest.mark.parametrize("name,pool_type,workers", [
+    ("io", concurrent.futures.ThreadPoolExecutor, 5),
+    ("cpu", concurrent.futures.ProcessPoolExecutor, os.cpu_count()),
+    ("compression", concurrent.futures.ProcessPoolExecutor, 1)
+])
+@pytest.mark.parametrize("configured", [True, False])
+def test_create_executor(configured, name, pool_type, workers):
+    """
+    Test that the pool type matches the executor name and that the pool is sized from settings or the default.
+
+    """
+    settings = dict()
+
+    if configured:
+        workers = 7
+        settings[f"{name}_workers"] = workers
+
+    executor = virtool.executors.create_executor(name, settings)
+
+    assert isinstance(executor.executor, pool_type)
+    assert executor.executor._max_workers == workers
+    assert executor.limit == workers
+
+    executor.shutdown()
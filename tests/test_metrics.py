@@ -0,0 +1,140 @@
+import pytest
+
+import virtool.metrics
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("plain", "plain"),
+    ('say "hi"', 'say \\"hi\\"'),
+    ("back\\slash", "back\\\\slash"),
+    ("two\nlines", "two\\nlines")
+])
+def test_escape_label_value(value, expected):
+    assert virtool.metrics.escape_label_value(value) == expected
+
+
+@pytest.mark.parametrize("label_names,label_values,extra,expected", [
+    ((), (), "", ""),
+    (("method",), ("GET",), "", '{method="GET"}'),
+    (("method", "route"), ("GET", "/api"), "", '{method="GET",route="/api"}'),
+    (("method",), ("GET",), 'le="0.5"', '{method="GET",le="0.5"}'),
+])
+def test_format_labels(label_names, label_values, extra, expected):
+    assert virtool.metrics.format_labels(label_names, label_values, extra) == expected
+
+
+@pytest.mark.parametrize("value,expected", [
+    (1, "1"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+    (float("inf"), "+Inf")
+])
+def test_format_value(value, expected):
+    assert virtool.metrics.format_value(value) == expected
+
+
+def test_counter():
+    counter = virtool.metrics.Counter("test_total", "A test counter.", ("kind",))
+
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    counter.inc(kind="b")
+
+    assert counter.render() == [
+        "# HELP test_total A test counter.",
+        "# TYPE test_total counter",
+        'test_total{kind="a"} 3',
+        'test_total{kind="b"} 1'
+    ]
+
+
+def test_gauge():
+    gauge = virtool.metrics.Gauge("test_gauge", "A test gauge.")
+
+    gauge.set(5)
+    gauge.inc()
+    gauge.dec(3)
+
+    assert gauge.render_samples() == ["test_gauge 3"]
+
+
+def test_wrong_labels():
+    counter = virtool.metrics.Counter("test_total", "A test counter.", ("kind",))
+
+    with pytest.raises(ValueError) as excinfo:
+        counter.inc(other="a")
+
+    assert "Expected labels" in str(excinfo.value)
+
+
+def test_histogram():
+    histogram = virtool.metrics.Histogram("test_seconds", "A test histogram.", ("kind",), buckets=(0.1, 1))
+
+    histogram.observe(0.05, kind="a")
+    histogram.observe(0.5, kind="a")
+    histogram.observe(5, kind="a")
+
+    assert histogram.render_samples() == [
+        'test_seconds_bucket{kind="a",le="0.1"} 1',
+        'test_seconds_bucket{kind="a",le="1"} 2',
+        'test_seconds_bucket{kind="a",le="+Inf"} 3',
+        'test_seconds_sum{kind="a"} 5.55',
+        'test_seconds_count{kind="a"} 3'
+    ]
+
+
+def test_histogram_load():
+    histogram = virtool.metrics.Histogram("test_seconds", "A test histogram.", buckets=(0.1, 1))
+
+    histogram.load([2, 0, 1], 3, 3)
+
+    assert histogram.render_samples() == [
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 3",
+        "test_seconds_count 3"
+    ]
+
+    with pytest.raises(ValueError):
+        histogram.load([1, 2], 3, 3)
+
+
+def test_render_collectors():
+    """
+    Test that collectors are called with the registry before metrics are rendered.
+
+    """
+    metrics = virtool.metrics.Metrics()
+
+    def collector(registry):
+        registry.jobs.set(4, state="running")
+
+    metrics.add_collector(collector)
+
+    rendered = metrics.render()
+
+    assert 'virtool_jobs{state="running"} 4\n' in rendered
+    assert "# TYPE virtool_http_request_duration_seconds histogram" in rendered
+    assert rendered.endswith("\n")
+
+
+@pytest.mark.parametrize("authorize,administrator,status", [
+    (False, False, 401),
+    (True, False, 403),
+    (True, True, 200)
+], ids=["unauthorized", "not_administrator", "administrator"])
+async def test_metrics_endpoint(authorize, administrator, status, spawn_client):
+    """
+    Test that metrics are only rendered for administrators.
+
+    """
+    client = await spawn_client(authorize=authorize, administrator=administrator)
+
+    resp = await client.get("/metrics")
+
+    assert resp.status == status
+
+    if status == 200:
+        assert resp.headers["Content-Type"] == virtool.metrics.CONTENT_TYPE
+        assert "virtool_http_requests_total" in await resp.text()
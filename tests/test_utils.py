@@ -46,6 +46,20 @@ def test_base_processor(document, result):
     assert virtool.utils.base_processor(document) == result
 
 
+@pytest.mark.parametrize("size,expected", [
+    (2, [[1, 2], [3, 4], [5]]),
+    (5, [[1, 2, 3, 4, 5]]),
+    (10, [[1, 2, 3, 4, 5]])
+])
+def test_chunk_list(size, expected):
+    assert list(virtool.utils.chunk_list([1, 2, 3, 4, 5], size)) == expected
+
+
+def test_chunk_list_invalid_size():
+    with pytest.raises(ValueError):
+        list(virtool.utils.chunk_list([1, 2, 3], 0))
+
+
 def test_decompress_tgz(tmpdir):
     path = str(tmpdir)
 
@@ -2,6 +2,8 @@ import asyncio
 import os
 from typing import Tuple, Union
 
+import pymongo
+
 import virtool.analyses.utils
 import virtool.bio
 import virtool.db.utils
@@ -26,6 +28,13 @@ PROJECTION = [
     "user"
 ]
 
+INDEXES = [
+    pymongo.IndexModel("sample.id"),
+    pymongo.IndexModel([("created_at", pymongo.DESCENDING)]),
+    pymongo.IndexModel("reference.id"),
+    pymongo.IndexModel("workflow")
+]
+
 
 class BLAST:
 
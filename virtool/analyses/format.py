@@ -17,7 +17,7 @@ import virtool.analyses.db
 import virtool.analyses.utils
 import virtool.db.core
 import virtool.db.utils
-import virtool.history.db
+import virtool.history.cache
 import virtool.otus.db
 import virtool.otus.utils
 
@@ -120,6 +120,18 @@ async def load_results(settings: dict, document: dict) -> dict:
 
 
 async def format_aodp(app, document):
+    if document["results"] == "file":
+        path = virtool.analyses.utils.join_aodp_results_path(
+            app["settings"]["data_path"],
+            document["_id"],
+            document["sample"]["id"]
+        )
+
+        document = {
+            **document,
+            "results": await app["run_in_thread"](virtool.analyses.utils.load_aodp_results, path)
+        }
+
     patched_otus = await gather_patched_otus(app, document["results"])
 
     hits = defaultdict(list)
@@ -338,11 +350,11 @@ async def gather_patched_otus(app, results):
     otu_specifiers = {(hit["otu"]["id"], hit["otu"]["version"]) for hit in results}
 
     patched_otus = await asyncio.gather(*[
-        virtool.history.db.patch_to_version(
+        virtool.history.cache.get_patched_otu(
             app,
             otu_id,
             version
         ) for otu_id, version in otu_specifiers
     ])
 
-    return {patched["_id"]: patched for _, patched, _ in patched_otus}
+    return {patched["_id"]: patched for patched in patched_otus}
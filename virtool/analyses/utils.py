@@ -1,6 +1,7 @@
 import os
 from typing import Union
 
+import numpy
 import visvalingamwyatt as vw
 
 WORKFLOW_NAMES = (
@@ -9,6 +10,9 @@ WORKFLOW_NAMES = (
     "pathoscope_bowtie"
 )
 
+#: The name of the file in the analysis directory that AODP matches are stored in with an array for each field.
+AODP_RESULTS_FILENAME = "results.npz"
+
 
 def transform_coverage_to_coordinates(coverage_list: list) -> list:
     """
@@ -87,3 +91,62 @@ def join_analysis_json_path(data_path, analysis_id, sample_id):
         join_analysis_path(data_path, analysis_id, sample_id),
         "results.json"
     )
+
+
+def join_aodp_results_path(data_path, analysis_id, sample_id):
+    return os.path.join(
+        join_analysis_path(data_path, analysis_id, sample_id),
+        AODP_RESULTS_FILENAME
+    )
+
+
+def load_aodp_results(path: str) -> list:
+    """
+    Load the AODP matches stored at `path` by the AODP job and convert them to a list of hit dicts.
+
+    :param path: the path to the AODP results file
+    :return: the AODP hits
+
+    """
+    with numpy.load(path, allow_pickle=False) as data:
+        columns = {key: data[key].tolist() for key in data.files}
+
+    return [
+        {
+            "id": read_id,
+            "sequence_id": sequence_id,
+            "identity": identity,
+            "matched_length": matched_length,
+            "read_length": read_length,
+            "min_cluster": min_cluster,
+            "max_cluster": max_cluster,
+            "count": count,
+            "otu": {
+                "version": otu_version,
+                "id": otu_id
+            }
+        }
+        for (
+            read_id,
+            sequence_id,
+            identity,
+            matched_length,
+            read_length,
+            min_cluster,
+            max_cluster,
+            count,
+            otu_id,
+            otu_version
+        ) in zip(
+            columns["id"],
+            columns["sequence_id"],
+            columns["identity"],
+            columns["matched_length"],
+            columns["read_length"],
+            columns["min_cluster"],
+            columns["max_cluster"],
+            columns["count"],
+            columns["otu_id"],
+            columns["otu_version"]
+        )
+    ]
@@ -1,5 +1,4 @@
 import asyncio
-import concurrent.futures
 import logging
 import os
 import signal
@@ -15,19 +14,25 @@ import virtool.app_routes
 import virtool.config
 import virtool.db.core
 import virtool.db.migrate
+import virtool.db.profiling
 import virtool.db.utils
 import virtool.dispatcher
 import virtool.errors
+import virtool.executors
 import virtool.files.manager
+import virtool.history.cache
 import virtool.hmm.db
 import virtool.http.accept
 import virtool.http.auth
 import virtool.http.csp
 import virtool.http.errors
+import virtool.http.metrics
+import virtool.http.profiling
 import virtool.http.proxy
 import virtool.http.query
 import virtool.jobs.manager
 import virtool.logs
+import virtool.metrics
 import virtool.references.db
 import virtool.resources
 import virtool.sentry
@@ -108,33 +113,40 @@ async def init_version(app: web.Application):
     app["version"] = version
 
 
-async def init_executors(app: web.Application):
+async def init_metrics(app: web.Application):
     """
-    An application ``on_startup`` callback that initializes a :class:`~ThreadPoolExecutor` and attaches it to the
-    ``app`` object.
+    An application ``on_startup`` callback that attaches a :class:`~virtool.metrics.Metrics` registry to the ``app``
+    object. Metrics are not collected in setup mode.
 
     :param app: the application object
 
     """
-    loop = asyncio.get_event_loop()
+    if app["setup"] is None:
+        app["metrics"] = virtool.metrics.Metrics()
+
+
+async def init_executors(app: web.Application):
+    """
+    An application ``on_startup`` callback that initializes the named executor pools described in
+    :mod:`virtool.executors` and attaches them to the ``app`` object as ``executors``.
 
-    thread_executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+    The ``io`` thread pool is also used as the event loop's default executor and is available as ``run_in_thread``.
+    The ``cpu`` process pool is available as ``run_in_process``.
 
-    loop.set_default_executor(thread_executor)
+    :param app: the application object
 
-    async def run_in_thread(func, *args):
-        return await loop.run_in_executor(thread_executor, func, *args)
+    """
+    loop = asyncio.get_event_loop()
 
-    app["run_in_thread"] = run_in_thread
-    app["executor"] = thread_executor
+    executors = virtool.executors.create_executors(app["settings"], app.get("metrics"))
 
-    process_executor = concurrent.futures.ProcessPoolExecutor()
+    loop.set_default_executor(executors["io"].executor)
 
-    async def run_in_process(func, *args):
-        return await loop.run_in_executor(process_executor, func, *args)
+    app["executors"] = executors
+    app["executor"] = executors["io"].executor
 
-    app["run_in_process"] = run_in_process
-    app["process_executor"] = process_executor
+    app["run_in_thread"] = executors["io"].run
+    app["run_in_process"] = executors["cpu"].run
 
 
 async def init_resources(app: web.Application):
@@ -183,13 +195,14 @@ async def init_dispatcher(app):
 
     """
     if app["setup"] is None:
-        app["dispatcher"] = virtool.dispatcher.Dispatcher()
+        app["dispatcher"] = virtool.dispatcher.Dispatcher(app.get("metrics"))
 
 
 async def init_db(app):
     """
     An application ``on_startup`` callback that attaches an instance of :class:`~AsyncIOMotorClient` and the ``db_name``
-    to the Virtool ``app`` object. Also initializes collection indices.
+    to the Virtool ``app`` object. Also attaches a :class:`~virtool.db.profiling.Profiler` that records the latency of
+    database operations.
 
     :param app: the app object
     :type app: :class:`aiohttp.web.Application`
@@ -198,11 +211,17 @@ async def init_db(app):
     if app["setup"] is None:
         settings = app["settings"]
 
+        app["db_profiler"] = virtool.db.profiling.Profiler()
+
         db_client = motor_asyncio.AsyncIOMotorClient(
             settings["db_connection_string"],
-            serverSelectionTimeoutMS=6000
+            serverSelectionTimeoutMS=6000,
+            event_listeners=[virtool.db.profiling.CommandListener(app["db_profiler"])]
         )
 
+        if "metrics" in app:
+            app["metrics"].add_collector(app["db_profiler"].export)
+
         try:
             await db_client.list_database_names()
         except pymongo.errors.ServerSelectionTimeoutError:
@@ -217,6 +236,23 @@ async def init_db(app):
         )
 
 
+async def init_patched_otu_cache(app):
+    """
+    An application ``on_startup`` callback that attaches a :class:`~virtool.history.cache.PatchedOTUCache` to the
+    ``app`` object. The cache is not used in setup mode.
+
+    :param app: the application object
+
+    """
+    if app["setup"] is None:
+        metrics = app.get("metrics")
+
+        app["patched_otu_cache"] = virtool.history.cache.PatchedOTUCache(metrics=metrics)
+
+        if metrics:
+            metrics.add_collector(app["patched_otu_cache"].update_metrics)
+
+
 async def init_check_db(app):
     if app["setup"] is not None:
         return
@@ -237,28 +273,8 @@ async def init_check_db(app):
     except pymongo.errors.CollectionInvalid:
         pass
 
-    logger.info("Creating database indexes...")
-    await db.analyses.create_index("sample.id")
-    await db.analyses.create_index([("created_at", -1)])
-    await db.history.create_index("otu.id")
-    await db.history.create_index("index.id")
-    await db.history.create_index("created_at")
-    await db.history.create_index([("otu.name", 1)])
-    await db.history.create_index([("otu.version", -1)])
-    await db.indexes.drop_indexes()
-    await db.indexes.create_index([("version", 1), ("reference.id", 1)], unique=True)
-    await db.keys.create_index("id", unique=True)
-    await db.keys.create_index("user.id")
-    await db.otus.create_index([
-        ("_id", pymongo.ASCENDING),
-        ("isolate.id", pymongo.ASCENDING)
-    ])
-    await db.otus.create_index("name")
-    await db.otus.create_index("nickname")
-    await db.otus.create_index("abbreviation")
-    await db.samples.create_index([("created_at", pymongo.DESCENDING)])
-    await db.sequences.create_index("otu_id")
-    await db.sequences.create_index("name")
+    logger.info("Checking database indexes...")
+    await db.ensure_indexes()
 
 
 async def init_client_path(app):
@@ -390,12 +406,7 @@ async def on_shutdown(app):
         pass
 
     try:
-        app["executor"].shutdown(wait=True)
-    except KeyError:
-        pass
-
-    try:
-        app["process_executor"].shutdown(wait=True)
+        virtool.executors.shutdown_executors(app["executors"])
     except KeyError:
         pass
 
@@ -424,7 +435,9 @@ def create_app(config):
         virtool.http.csp.middleware,
         virtool.http.errors.middleware,
         virtool.http.proxy.middleware,
-        virtool.http.query.middleware
+        virtool.http.query.middleware,
+        virtool.http.profiling.middleware,
+        virtool.http.metrics.middleware
     ]
 
     do_setup = virtool.config.should_do_setup(config)
@@ -445,12 +458,14 @@ def create_app(config):
         init_version,
         init_client_path,
         init_setup,
+        init_metrics,
         init_paths,
         init_http_client,
         init_routes,
         init_executors,
         init_dispatcher,
         init_db,
+        init_patched_otu_cache,
         init_settings,
         init_sentry,
         init_check_db,
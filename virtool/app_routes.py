@@ -5,6 +5,7 @@ import sys
 import virtool.account.api
 import virtool.analyses.api
 import virtool.caches.api
+import virtool.db.api
 import virtool.downloads.api
 import virtool.files.api
 import virtool.genbank.api
@@ -12,6 +13,7 @@ import virtool.groups.api
 import virtool.history.api
 import virtool.hmm.api
 import virtool.http.auth
+import virtool.http.metrics
 import virtool.http.root
 import virtool.http.ws
 import virtool.indexes.api
@@ -46,6 +48,7 @@ ROUTES = (
     virtool.account.api.routes,
     virtool.analyses.api.routes,
     virtool.caches.api.routes,
+    virtool.db.api.routes,
     virtool.downloads.api.routes,
     virtool.files.api.routes,
     virtool.genbank.api.routes,
@@ -73,6 +76,9 @@ def setup_routes(app):
 
     app.router.add_get("/ws", virtool.http.ws.root)
 
+    if "metrics" in app:
+        app.router.add_get("/metrics", virtool.http.metrics.handler)
+
     for routes in ROUTES:
         app.router.add_routes(routes)
 
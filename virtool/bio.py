@@ -1,13 +1,17 @@
 import asyncio
+import contextlib
 import gzip
 import io
 import json
 import logging
 import re
+import shutil
+import subprocess
 import zipfile
-from typing import Generator, List
+from typing import BinaryIO, Generator, Iterable, List
 
 import aiohttp
+import numpy
 
 import virtool.analyses.db
 import virtool.errors
@@ -18,6 +22,15 @@ logger = logging.getLogger(__name__)
 
 BLAST_URL = "https://blast.ncbi.nlm.nih.gov/Blast.cgi"
 
+#: The first two bytes of a GZIP-compressed file.
+GZIP_MAGIC = b"\x1f\x8b"
+
+#: The number of bytes read at once by :func:`.iter_lines`.
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+#: The default number of records in each batch yielded by the FASTA and FASTQ batch readers.
+RECORD_BATCH_SIZE = 10000
+
 COMPLEMENT_TABLE = {
     "A": "T",
     "T": "A",
@@ -26,6 +39,12 @@ COMPLEMENT_TABLE = {
     "N": "N"
 }
 
+#: A :meth:`str.translate` table for complementing uppercase nucleotide sequences.
+COMPLEMENT_TRANS = str.maketrans(COMPLEMENT_TABLE)
+
+#: The nucleotides that can appear in codons in :const:`TRANSLATION_TABLE`. A nucleotide's code is its index here.
+NUCLEOTIDES = "ACGTN"
+
 #: A standard translation table, including ambiguity.
 TRANSLATION_TABLE = {
     "TTT": "F",
@@ -122,6 +141,148 @@ TRANSLATION_TABLE = {
     "GGN": "G"
 }
 
+#: A :meth:`bytes.translate` table that replaces nucleotides with their code in :const:`NUCLEOTIDES`, ignoring case.
+#: All other characters are replaced with the code 5.
+NUCLEOTIDE_CODES = bytes(
+    NUCLEOTIDES.index(c) if c in NUCLEOTIDES else 5 for c in (chr(i).upper() for i in range(256))
+)
+
+#: Amino acids indexed by codon. The index of a codon is `36 * a + 6 * b + c` where `a`, `b`, and `c` are the nucleotide
+#: codes from :const:`NUCLEOTIDE_CODES`. Codons that are not in :const:`TRANSLATION_TABLE` translate to _X_.
+CODON_LOOKUP = numpy.frombuffer(bytes(
+    ord(TRANSLATION_TABLE.get(a + b + c, "X"))
+    for a in NUCLEOTIDES + "?"
+    for b in NUCLEOTIDES + "?"
+    for c in NUCLEOTIDES + "?"
+), dtype=numpy.uint8)
+
+
+@contextlib.contextmanager
+def open_decompressed(path: str) -> Generator[BinaryIO, None, None]:
+    """
+    Open the file at `path` for reading bytes. GZIP-compressed files are detected by their first bytes and are
+    decompressed with `pigz` in a separate process if it is installed or with :mod:`gzip` otherwise.
+
+    :param path: the path to the file
+    :return: a binary file object
+
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+
+    if not compressed:
+        with open(path, "rb") as f:
+            yield f
+
+        return
+
+    pigz = shutil.which("pigz")
+
+    if pigz is None:
+        with gzip.open(path, "rb") as f:
+            yield f
+
+        return
+
+    process = subprocess.Popen([pigz, "-dc", path], stdout=subprocess.PIPE)
+
+    try:
+        yield process.stdout
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+
+    # A negative return code means pigz was stopped by a signal, such as when it is stopped early by closing the pipe.
+    if returncode > 0:
+        raise IOError(f"Could not decompress {path}")
+
+
+def iter_lines(f: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Generator[List[bytes], None, None]:
+    """
+    Read the binary file object `f` in chunks of `chunk_size` bytes and yield the complete lines in each chunk as a
+    list. Lines do not include line endings. A line that is split between chunks is yielded with the next chunk.
+
+    :param f: a binary file object
+    :param chunk_size: the number of bytes to read at once
+    :return: lists of lines
+
+    """
+    remainder = b""
+
+    while True:
+        chunk = f.read(chunk_size)
+
+        if not chunk:
+            if remainder:
+                yield [remainder.rstrip(b"\r")]
+
+            return
+
+        buffer = remainder + chunk
+
+        end = buffer.rfind(b"\n")
+
+        if end == -1:
+            remainder = buffer
+            continue
+
+        remainder = buffer[end + 1:]
+
+        lines = buffer[:end].split(b"\n")
+
+        if b"\r" in buffer:
+            lines = [line.rstrip(b"\r") for line in lines]
+
+        yield lines
+
+
+def read_fasta_batches(
+        path: str,
+        batch_size: int = RECORD_BATCH_SIZE,
+        chunk_size: int = READ_CHUNK_SIZE
+) -> Generator[List[tuple], None, None]:
+    """
+    Parse the FASTA file at `path` and yield lists of at most `batch_size` records. Each record is a tuple of the header
+    and sequence as `bytes`. The file can be GZIP-compressed.
+
+    :param path: the path to the FASTA file
+    :param batch_size: the maximum number of records in a batch
+    :param chunk_size: the number of bytes to read from the file at once
+    :return: a generator of record batches
+
+    """
+    batch = list()
+
+    header = None
+    seq = list()
+
+    with open_decompressed(path) as f:
+        for lines in iter_lines(f, chunk_size):
+            for line in lines:
+                if line[:1] == b">":
+                    if header is not None:
+                        batch.append((header, b"".join(seq)))
+
+                        if len(batch) == batch_size:
+                            yield batch
+                            batch = list()
+
+                    header = line.rstrip().replace(b">", b"")
+                    seq = list()
+                    continue
+
+                if header is not None:
+                    seq.append(line)
+                    continue
+
+                raise IOError(f"Illegal FASTA line: {line.decode()}")
+
+    if header is not None:
+        batch.append((header, b"".join(seq)))
+
+    if batch:
+        yield batch
+
 
 def read_fasta(path: str) -> List[tuple]:
     """
@@ -131,31 +292,55 @@ def read_fasta(path: str) -> List[tuple]:
     :return: the FASTA content
 
     """
-    data = list()
+    return list(iter_fasta(path))
 
-    with open(path, "r") as f:
-        header = None
-        seq = []
 
-        for line in f:
-            if line[0] == ">":
-                if header:
-                    data.append((header, "".join(seq)))
+def iter_fasta(path: str) -> Generator[tuple, None, None]:
+    """
+    Parse the FASTA file at `path` and yield a tuple containing the header and sequence for each record. Records are
+    read in batches with :func:`.read_fasta_batches`.
 
-                header = line.rstrip().replace(">", "")
-                seq = []
-                continue
+    :param path: the path to the FASTA file
+    :return: a generator of FASTA records
 
-            if header:
-                seq.append(line.rstrip())
-                continue
+    """
+    for batch in read_fasta_batches(path):
+        for header, seq in batch:
+            yield header.decode(), seq.decode()
+
+
+def read_fastq_batches(
+        path: str,
+        batch_size: int = RECORD_BATCH_SIZE,
+        chunk_size: int = READ_CHUNK_SIZE
+) -> Generator[List[tuple], None, None]:
+    """
+    Parse the FASTQ file at `path` and yield lists of at most `batch_size` records. Each record is a tuple of the
+    header, sequence, and quality as `bytes`. The file can be GZIP-compressed.
+
+    Records are expected to span four lines. The content of the `+` line is ignored.
+
+    :param path: the path to the FASTQ file
+    :param batch_size: the maximum number of records in a batch
+    :param chunk_size: the number of bytes to read from the file at once
+    :return: a generator of record batches
 
-            raise IOError(f"Illegal FASTA line: {line}")
+    """
+    pending = list()
+
+    with open_decompressed(path) as f:
+        for lines in iter_lines(f, chunk_size):
+            if pending:
+                lines = pending + lines
+
+            end = len(lines) - len(lines) % 4
+
+            pending = lines[end:]
 
-        if header:
-            data.append((header, "".join(seq)))
+            records = list(zip(lines[0:end:4], lines[1:end:4], lines[3:end:4]))
 
-    return data
+            for start in range(0, len(records), batch_size):
+                yield records[start:start + batch_size]
 
 
 def read_fastq(f) -> Generator[tuple, None, list]:
@@ -197,48 +382,26 @@ def read_fastq(f) -> Generator[tuple, None, list]:
 def read_fastq_from_path(path: str) -> Generator[tuple, None, None]:
     """
     Read the FASTQ file at `path` and yields its content as tuples. Accepts both uncompressed and GZIP-compressed FASTQ
-    files.
+    files. Records are read in batches with :func:`.read_fastq_batches`.
 
     :param path: the path to the FASTQ File
     :return: tuples containing the header, sequence, and quality
 
     """
-    try:
-        with open(path, "r") as f:
-            for record in read_fastq(f):
-                yield record
-    except UnicodeDecodeError:
-        with gzip.open(path, "rt") as f:
-            for record in read_fastq(f):
-                yield record
+    for batch in read_fastq_batches(path):
+        for header, seq, quality in batch:
+            yield header.decode(), seq.decode(), quality.decode()
 
 
 def read_fastq_headers(path: str) -> list:
     """
-    Return a list of FASTQ headers for the FASTQ file located at `path`. Only accepts uncompressed FASTQ files.
+    Return a list of FASTQ headers for the FASTQ file located at `path`.
 
     :param path: the path to the FASTQ file
     :return: a list of FASTQ headers
 
     """
-    headers = list()
-
-    had_plus = False
-
-    with open(path, "r") as f:
-        for line in f:
-            if line == "+\n":
-                had_plus = True
-                continue
-
-            if not had_plus and line[0] == "@":
-                headers.append(line.rstrip())
-                continue
-
-            if had_plus:
-                had_plus = False
-
-    return headers
+    return [header.decode() for batch in read_fastq_batches(path) for header, _, _ in batch]
 
 
 def reverse_complement(sequence: str) -> str:
@@ -248,31 +411,51 @@ def reverse_complement(sequence: str) -> str:
     :param sequence: the sequence to transform
     :return: the reverse complement
     """
-    complement = [COMPLEMENT_TABLE[s] for s in sequence.upper()]
-    complement.reverse()
+    return sequence.upper().translate(COMPLEMENT_TRANS)[::-1]
 
-    return "".join(complement)
 
-
-def translate(sequence: str) -> str:
+def encode_nucleotides(sequence: str) -> numpy.ndarray:
     """
-    Translate the passed nucleotide sequence to protein. Substitutes _X_ for invalid codons.
+    Encode the passed nucleotide sequence as an array of nucleotide codes (see :const:`NUCLEOTIDE_CODES`).
 
     :param sequence: the nucleotide sequence
+    :return: the encoded sequence
+
+    """
+    return numpy.frombuffer(sequence.encode("ascii", "replace").translate(NUCLEOTIDE_CODES), dtype=numpy.uint8)
+
+
+def translate_encoded(encoded: numpy.ndarray, frame: int = 0) -> str:
+    """
+    Translate a nucleotide sequence encoded with :func:`.encode_nucleotides` to protein starting at `frame`.
+
+    All codons are looked up in :const:`CODON_LOOKUP` at once.
+
+    :param encoded: the encoded nucleotide sequence
+    :param frame: the offset of the first codon
     :return: a translated protein sequence
 
     """
-    sequence = sequence.upper()
+    end = frame + (len(encoded) - frame) // 3 * 3
+
+    if end <= frame:
+        return ""
+
+    # The largest index is 215, so the codon indexes fit in the uint8 codes.
+    indexes = encoded[frame:end:3] * 36 + encoded[frame + 1:end:3] * 6 + encoded[frame + 2:end:3]
+
+    return CODON_LOOKUP[indexes].tobytes().decode()
 
-    protein = list()
 
-    for i in range(0, len(sequence) // 3):
-        codon = sequence[i * 3:(i + 1) * 3]
+def translate(sequence: str) -> str:
+    """
+    Translate the passed nucleotide sequence to protein. Substitutes _X_ for invalid codons.
 
-        # Translate to X if the codon matches no amino acid (taking into account ambiguous codons where possible)
-        protein.append(TRANSLATION_TABLE.get(codon, "X"))
+    :param sequence: the nucleotide sequence
+    :return: a translated protein sequence
 
-    return "".join(protein)
+    """
+    return translate_encoded(encode_nucleotides(sequence))
 
 
 def find_orfs(sequence: str) -> List[dict]:
@@ -291,9 +474,11 @@ def find_orfs(sequence: str) -> List[dict]:
     if sequence_length > 300:
         # Looks at both forward (+) and reverse (-) strands.
         for strand, nuc in [(+1, sequence), (-1, reverse_complement(sequence))]:
+            encoded = encode_nucleotides(nuc)
+
             # Look in all three translation frames.
             for frame in range(3):
-                translation = translate(nuc[frame:])
+                translation = translate_encoded(encoded, frame)
                 translation_length = len(translation)
 
                 aa_start = 0
@@ -313,8 +498,8 @@ def find_orfs(sequence: str) -> List[dict]:
                             end = sequence_length - frame - aa_start * 3
 
                         orfs.append({
-                            "pro": str(translation[aa_start:aa_end]),
-                            "nuc": str(nuc[start:end]),
+                            "pro": translation[aa_start:aa_end],
+                            "nuc": nuc[start:end],
                             "frame": frame,
                             "strand": strand,
                             "pos": (start, end)
@@ -325,6 +510,18 @@ def find_orfs(sequence: str) -> List[dict]:
     return orfs
 
 
+def find_orfs_in_sequences(sequences: Iterable[str]) -> List[List[dict]]:
+    """
+    Find the ORFs in each of the passed nucleotide sequences using :func:`.find_orfs`. Finding ORFs for a batch of
+    sequences in one call reduces overhead when the work is sent to another process.
+
+    :param sequences: the nucleotide sequences
+    :return: a list of ORFs for each sequence
+
+    """
+    return [find_orfs(sequence) for sequence in sequences]
+
+
 async def initialize_ncbi_blast(settings: dict, sequence: dict) -> tuple:
     """
     Send a request to NCBI to BLAST the passed sequence. Return the RID and RTOE from the response.
@@ -3,6 +3,7 @@ import hashlib
 import json
 import os
 
+import pymongo
 import pymongo.errors
 
 import virtool.utils
@@ -17,6 +18,16 @@ PROJECTION = [
     "sample"
 ]
 
+INDEXES = [
+    # Supports finding reusable caches for a sample as well as listing all caches for a sample.
+    pymongo.IndexModel([
+        ("sample.id", pymongo.ASCENDING),
+        ("hash", pymongo.ASCENDING),
+        ("program", pymongo.ASCENDING),
+        ("missing", pymongo.ASCENDING)
+    ])
+]
+
 
 def calculate_cache_hash(parameters: dict) -> str:
     """
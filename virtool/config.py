@@ -69,6 +69,30 @@ SCHEMA = {
         "default": 4
     },
 
+    # Executor pool sizes
+    "io_workers": {
+        "type": "integer",
+        "coerce": int,
+        "default": 5
+    },
+    "cpu_workers": {
+        "type": "integer",
+        "coerce": int,
+        "default": os.cpu_count()
+    },
+    "compression_workers": {
+        "type": "integer",
+        "coerce": int,
+        "default": 1
+    },
+
+    # Jobs
+    "nuvs_stream_reads": {
+        "type": "boolean",
+        "coerce": virtool.utils.to_bool,
+        "default": True
+    },
+
     # MongoDB
     "db_connection_string": {
         "type": "string",
@@ -109,6 +133,12 @@ RESOURCE_TYPES = (
     "mem"
 )
 
+EXECUTOR_KEYS = (
+    "io_workers",
+    "cpu_workers",
+    "compression_workers"
+)
+
 
 def coerce(key, value):
     try:
@@ -221,6 +251,30 @@ def get_from_args():
         metavar="MEM"
     )
 
+    parser.add_argument(
+        "--io-workers",
+        dest="io_workers",
+        default=None,
+        help="the number of threads for file and other blocking I/O tasks",
+        metavar="WORKERS"
+    )
+
+    parser.add_argument(
+        "--cpu-workers",
+        dest="cpu_workers",
+        default=None,
+        help="the number of processes for parsing and other CPU-bound tasks",
+        metavar="WORKERS"
+    )
+
+    parser.add_argument(
+        "--compression-workers",
+        dest="compression_workers",
+        default=None,
+        help="the number of processes for compressing data",
+        metavar="WORKERS"
+    )
+
     parser.add_argument(
         "--no-client",
         action="store_true",
@@ -459,6 +513,11 @@ def validate_limits(config):
                 f"Configured {job_limit_key} ({job_limit}) exceeds instance {resource_key} limit ({host_limit})"
             )
 
+    for executor_key in EXECUTOR_KEYS:
+        if int(config[executor_key]) < 1:
+            fatal = True
+            logger.fatal(f"Configured {executor_key} must be at least 1")
+
     if fatal:
         sys.exit(1)
 
@@ -0,0 +1,48 @@
+import asyncio
+
+import virtool.db.utils
+import virtool.http.routes
+from virtool.api.response import json_response
+
+routes = virtool.http.routes.Routes()
+
+
+@routes.get("/api/db/metrics", admin=True)
+async def get_metrics(req):
+    """
+    Get operation counts and latency histograms by collection and command, and recent requests that were flagged for
+    possible N+1 query patterns.
+
+    """
+    return json_response(req.app["db_profiler"].to_dict())
+
+
+@routes.get("/api/db/indexes", admin=True)
+async def get_indexes(req):
+    """
+    Report missing, undeclared, and unused indexes for all collections with declared indexes. Includes summarized
+    query plans for frequently run queries.
+
+    """
+    db = req.app["db"]
+
+    collections = [c for c in db.collections if c.index_models is not None]
+
+    reports = await asyncio.gather(*[virtool.db.utils.get_index_report(c) for c in collections])
+
+    plans = await asyncio.gather(*[
+        virtool.db.utils.explain_query(getattr(db, name), query, sort)
+        for name, query, sort in virtool.db.utils.HOT_QUERIES
+    ])
+
+    queries = [{
+        "collection": name,
+        "query": query,
+        "sort": sort,
+        **plan
+    } for (name, query, sort), plan in zip(virtool.db.utils.HOT_QUERIES, plans)]
+
+    return json_response({
+        "collections": sorted(reports, key=lambda r: r["name"]),
+        "queries": queries
+    })
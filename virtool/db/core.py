@@ -1,8 +1,11 @@
+import asyncio
+import logging
+
 import motor.motor_asyncio
 import pymongo
 import pymongo.errors
 import pymongo.results
-from typing import Union
+from typing import List, Union
 
 import virtool.analyses.db
 import virtool.caches.db
@@ -17,10 +20,19 @@ import virtool.samples.db
 import virtool.settings.db
 import virtool.subtractions.db
 import virtool.users.db
+import virtool.db.profiling
 import virtool.db.utils
 import virtool.errors
 import virtool.utils
 
+logger = logging.getLogger(__name__)
+
+#: The MongoDB error code for a duplicate key error.
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+#: The default number of documents sent to MongoDB in one call to :meth:`Collection.insert_many`.
+INSERT_MANY_CHUNK_SIZE = 1000
+
 
 class Collection:
     """
@@ -38,7 +50,8 @@ class Collection:
             dispatch: callable,
             processor: callable,
             projection: Union[None, list, dict],
-            silent: bool = False
+            silent: bool = False,
+            index_models: Union[None, List[pymongo.IndexModel]] = None
     ):
         self.name = name
         self._collection = collection
@@ -46,6 +59,7 @@ class Collection:
         self.processor = processor
         self.projection = projection
         self.silent = silent
+        self.index_models = index_models
 
         # No dispatches are necessary for these collection methods and they can be directly referenced instead of
         # wrapped.
@@ -59,7 +73,7 @@ class Collection:
         self.drop_indexes = self._collection.drop_indexes
         self.find_one = self._collection.find_one
         self.find = self._collection.find
-        self.insert_many = self._collection.insert_many
+        self.index_information = self._collection.index_information
         self.rename = self._collection.rename
 
     def apply_projection(self, document: dict) -> dict:
@@ -137,6 +151,29 @@ class Collection:
 
         return delete_result
 
+    async def ensure_indexes(self):
+        """
+        Make the indexes on the collection match the declared `index_models`.
+
+        Existing indexes that are not declared or don't match their declaration are dropped. Missing indexes are created
+        with a single call to `create_indexes`. Collections without declared indexes are left alone.
+
+        """
+        if self.index_models is None:
+            return
+
+        existing = await self.index_information()
+
+        to_create, to_drop = virtool.db.utils.diff_indexes(self.index_models, existing)
+
+        for name in to_drop:
+            logger.info(f"Dropping index {self.name}.{name}")
+            await self.drop_index(name)
+
+        if to_create:
+            logger.info(f"Creating {len(to_create)} indexes on {self.name}")
+            await self.create_indexes(to_create)
+
     async def find_one_and_update(
             self,
             query: dict,
@@ -173,6 +210,87 @@ class Collection:
 
         return document
 
+    async def insert_many(
+            self,
+            documents: List[dict],
+            ordered: bool = True,
+            chunk_size: int = INSERT_MANY_CHUNK_SIZE,
+            silent: bool = False
+    ) -> List[dict]:
+        """
+        Insert many documents in chunks of at most `chunk_size` documents.
+
+        Random ids are assigned to documents that don't have an `_id`. If a generated id collides with an existing
+        document, a new id is generated and the document is retried as in :meth:`insert_one`. Duplicate keys in
+        documents with user-defined ids are raised as :class:`pymongo.errors.BulkWriteError`.
+
+        One websocket message containing a list of all of the inserted documents is dispatched per chunk. Only use it
+        without `silent` for collections whose client reducers accept a list for inserts.
+
+        :param documents: the documents to insert
+        :param ordered: insert the documents in each chunk in order and stop at the first error
+        :param chunk_size: the maximum number of documents to send to MongoDB at once
+        :param silent: don't dispatch websocket messages for this operation
+        :return: the inserted documents
+
+        """
+        for chunk in virtool.utils.chunk_list(documents, chunk_size):
+            await self._insert_chunk(chunk, ordered)
+
+            if not silent and not self.silent:
+                await self.dispatch(
+                    self.name,
+                    "insert",
+                    [await self.apply_processor(self.apply_projection(document)) for document in chunk]
+                )
+
+        return documents
+
+    async def _insert_chunk(self, chunk: List[dict], ordered: bool):
+        """
+        Insert a single chunk of documents for :meth:`insert_many`, regenerating colliding random ids until all of the
+        documents are inserted.
+
+        :param chunk: the documents to insert
+        :param ordered: insert the documents in order and stop at the first error
+
+        """
+        generated = list()
+
+        for index, document in enumerate(chunk):
+            if "_id" not in document:
+                document["_id"] = virtool.utils.random_alphanumeric(8)
+                generated.append(index)
+
+        # Indexes in `chunk` of the documents that have not been inserted yet.
+        pending = list(range(len(chunk)))
+
+        while pending:
+            try:
+                await self._collection.insert_many([chunk[i] for i in pending], ordered=ordered)
+                return
+            except pymongo.errors.BulkWriteError as err:
+                write_errors = err.details["writeErrors"]
+
+                failed = [pending[e["index"]] for e in write_errors]
+
+                retryable = all(
+                    e["code"] == DUPLICATE_KEY_ERROR_CODE and index in generated
+                    for e, index in zip(write_errors, failed)
+                )
+
+                if not retryable:
+                    raise
+
+                for index in failed:
+                    chunk[index]["_id"] = virtool.utils.random_alphanumeric(8)
+
+                # An ordered insert stops at the first error, so every document after it must be retried as well.
+                if ordered:
+                    pending = pending[write_errors[0]["index"]:]
+                else:
+                    pending = failed
+
     async def insert_one(self, document, silent=False):
         """
 
@@ -257,12 +375,14 @@ class DB:
 
         self.analyses = self.bind_collection(
             "analyses",
-            projection=virtool.analyses.db.PROJECTION
+            projection=virtool.analyses.db.PROJECTION,
+            index_models=virtool.analyses.db.INDEXES
         )
 
         self.caches = self.bind_collection(
             "caches",
-            projection=virtool.caches.db.PROJECTION
+            projection=virtool.caches.db.PROJECTION,
+            index_models=virtool.caches.db.INDEXES
         )
 
         self.coverage = self.bind_collection(
@@ -279,17 +399,27 @@ class DB:
 
         self.history = self.bind_collection(
             "history",
-            projection=virtool.history.db.PROJECTION
+            processor=virtool.history.db.processor,
+            projection=virtool.history.db.PROJECTION,
+            index_models=virtool.history.db.INDEXES
         )
 
         self.hmm = self.bind_collection(
             "hmm",
-            projection=virtool.hmm.db.PROJECTION
+            projection=virtool.hmm.db.PROJECTION,
+            index_models=virtool.hmm.db.INDEXES
+        )
+
+        self.hmm_hits = self.bind_collection(
+            "hmm_hits",
+            silent=True,
+            index_models=virtool.hmm.db.HIT_INDEXES
         )
 
         self.indexes = self.bind_collection(
             "indexes",
-            projection=virtool.indexes.db.PROJECTION
+            projection=virtool.indexes.db.PROJECTION,
+            index_models=virtool.indexes.db.INDEXES
         )
 
         self.jobs = self.bind_collection(
@@ -300,7 +430,8 @@ class DB:
 
         self.keys = self.bind_collection(
             "keys",
-            silent=True
+            silent=True,
+            index_models=virtool.users.db.API_KEY_INDEXES
         )
 
         self.kinds = self.bind_collection(
@@ -310,7 +441,8 @@ class DB:
 
         self.otus = self.bind_collection(
             "otus",
-            projection=virtool.otus.db.PROJECTION
+            projection=virtool.otus.db.PROJECTION,
+            index_models=virtool.otus.db.INDEXES
         )
 
         self.processes = self.bind_collection(
@@ -325,18 +457,24 @@ class DB:
 
         self.samples = self.bind_collection(
             "samples",
-            projection=virtool.samples.db.LIST_PROJECTION
+            projection=virtool.samples.db.LIST_PROJECTION,
+            index_models=virtool.samples.db.INDEXES
         )
+
         self.settings = self.bind_collection(
             "settings",
             projection=virtool.settings.db.PROJECTION
         )
 
-        self.sequences = self.bind_collection("sequences")
+        self.sequences = self.bind_collection(
+            "sequences",
+            index_models=virtool.otus.db.SEQUENCE_INDEXES
+        )
 
         self.sessions = self.bind_collection(
             "sessions",
-            silent=True
+            silent=True,
+            index_models=virtool.users.db.SESSION_INDEXES
         )
 
         self.status = self.bind_collection("status")
@@ -351,16 +489,32 @@ class DB:
             projection=virtool.users.db.PROJECTION
         )
 
-    def bind_collection(self, name, processor=None, projection=None, silent=False):
+    @property
+    def collections(self) -> List[Collection]:
+        """
+        All of the :class:`.Collection` objects bound to the database.
+
+        """
+        return [value for value in vars(self).values() if isinstance(value, Collection)]
+
+    def bind_collection(self, name, processor=None, projection=None, silent=False, index_models=None):
         return Collection(
             name,
-            self.motor_client[name],
+            virtool.db.profiling.ProfiledCollection(self.motor_client[name]),
             self.dispatch,
             processor,
             projection,
-            silent
+            silent,
+            index_models
         )
 
+    async def ensure_indexes(self):
+        """
+        Make the indexes on all collections match their declarations. Collections are processed concurrently.
+
+        """
+        await asyncio.gather(*[collection.ensure_indexes() for collection in self.collections])
+
     def get_processor(self, collection_name):
         return self.__getattribute__(collection_name).apply_processor
 
@@ -5,6 +5,7 @@ import pymongo.errors
 import virtool.analyses.migrate
 import virtool.caches.migrate
 import virtool.db.utils
+import virtool.history.migrate
 import virtool.jobs.db
 import virtool.otus.utils
 import virtool.references.migrate
@@ -29,6 +30,7 @@ async def migrate(app):
     await virtool.caches.migrate.migrate_caches(app)
     await migrate_files(db)
     await migrate_groups(db)
+    await virtool.history.migrate.migrate_history(app)
     await migrate_jobs(db)
     await migrate_sessions(db)
     await migrate_status(db, app["version"])
@@ -85,7 +87,6 @@ async def migrate_sessions(db):
     logger.info(" • sessions")
 
     await db.sessions.delete_many({"created_at": {"$exists": False}})
-    await db.sessions.create_index("expiresAt", expireAfterSeconds=0)
 
 
 async def migrate_status(db, server_version):
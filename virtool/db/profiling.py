@@ -0,0 +1,290 @@
+"""
+Instrumentation for MongoDB operations issued by the server.
+
+Latencies are recorded from a :class:`pymongo.monitoring.CommandListener` registered with the Motor client. Because
+Motor runs PyMongo in executor threads, the listener cannot see the request that issued an operation. Operations are
+instead counted per request by :class:`ProfiledCollection`, which reads the :class:`RequestProfile` bound to the current
+context by :mod:`virtool.http.profiling`.
+
+"""
+import collections
+import contextvars
+import logging
+import threading
+from typing import Union
+
+import pymongo.monitoring
+
+import virtool.utils
+
+logger = logging.getLogger(__name__)
+
+#: Upper bounds in milliseconds of the buckets in operation latency histograms.
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+#: Requests that issue more database operations than this are flagged as possible N+1 query patterns.
+N_PLUS_ONE_THRESHOLD = 20
+
+#: Operations that take longer than this number of milliseconds are logged.
+SLOW_OPERATION_THRESHOLD = 100
+
+#: The number of flagged requests to retain for reporting.
+FLAGGED_REQUEST_LIMIT = 50
+
+#: Motor collection methods that issue database operations. Calls to these are counted in the current request profile.
+OPERATIONS = (
+    "aggregate",
+    "bulk_write",
+    "count_documents",
+    "delete_many",
+    "delete_one",
+    "distinct",
+    "find",
+    "find_one",
+    "find_one_and_replace",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "replace_one",
+    "update_many",
+    "update_one"
+)
+
+#: The :class:`RequestProfile` for the request being handled in the current context.
+request_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+class OperationStats:
+    """
+    A count and latency histogram for a single collection and command.
+
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, duration: float, failed: bool = False):
+        """
+        Record an operation that took `duration` milliseconds.
+
+        :param duration: the duration of the operation in milliseconds
+        :param failed: the operation failed
+
+        """
+        self.count += 1
+        self.total += duration
+
+        if failed:
+            self.failures += 1
+
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                return
+
+        self.buckets[-1] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "mean": self.total / self.count if self.count else 0,
+            "buckets": {
+                **{str(bound): self.buckets[index] for index, bound in enumerate(LATENCY_BUCKETS)},
+                "+Inf": self.buckets[-1]
+            }
+        }
+
+
+class RequestProfile:
+    """
+    Counts the database operations issued while handling a single HTTP request.
+
+    """
+
+    def __init__(self):
+        self.operations = collections.Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.operations.values())
+
+    def add(self, collection: str, operation: str):
+        self.operations[(collection, operation)] += 1
+
+
+class Profiler:
+    """
+    Aggregates operation statistics by collection and command, and retains recent requests that were flagged for
+    issuing too many operations.
+
+    Operations are observed from PyMongo executor threads, so all updates are made while holding a lock.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = collections.defaultdict(OperationStats)
+        self.flagged = collections.deque(maxlen=FLAGGED_REQUEST_LIMIT)
+
+    def observe(self, collection: str, command: str, duration: float, failed: bool = False):
+        """
+        Record a completed command.
+
+        :param collection: the name of the collection the command ran against
+        :param command: the name of the command (eg. find, insert)
+        :param duration: the duration of the command in milliseconds
+        :param failed: the command failed
+
+        """
+        with self._lock:
+            self.stats[(collection, command)].observe(duration, failed)
+
+        if duration >= SLOW_OPERATION_THRESHOLD:
+            logger.debug(f"Slow {command} on {collection}: {duration:.1f} ms")
+
+    def record_request(self, method: str, path: str, profile: RequestProfile):
+        """
+        Flag the request if the passed `profile` contains more operations than :const:`N_PLUS_ONE_THRESHOLD`.
+
+        :param method: the HTTP method of the request
+        :param path: the path of the request
+        :param profile: the profile of the request
+
+        """
+        count = profile.count
+
+        if count <= N_PLUS_ONE_THRESHOLD:
+            return
+
+        operations = [{
+            "collection": collection,
+            "operation": operation,
+            "count": operation_count
+        } for (collection, operation), operation_count in profile.operations.most_common()]
+
+        with self._lock:
+            self.flagged.append({
+                "method": method,
+                "path": path,
+                "count": count,
+                "operations": operations,
+                "created_at": virtool.utils.timestamp()
+            })
+
+        logger.debug(f"Possible N+1 query pattern: {method} {path} issued {count} database operations")
+
+    def export(self, metrics):
+        """
+        Load the recorded operation statistics into the passed :class:`~virtool.metrics.Metrics` registry. Used as a
+        metrics collector.
+
+        :param metrics: the application metrics registry
+
+        """
+        with self._lock:
+            for (collection, command), stats in self.stats.items():
+                metrics.db_operation_duration.load(
+                    stats.buckets,
+                    stats.total / 1000,
+                    stats.count,
+                    collection=collection,
+                    command=command
+                )
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            operations = [{
+                "collection": collection,
+                "command": command,
+                **stats.to_dict()
+            } for (collection, command), stats in sorted(self.stats.items())]
+
+            flagged = list(self.flagged)
+
+        return {
+            "operations": operations,
+            "flagged_requests": flagged
+        }
+
+
+class CommandListener(pymongo.monitoring.CommandListener):
+    """
+    Reports the duration of commands that run against collections to a :class:`Profiler`. Commands that don't target a
+    collection, such as server handshakes, are ignored.
+
+    """
+
+    def __init__(self, profiler: Profiler):
+        self._profiler = profiler
+        self._pending = dict()
+
+    def started(self, event: pymongo.monitoring.CommandStartedEvent):
+        collection = get_command_collection(event.command_name, event.command)
+
+        if collection:
+            self._pending[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event: pymongo.monitoring.CommandSucceededEvent):
+        self._finish(event, failed=False)
+
+    def failed(self, event: pymongo.monitoring.CommandFailedEvent):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        collection = self._pending.pop((event.connection_id, event.request_id), None)
+
+        if collection:
+            self._profiler.observe(collection, event.command_name, event.duration_micros / 1000, failed)
+
+
+class ProfiledCollection:
+    """
+    A proxy for a Motor collection that counts calls to the methods in :const:`OPERATIONS` against the
+    :class:`RequestProfile` in the current context. All other attributes are passed through unchanged.
+
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+
+        if name not in OPERATIONS:
+            return attr
+
+        collection_name = self._collection.name
+
+        def wrapped(*args, **kwargs):
+            profile = request_profile.get()
+
+            if profile is not None:
+                profile.add(collection_name, name)
+
+            return attr(*args, **kwargs)
+
+        return wrapped
+
+
+def get_command_collection(command_name: str, command: dict) -> Union[str, None]:
+    """
+    Get the name of the collection a command targets. Returns `None` if the command doesn't target a collection.
+
+    :param command_name: the name of the command
+    :param command: the command document
+    :return: the collection name
+
+    """
+    if command_name == "getMore":
+        return command.get("collection")
+
+    collection = command.get(command_name)
+
+    if isinstance(collection, str):
+        return collection
+
+    return None
@@ -90,6 +90,32 @@ def get_current_index_id_and_version(db, ref_id):
     return document["_id"], document["version"]
 
 
+def get_snapshot(db, otu_id: str, version: Union[str, int]) -> Union[dict, None]:
+    """
+    Get the change containing the oldest snapshot of the OTU identified by `otu_id` at or after `version`. A synchronous
+    version of :func:`virtool.history.db.get_snapshot`.
+
+    :param db: the application database object
+    :param otu_id: the id of the OTU
+    :param version: the OTU version to find a snapshot for
+    :return: the `otu` and `snapshot` fields of the change
+
+    """
+    if not isinstance(version, int):
+        return None
+
+    document = db.history.find_one({
+        "otu.id": otu_id,
+        "otu.version": {"$gte": version},
+        "snapshot": {"$ne": None}
+    }, ["otu", "snapshot"], sort=[("otu.version", 1)])
+
+    if document:
+        document["snapshot"] = virtool.history.utils.decompress_sequences(document["snapshot"])
+
+    return document
+
+
 def join_otu(db, query, document=None):
     """
     Join the OTU specified by `query` and its sequences.
@@ -140,8 +166,28 @@ def patch_otu_to_version(db, settings: dict, otu_id: str, version: Union[str, in
 
     patched = deepcopy(current)
 
+    query = {"otu.id": otu_id}
+
+    snapshot = get_snapshot(db, otu_id, version)
+
+    if snapshot:
+        snapshot_version = snapshot["otu"]["version"]
+
+        # Start from the snapshot. Changes made after it are reverted without reading their diffs.
+        patched = snapshot["snapshot"]
+
+        reverted_history_ids = db.history.distinct("_id", {
+            "otu.id": otu_id,
+            "$or": [
+                {"otu.version": {"$gt": snapshot_version}},
+                {"otu.version": "removed"}
+            ]
+        })
+
+        query["otu.version"] = {"$lte": snapshot_version}
+
     # Sort the changes by descending timestamp.
-    for change in db.history.find({"otu.id": otu_id}, sort=[("otu.version", -1)]):
+    for change in db.history.find(query, {"snapshot": False}, sort=[("otu.version", -1)]):
         if change["otu"]["version"] == "removed" or change["otu"]["version"] > version:
             reverted_history_ids.append(change["_id"])
 
@@ -151,6 +197,8 @@ def patch_otu_to_version(db, settings: dict, otu_id: str, version: Union[str, in
                     otu_id,
                     change["otu"]["version"]
                 )
+            else:
+                change["diff"] = virtool.history.utils.decompress_sequences(change["diff"])
 
             if change["method_name"] == "remove":
                 patched = change["diff"]
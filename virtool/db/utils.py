@@ -1,9 +1,35 @@
 import virtool.utils
+import pymongo
 import semver
 import sys
+from typing import List, Tuple, Union
 
 MINIMUM_MONGO_VERSION = "3.6.0"
 
+#: Index options that are compared when deciding if an existing index matches its declaration.
+INDEX_OPTIONS = (
+    "expireAfterSeconds",
+    "partialFilterExpression",
+    "sparse",
+    "unique"
+)
+
+#: Frequently run queries that are explained in the index report. Each item is a collection name, a query, and a sort.
+#: Only the shape of a query affects the winning plan, so placeholder values are used.
+HOT_QUERIES = [
+    ("analyses", {"sample.id": ""}, None),
+    ("analyses", {"workflow": "nuvs", "results": "file"}, None),
+    ("caches", {"hash": "", "missing": False, "program": "", "sample.id": ""}, None),
+    ("history", {"otu.id": ""}, [("otu.version", pymongo.DESCENDING)]),
+    ("history", {"reference.id": "", "index.id": "unbuilt"}, None),
+    ("hmm", {"cluster": 0}, None),
+    ("indexes", {"reference.id": "", "ready": True}, [("version", pymongo.DESCENDING)]),
+    ("otus", {"reference.id": ""}, None),
+    ("otus", {"reference.id": "", "remote.id": ""}, None),
+    ("sequences", {"otu_id": ""}, None),
+    ("sequences", {"otu_id": "", "isolate_id": ""}, None)
+]
+
 
 def apply_projection(document, projection):
     """
@@ -40,6 +66,87 @@ def apply_projection(document, projection):
     return {key: document[key] for key in document if projection.get(key, False)}
 
 
+def check_index_matches(model: pymongo.IndexModel, info: dict) -> bool:
+    """
+    Check if an existing index described by `info` matches the declared index `model`.
+
+    :param model: the declared index
+    :param info: the existing index as returned by :meth:`~pymongo.collection.Collection.index_information`
+    :return: the index matches its declaration
+
+    """
+    spec = model.document
+
+    if list(spec["key"].items()) != [tuple(key) for key in info["key"]]:
+        return False
+
+    return all(spec.get(option) == info.get(option) for option in INDEX_OPTIONS)
+
+
+def diff_indexes(declared: List[pymongo.IndexModel], existing: dict) -> Tuple[List[pymongo.IndexModel], List[str]]:
+    """
+    Compare declared indexes with the indexes that exist on a collection.
+
+    Returns the declared indexes that need to be created and the names of existing indexes that need to be dropped
+    because they are no longer declared or don't match their declaration. The default `_id` index is never dropped.
+
+    :param declared: the declared indexes for the collection
+    :param existing: the existing indexes as returned by :meth:`~pymongo.collection.Collection.index_information`
+    :return: the indexes to create and the names of the indexes to drop
+
+    """
+    declared_by_name = {model.document["name"]: model for model in declared}
+
+    to_drop = list()
+
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+
+        model = declared_by_name.get(name)
+
+        if model is None or not check_index_matches(model, info):
+            to_drop.append(name)
+
+    to_create = [model for name, model in declared_by_name.items() if name not in existing or name in to_drop]
+
+    return to_create, to_drop
+
+
+def summarize_plan(plan: dict) -> dict:
+    """
+    Summarize a winning query plan from a MongoDB `explain` result. Returns the stages in the plan from the root down
+    and the names of any indexes that are used.
+
+    :param plan: the winning plan
+    :return: a summary of the plan
+
+    """
+    stages = list()
+    indexes = list()
+
+    stack = [plan]
+
+    while stack:
+        stage = stack.pop(0)
+
+        stages.append(stage["stage"])
+
+        if "indexName" in stage:
+            indexes.append(stage["indexName"])
+
+        if "inputStage" in stage:
+            stack.append(stage["inputStage"])
+
+        stack += stage.get("inputStages", [])
+
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages
+    }
+
+
 async def check_mongo_version(db, logger):
     """
     Check the MongoDB version. Log a critical error and exit if it is too old.
@@ -57,6 +164,55 @@ async def check_mongo_version(db, logger):
     logger.info(f"Found MongoDB {server_version}.")
 
 
+async def explain_query(collection, query: dict, sort: Union[None, list] = None) -> dict:
+    """
+    Explain the passed query and return a summary of the winning plan.
+
+    :param collection: the collection to run the query against
+    :param query: the MongoDB query to explain
+    :param sort: an optional sort for the query
+    :return: the plan summary
+
+    """
+    cursor = collection.find(query)
+
+    if sort:
+        cursor = cursor.sort(sort)
+
+    explained = await cursor.explain()
+
+    return summarize_plan(explained["queryPlanner"]["winningPlan"])
+
+
+async def get_index_report(collection) -> dict:
+    """
+    Report on the indexes for a collection that declares its indexes. Includes declared indexes that are missing from
+    the collection, existing indexes that are not declared, and existing indexes that have not been used since the
+    server started.
+
+    :param collection: the collection to report on
+    :return: the index report
+
+    """
+    existing = await collection.index_information()
+
+    to_create, to_drop = diff_indexes(collection.index_models, existing)
+
+    unused = [
+        stats["name"] async for stats in collection.aggregate([{"$indexStats": {}}])
+        if stats["accesses"]["ops"] == 0 and stats["name"] != "_id_"
+    ]
+
+    return {
+        "name": collection.name,
+        "declared": sorted(model.document["name"] for model in collection.index_models),
+        "existing": sorted(existing),
+        "missing": sorted(model.document["name"] for model in to_create),
+        "undeclared": sorted(to_drop),
+        "unused": sorted(unused)
+    }
+
+
 async def get_new_id(collection, excluded=None):
     """
     Returns a new, unique, id that can be used for inserting a new document. Will not return any id that is included
@@ -81,9 +81,13 @@ async def default_writer(connection: Connection, message: dict):
 
 class Dispatcher:
 
-    def __init__(self):
+    def __init__(self, metrics=None):
         #: A dict of all active connections.
         self.connections = list()
+
+        #: The application :class:`~virtool.metrics.Metrics` registry.
+        self.metrics = metrics
+
         logging.debug("Initialized dispatcher")
 
     def add_connection(self, connection: Connection):
@@ -94,6 +98,7 @@ class Dispatcher:
 
         """
         self.connections.append(connection)
+        self.update_connection_metrics()
         logging.debug(f'Added connection to dispatcher: {connection.user_id}')
 
     def update_connections(self, user: dict):
@@ -120,10 +125,15 @@ class Dispatcher:
         """
         try:
             self.connections.remove(connection)
+            self.update_connection_metrics()
             logging.debug(f'Removed connection from dispatcher: {connection.user_id}')
         except ValueError:
             pass
 
+    def update_connection_metrics(self):
+        if self.metrics:
+            self.metrics.websocket_connections.set(len(self.connections))
+
     async def dispatch(
             self,
             interface: str,
@@ -203,6 +213,9 @@ class Dispatcher:
         for connection in connections_to_remove:
             self.remove_connection(connection)
 
+        if self.metrics:
+            self.metrics.dispatches.inc(interface=interface, operation=operation)
+
         logging.debug(f"Dispatched {interface}.{operation}")
 
     async def close(self):
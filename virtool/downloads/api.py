@@ -3,13 +3,10 @@ Provides request handlers for file downloads.
 
 """
 import os
-import gzip
-import json
 
 from aiohttp import web
 
 import virtool.analyses.format
-import virtool.api.json
 import virtool.api.response
 import virtool.bio
 import virtool.analyses.db
@@ -18,6 +15,7 @@ import virtool.downloads.db
 import virtool.history.db
 import virtool.otus.db
 import virtool.references.db
+import virtool.references.utils
 import virtool.errors
 import virtool.http.routes
 import virtool.otus.utils
@@ -151,43 +149,89 @@ async def download_reference(req):
     Export all otus and sequences for a given reference as a gzipped JSON string. Made available as a downloadable file
     named ``reference.json.gz``.
 
+    The export is compressed in the compression process pool and streamed to the client in batches of OTUs. It is also
+    cached in the directory of the latest ready index for the reference. Later downloads are served from the cache
+    until a new index is built.
+
     """
     db = req.app["db"]
     ref_id = req.match_info["ref_id"]
+    run_in_thread = req.app["run_in_thread"]
 
     document = await db.references.find_one(ref_id, ["data_type", "organism", "targets"])
 
     if document is None:
         return virtool.api.response.not_found()
 
-    otu_list = await virtool.references.db.export(
-        req.app,
-        ref_id
-    )
-
-    data = {
-        "otus": otu_list,
+    metadata = {
         "data_type": document["data_type"],
         "organism": document["organism"]
     }
 
     try:
-        data["targets"] = document["targets"]
+        metadata["targets"] = document["targets"]
     except KeyError:
         pass
 
-    # Convert the list of OTUs to a JSON-formatted string.
-    json_string = json.dumps(data, cls=virtool.api.json.CustomEncoder)
+    headers = {
+        "Content-Disposition": "attachment; filename=reference.json.gz",
+        "Content-Type": "application/gzip"
+    }
+
+    latest_build = await virtool.references.db.get_latest_build(db, ref_id)
+
+    cache_path = None
+    temp_path = None
+
+    if latest_build:
+        cache_path = virtool.references.utils.join_export_path(
+            req.app["settings"],
+            ref_id,
+            latest_build["id"],
+            metadata
+        )
+
+        if os.path.isfile(cache_path):
+            return web.FileResponse(cache_path, chunk_size=1024*1024, headers=headers)
+
+        # Index files may have been removed. Only cache the export if the index directory still exists.
+        if os.path.isdir(os.path.dirname(cache_path)):
+            temp_path = f"{cache_path}.{virtool.utils.random_alphanumeric(8)}.tmp"
 
-    # Compress the JSON string with gzip.
-    body = await req.app["run_in_process"](gzip.compress, bytes(json_string, "utf-8"))
+    resp = web.StreamResponse(headers=headers)
+    await resp.prepare(req)
 
-    return web.Response(
-        headers={"Content-Disposition": f"attachment; filename=reference.json.gz"},
-        content_type="application/gzip",
-        body=body
+    writer = virtool.references.utils.ExportWriter(
+        temp_path,
+        req.app["executors"]["compression"].run,
+        run_in_thread
     )
 
+    try:
+        await resp.write(await writer.write_start(metadata))
+
+        async for otus in virtool.references.db.iter_export(req.app, ref_id):
+            await resp.write(await writer.write_otus(otus))
+
+        await resp.write(await writer.write_end())
+    except Exception:
+        await writer.close()
+
+        if temp_path:
+            await run_in_thread(virtool.utils.rm, temp_path)
+
+        raise
+
+    await writer.close()
+
+    if temp_path:
+        # Renaming is atomic, so concurrent downloads never serve a partially written cache file.
+        await run_in_thread(os.replace, temp_path, cache_path)
+
+    await resp.write_eof()
+
+    return resp
+
 
 @routes.get("/download/sequences/{sequence_id}")
 async def download_sequence(req):
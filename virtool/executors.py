@@ -0,0 +1,147 @@
+"""
+Named executor pools for running blocking work outside the event loop.
+
+Work is split into classes that each get their own pool so that one kind of work can't starve the others:
+
+- `io`: a thread pool for file operations and other blocking I/O.
+- `cpu`: a process pool for parsing and other CPU-bound work.
+- `compression`: a process pool for compressing data for downloads and storage.
+
+Pool sizes are configured with the `io_workers`, `cpu_workers`, and `compression_workers` settings. Each
+:class:`Executor` admits at most as many tasks as its pool has workers. Further tasks wait in the event loop, where
+their queue depth and wait times can be measured.
+
+"""
+import asyncio
+import concurrent.futures
+import time
+from typing import Callable, Dict
+
+import virtool.config
+
+#: The executor pools to create, keyed by name. Values are the pool type and the setting that holds the pool size.
+EXECUTORS = {
+    "io": ("thread", "io_workers"),
+    "cpu": ("process", "cpu_workers"),
+    "compression": ("process", "compression_workers")
+}
+
+
+class Executor:
+    """
+    Runs functions in a :class:`concurrent.futures.Executor` while bounding the number of tasks submitted to it at once.
+
+    :param name: the name of the executor used to label metrics
+    :param executor: the underlying executor
+    :param limit: the maximum number of tasks that can be submitted to `executor` at once
+    :param metrics: the application :class:`~virtool.metrics.Metrics` registry
+
+    """
+
+    def __init__(self, name: str, executor: concurrent.futures.Executor, limit: int, metrics=None):
+        self.name = name
+        self.executor = executor
+        self.limit = limit
+        self.metrics = metrics
+
+        #: The number of tasks waiting to be submitted to the executor.
+        self.queued = 0
+
+        #: The number of tasks submitted to the executor that have not finished.
+        self.active = 0
+
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def run(self, func: Callable, *args):
+        """
+        Run `func` with the passed `args` in the executor. Waits for a free worker if `limit` tasks are already running.
+
+        :param func: the function to run
+        :param args: positional arguments for `func`
+        :return: the return value of `func`
+
+        """
+        loop = asyncio.get_event_loop()
+
+        self._update_queued(1)
+
+        if self.metrics:
+            self.metrics.executor_tasks.inc(executor=self.name)
+
+        queued_at = time.perf_counter()
+
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._update_queued(-1)
+
+        started_at = time.perf_counter()
+
+        if self.metrics:
+            self.metrics.executor_wait_duration.observe(started_at - queued_at, executor=self.name)
+
+        self._update_active(1)
+
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._semaphore.release()
+            self._update_active(-1)
+
+            if self.metrics:
+                self.metrics.executor_task_duration.observe(time.perf_counter() - started_at, executor=self.name)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+    def _update_queued(self, change: int):
+        self.queued += change
+
+        if self.metrics:
+            self.metrics.executor_queued.set(self.queued, executor=self.name)
+
+    def _update_active(self, change: int):
+        self.active += change
+
+        if self.metrics:
+            self.metrics.executor_active.set(self.active, executor=self.name)
+
+
+def create_executor(name: str, settings: dict, metrics=None) -> Executor:
+    """
+    Create the named executor pool described in :const:`EXECUTORS` sized using `settings`. The default size from
+    :const:`virtool.config.SCHEMA` is used if the size is not set.
+
+    :param name: the name of the executor to create
+    :param settings: the application settings
+    :param metrics: the application :class:`~virtool.metrics.Metrics` registry
+    :return: the executor
+
+    """
+    pool_type, key = EXECUTORS[name]
+
+    workers = int(settings.get(key, virtool.config.SCHEMA[key]["default"]))
+
+    if pool_type == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"virtool-{name}")
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    return Executor(name, executor, workers, metrics)
+
+
+def create_executors(settings: dict, metrics=None) -> Dict[str, Executor]:
+    """
+    Create all executor pools described in :const:`EXECUTORS`.
+
+    :param settings: the application settings
+    :param metrics: the application :class:`~virtool.metrics.Metrics` registry
+    :return: the executors keyed by name
+
+    """
+    return {name: create_executor(name, settings, metrics) for name in EXECUTORS}
+
+
+def shutdown_executors(executors: Dict[str, Executor], wait: bool = True):
+    for executor in executors.values():
+        executor.shutdown(wait=wait)
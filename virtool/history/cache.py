@@ -0,0 +1,157 @@
+"""
+An in-process cache of OTUs patched to specific versions.
+
+A version of an OTU does not change once it has been created, so patched OTUs can be reused between requests. The
+only exception is reverting a change, which removes versions that can later be recreated with different content.
+Entries for those versions are invalidated by :func:`virtool.history.db.revert`.
+
+Entries are stored BSON-encoded. This gives an exact size for the memory bound and means every caller gets its own
+copy of the OTU that it is free to modify.
+
+"""
+import collections
+from typing import Union
+
+import bson
+
+import virtool.history.db
+
+#: The maximum number of patched OTUs held in the cache.
+MAX_ENTRIES = 2000
+
+#: The maximum total size in bytes of the encoded OTUs held in the cache.
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class PatchedOTUCache:
+    """
+    A least recently used cache of patched OTUs keyed by OTU id and version. The least recently used entries are evicted
+    when the cache holds more than `max_entries` entries or more than `max_bytes` of encoded OTUs.
+
+    :param max_entries: the maximum number of entries
+    :param max_bytes: the maximum total size of the encoded entries
+    :param metrics: the application :class:`~virtool.metrics.Metrics` registry
+
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, metrics=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+
+        #: The total size of the encoded entries in bytes.
+        self.size = 0
+
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, otu_id: str, version: int) -> Union[dict, None]:
+        """
+        Get a copy of the OTU identified by `otu_id` patched to `version`. Returns `None` if it is not cached.
+
+        :param otu_id: the id of the OTU
+        :param version: the version of the OTU
+        :return: the patched OTU
+
+        """
+        key = (otu_id, version)
+
+        try:
+            encoded = self._entries[key]
+        except KeyError:
+            self._record("miss")
+            return None
+
+        self._entries.move_to_end(key)
+        self._record("hit")
+
+        return bson.decode(encoded)
+
+    def put(self, otu_id: str, version: int, otu: dict):
+        """
+        Add the OTU identified by `otu_id` patched to `version` to the cache. OTUs that are larger than the cache are
+        not added.
+
+        :param otu_id: the id of the OTU
+        :param version: the version of the OTU
+        :param otu: the patched OTU
+
+        """
+        encoded = bson.encode(otu)
+
+        if len(encoded) > self.max_bytes:
+            return
+
+        key = (otu_id, version)
+
+        self._remove(key)
+
+        self._entries[key] = encoded
+        self.size += len(encoded)
+
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def invalidate(self, otu_id: str, version: int):
+        """
+        Remove all entries for the OTU identified by `otu_id` at `version` or later.
+
+        :param otu_id: the id of the OTU
+        :param version: the oldest version to remove
+
+        """
+        for key in [key for key in self._entries if key[0] == otu_id and key[1] >= version]:
+            self._remove(key)
+
+    def update_metrics(self, metrics):
+        """
+        Load the size of the cache into the passed :class:`~virtool.metrics.Metrics` registry. Used as a metrics
+        collector.
+
+        :param metrics: the application metrics registry
+
+        """
+        metrics.patched_otu_cache_entries.set(len(self._entries))
+        metrics.patched_otu_cache_bytes.set(self.size)
+
+    def _record(self, result: str):
+        if self.metrics:
+            self.metrics.patched_otu_cache_requests.inc(result=result)
+
+    def _remove(self, key):
+        encoded = self._entries.pop(key, None)
+
+        if encoded is not None:
+            self.size -= len(encoded)
+
+
+async def get_patched_otu(app, otu_id: str, version: int) -> Union[dict, None]:
+    """
+    Get the OTU identified by `otu_id` patched to `version`. The patched OTU is taken from the application
+    :class:`PatchedOTUCache` if possible and is added to it otherwise.
+
+    The OTU is patched with :func:`virtool.history.db.patch_to_version` every time if the application has no cache.
+
+    :param app: the application object
+    :param otu_id: the id of the OTU
+    :param version: the version to patch to
+    :return: the patched OTU
+
+    """
+    cache = app.get("patched_otu_cache")
+
+    if cache is not None:
+        patched = cache.get(otu_id, version)
+
+        if patched is not None:
+            return patched
+
+    _, patched, _ = await virtool.history.db.patch_to_version(app, otu_id, version)
+
+    if cache is not None and patched is not None:
+        cache.put(otu_id, version, patched)
+
+    return patched
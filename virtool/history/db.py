@@ -1,13 +1,16 @@
+import collections
 from copy import deepcopy
 from typing import Union, List
 
+import bson
 import dictdiffer
-import pymongo.errors
+import pymongo
 
 import virtool.otus.db
 import virtool.errors
 import virtool.history.utils
 import virtool.otus.utils
+import virtool.references.db
 import virtool.utils
 from virtool.api.utils import paginate
 
@@ -35,6 +38,30 @@ PROJECTION = LIST_PROJECTION + [
     "diff"
 ]
 
+#: The maximum size in bytes of a BSON document stored by MongoDB. Diffs in larger change documents are written to
+#: files.
+MAX_DOCUMENT_SIZE = 16 * 1024 * 1024
+
+#: A full snapshot of the joined OTU is stored in every change with an OTU version that is a multiple of this number.
+#: Patching to an older version starts from the nearest snapshot and replays at most this many diffs.
+SNAPSHOT_INTERVAL = 20
+
+INDEXES = [
+    # Supports fetching and sorting the changes for an OTU when patching to older versions.
+    pymongo.IndexModel([
+        ("otu.id", pymongo.ASCENDING),
+        ("otu.version", pymongo.DESCENDING)
+    ]),
+    pymongo.IndexModel([
+        ("reference.id", pymongo.ASCENDING),
+        ("index.id", pymongo.ASCENDING)
+    ]),
+    pymongo.IndexModel("index.id"),
+    pymongo.IndexModel("created_at"),
+    pymongo.IndexModel([("otu.name", pymongo.ASCENDING)]),
+    pymongo.IndexModel([("otu.version", pymongo.DESCENDING)])
+]
+
 
 async def add(
         app,
@@ -58,8 +85,76 @@ async def add(
     :return: the change document
 
     """
-    db = app["db"]
+    document = compose_change(method_name, old, new, description, user_id)
+
+    await app["db"].history.insert_one(await prepare_for_storage(app, document), silent=silent)
+
+    await update_reference_stats(app["db"], [document])
+
+    return document
+
+
+async def add_many(app, documents: List[dict], silent: bool = False) -> List[dict]:
+    """
+    Insert many change documents created with :func:`.compose_change` using as few database operations as possible.
+
+    Each change is prepared for storage with :func:`.prepare_for_storage`.
+
+    :param app: the application object
+    :param documents: the change documents to insert
+    :param silent: don't dispatch messages
+    :return: the change documents
+
+    """
+    to_insert = [await prepare_for_storage(app, document) for document in documents]
+
+    await app["db"].history.insert_many(to_insert, silent=silent)
+
+    await update_reference_stats(app["db"], documents)
+
+    return documents
+
+
+def compact_change(document: dict) -> dict:
+    """
+    Get a copy of the passed change document with long sequences in its diff and snapshot compressed. Full OTU
+    documents are stored as the diffs of `create` and `remove` changes.
+
+    :param document: the change document
+    :return: the compacted change document
+
+    """
+    if document["method_name"] in ("create", "remove"):
+        diff = virtool.history.utils.compress_sequences(document["diff"])
+    else:
+        diff = virtool.history.utils.compact_diff(document["diff"])
+
+    document = dict(document, diff=diff)
+
+    if document.get("snapshot"):
+        document["snapshot"] = virtool.history.utils.compress_sequences(document["snapshot"])
+
+    return document
+
+
+def compose_change(
+        method_name: str,
+        old: Union[None, dict],
+        new: Union[None, dict],
+        description: str,
+        user_id: str
+) -> dict:
+    """
+    Compose a change document for the history collection without inserting it.
 
+    :param method_name: the name of the handler method that executed the change
+    :param old: the otu document prior to the change
+    :param new: the otu document after the change
+    :param description: a human readable description of the change
+    :param user_id: the id of the requesting user
+    :return: the change document
+
+    """
     otu_id, otu_name, otu_version, ref_id = virtool.history.utils.derive_otu_information(old, new)
 
     document = {
@@ -93,17 +188,25 @@ async def add(
     else:
         document["diff"] = virtool.history.utils.calculate_diff(old, new)
 
-    try:
-        await db.history.insert_one(document, silent=silent)
-    except pymongo.errors.DocumentTooLarge:
-        await virtool.history.utils.write_diff_file(
-            app["settings"]["data_path"],
-            otu_id,
-            otu_version,
-            document["diff"]
-        )
+    if isinstance(otu_version, int) and otu_version > 0 and otu_version % SNAPSHOT_INTERVAL == 0:
+        document["snapshot"] = new
+
+    return document
 
-        await db.history.insert_one(dict(document, diff="file"), silent=silent)
+
+def compose_file_change(document: dict) -> dict:
+    """
+    Get a copy of the passed change document that references a diff file instead of containing the diff. Snapshots are
+    dropped from these changes because they are as large as the diff.
+
+    :param document: the change document
+    :return: the change document to store
+
+    """
+    document = dict(document, diff="file")
+
+    if "snapshot" in document:
+        document["snapshot"] = None
 
     return document
 
@@ -135,14 +238,8 @@ async def get(app, change_id: str) -> dict:
     """
     document = await app["db"].history.find_one(change_id, PROJECTION)
 
-    if document and document["diff"] == "file":
-        otu_id, otu_version = change_id.split(".")
-
-        document["diff"] = await virtool.history.utils.read_diff_file(
-            app["settings"]["data_path"],
-            otu_id,
-            otu_version
-        )
+    if document:
+        document["diff"] = await read_diff(app, document)
 
     return virtool.utils.base_processor(document)
 
@@ -182,6 +279,32 @@ async def get_most_recent_change(db, otu_id: str) -> dict:
     }, MOST_RECENT_PROJECTION, sort=[("otu.version", -1)])
 
 
+async def get_snapshot(db, otu_id: str, version: Union[str, int]) -> Union[dict, None]:
+    """
+    Get the change containing the oldest snapshot of the OTU identified by `otu_id` at or after `version`. Returns
+    `None` if there is no such snapshot.
+
+    :param db: the application database client
+    :param otu_id: the id of the OTU
+    :param version: the OTU version to find a snapshot for
+    :return: the `otu` and `snapshot` fields of the change
+
+    """
+    if not isinstance(version, int):
+        return None
+
+    document = await db.history.find_one({
+        "otu.id": otu_id,
+        "otu.version": {"$gte": version},
+        "snapshot": {"$ne": None}
+    }, ["otu", "snapshot"], sort=[("otu.version", 1)])
+
+    if document:
+        document["snapshot"] = virtool.history.utils.decompress_sequences(document["snapshot"])
+
+    return document
+
+
 async def patch_to_verified(app, otu_id: str) -> Union[dict, None]:
     """
     Patch the OTU identified by `otu_id` to the last verified version.
@@ -201,12 +324,7 @@ async def patch_to_verified(app, otu_id: str) -> Union[dict, None]:
     patched = deepcopy(current)
 
     async for change in db.history.find({"otu.id": otu_id}, sort=[("otu.version", -1)]):
-        if change["diff"] == "file":
-            change["diff"] = await virtool.history.utils.read_diff_file(
-                app["settings"]["data_path"],
-                otu_id,
-                change["otu"]["version"]
-            )
+        change["diff"] = await read_diff(app, change)
 
         if change["method_name"] == "remove":
             patched = change["diff"]
@@ -245,17 +363,32 @@ async def patch_to_version(app, otu_id: str, version: Union[str, int]) -> tuple:
 
     patched = deepcopy(current)
 
+    query = {"otu.id": otu_id}
+
+    snapshot = await get_snapshot(db, otu_id, version)
+
+    if snapshot:
+        snapshot_version = snapshot["otu"]["version"]
+
+        # Start from the snapshot. Changes made after it are reverted without reading their diffs.
+        patched = snapshot["snapshot"]
+
+        reverted_history_ids = await db.history.distinct("_id", {
+            "otu.id": otu_id,
+            "$or": [
+                {"otu.version": {"$gt": snapshot_version}},
+                {"otu.version": "removed"}
+            ]
+        })
+
+        query["otu.version"] = {"$lte": snapshot_version}
+
     # Sort the changes by descending timestamp.
-    async for change in db.history.find({"otu.id": otu_id}, sort=[("otu.version", -1)]):
+    async for change in db.history.find(query, {"snapshot": False}, sort=[("otu.version", -1)]):
         if change["otu"]["version"] == "removed" or change["otu"]["version"] > version:
             reverted_history_ids.append(change["_id"])
 
-            if change["diff"] == "file":
-                change["diff"] = await virtool.history.utils.read_diff_file(
-                    app["settings"]["data_path"],
-                    otu_id,
-                    change["otu"]["version"]
-                )
+            change["diff"] = await read_diff(app, change)
 
             if change["method_name"] == "remove":
                 patched = change["diff"]
@@ -275,6 +408,73 @@ async def patch_to_version(app, otu_id: str, version: Union[str, int]) -> tuple:
     return current, patched, reverted_history_ids
 
 
+async def prepare_for_storage(app, document: dict) -> dict:
+    """
+    Prepare a change document created with :func:`.compose_change` for insertion into the history collection.
+
+    Long sequences are compressed using :func:`.compact_change`. The size of the encoded document is then checked
+    before it is inserted. Diffs that would make the document too large to store are written to a diff file instead
+    and the returned document references the file.
+
+    :param app: the application object
+    :param document: the change document
+    :return: the change document to insert
+
+    """
+    compacted = compact_change(document)
+
+    if len(bson.encode(compacted)) < MAX_DOCUMENT_SIZE:
+        return compacted
+
+    await virtool.history.utils.write_diff_file(
+        app["settings"]["data_path"],
+        document["otu"]["id"],
+        document["otu"]["version"],
+        document["diff"]
+    )
+
+    return compose_file_change(compacted)
+
+
+async def processor(db, document: dict) -> dict:
+    """
+    Process a change document so it can be dispatched to clients. Restores the compressed sequences in the diff.
+
+    :param db: the application database client
+    :param document: the change document
+    :return: the processed document
+
+    """
+    document = virtool.utils.base_processor(document)
+
+    if "diff" in document:
+        document["diff"] = virtool.history.utils.decompress_sequences(document["diff"])
+
+    return document
+
+
+async def read_diff(app, change: dict) -> Union[dict, list]:
+    """
+    Get the usable diff for the passed change document. The diff is read from its diff file if necessary and compressed
+    sequences are restored.
+
+    :param app: the application object
+    :param change: the change document
+    :return: the diff
+
+    """
+    if change["diff"] == "file":
+        otu_id, otu_version = change["_id"].split(".")
+
+        return await virtool.history.utils.read_diff_file(
+            app["settings"]["data_path"],
+            otu_id,
+            otu_version
+        )
+
+    return virtool.history.utils.decompress_sequences(change["diff"])
+
+
 async def revert(app, change_id: str) -> dict:
     """
     Revert a history change given by the passed ``change_id``.
@@ -286,7 +486,7 @@ async def revert(app, change_id: str) -> dict:
     """
     db = app["db"]
 
-    change = await db.history.find_one({"_id": change_id}, ["index"])
+    change = await db.history.find_one({"_id": change_id}, ["index", "reference"])
 
     if change["index"]["id"] != "unbuilt" or change["index"]["version"] != "unbuilt":
         raise virtool.errors.DatabaseError("Change is included in a build an not revertible")
@@ -296,6 +496,12 @@ async def revert(app, change_id: str) -> dict:
     if otu_version != "removed":
         otu_version = int(otu_version)
 
+    cache = app.get("patched_otu_cache")
+
+    # Versions from the reverted one onwards are removed and can be recreated with different content.
+    if cache is not None:
+        cache.invalidate(otu_id, otu_version)
+
     _, patched, history_to_delete = await patch_to_version(
         app,
         otu_id,
@@ -309,8 +515,7 @@ async def revert(app, change_id: str) -> dict:
         patched_otu, sequences = virtool.otus.utils.split(patched)
 
         # Add the reverted sequences to the collection.
-        for sequence in sequences:
-            await db.sequences.insert_one(sequence)
+        await db.sequences.insert_many(sequences)
 
         # Replace the existing otu with the patched one. If it doesn't exist, insert it.
         await db.otus.replace_one({"_id": otu_id}, patched_otu, upsert=True)
@@ -320,4 +525,37 @@ async def revert(app, change_id: str) -> dict:
 
     await db.history.delete_many({"_id": {"$in": history_to_delete}})
 
+    await virtool.references.db.clear_stats(db, change["reference"]["id"])
+
     return patched
+
+
+async def update_reference_stats(db, documents: List[dict]):
+    """
+    Update the statistics of the references affected by the passed change documents after they have been inserted. See
+    :func:`virtool.references.db.get_stats`.
+
+    Nothing is counted if the insert fails. The number of modified OTUs is recomputed from the unbuilt changes rather
+    than incremented, so concurrent changes to the same OTU can't count it twice.
+
+    :param db: the application database client
+    :param documents: the change documents that were inserted
+
+    """
+    changes_by_ref = collections.defaultdict(list)
+
+    for document in documents:
+        changes_by_ref[document["reference"]["id"]].append(document)
+
+    for ref_id, changes in changes_by_ref.items():
+        versions = [change["otu"]["version"] for change in changes]
+
+        modified_otu_ids = await db.history.distinct("otu.id", {"reference.id": ref_id, "index.id": "unbuilt"})
+
+        await virtool.references.db.increment_stats(
+            db,
+            ref_id,
+            otu_count=versions.count(0) - versions.count("removed"),
+            unbuilt_change_count=len(changes),
+            modified_otu_count=len(modified_otu_ids)
+        )
@@ -0,0 +1,84 @@
+import logging
+
+import bson
+import dictdiffer
+import pymongo
+
+import virtool.history.db
+import virtool.history.utils
+import virtool.otus.db
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_history(app):
+    """
+    Add snapshots to changes created before snapshots were stored in history.
+
+    :param app: the application object
+
+    """
+    logger.info(" • history")
+
+    await add_snapshots(app)
+
+
+async def add_snapshots(app):
+    """
+    Add a snapshot of the joined OTU to every change that should have one according to
+    :const:`virtool.history.db.SNAPSHOT_INTERVAL`.
+
+    Each affected OTU is patched back through its changes once and the snapshots for all of its changes are collected
+    along the way. Changes with diff files or that would become too large get a `null` snapshot so they are not
+    processed again.
+
+    :param app: the application object
+
+    """
+    db = app["db"]
+
+    otu_ids = await db.history.distinct("otu.id", {
+        "otu.version": {
+            "$gt": 0,
+            "$mod": [virtool.history.db.SNAPSHOT_INTERVAL, 0]
+        },
+        "snapshot": {
+            "$exists": False
+        }
+    })
+
+    for otu_id in otu_ids:
+        patched = await virtool.otus.db.join(db, otu_id)
+
+        updates = list()
+
+        async for change in db.history.find({"otu.id": otu_id}, sort=[("otu.version", -1)]):
+            version = change["otu"]["version"]
+
+            if version != "removed" and version > 0 and version % virtool.history.db.SNAPSHOT_INTERVAL == 0:
+                if "snapshot" not in change:
+                    snapshot = virtool.history.utils.compress_sequences(patched)
+
+                    if change["diff"] == "file" or len(bson.encode(dict(change, snapshot=snapshot))) >= \
+                            virtool.history.db.MAX_DOCUMENT_SIZE:
+                        snapshot = None
+
+                    updates.append(pymongo.UpdateOne({"_id": change["_id"]}, {
+                        "$set": {
+                            "snapshot": snapshot
+                        }
+                    }))
+
+            change["diff"] = await virtool.history.db.read_diff(app, change)
+
+            if change["method_name"] == "remove":
+                patched = change["diff"]
+
+            elif change["method_name"] == "create":
+                break
+
+            else:
+                patched = dictdiffer.patch(dictdiffer.swap(change["diff"]), patched)
+
+        if updates:
+            await db.history.bulk_write(updates)
@@ -1,11 +1,15 @@
 import arrow
-from typing import Tuple, Union, List
+from typing import Any, Tuple, Union, List
 import datetime
 import os
 import json
+import zlib
 import dictdiffer
 import aiofiles
 
+#: Sequence strings at least this long are stored zlib-compressed in change diffs and snapshots.
+COMPRESSED_SEQUENCE_LENGTH = 512
+
 
 def calculate_diff(old: dict, new: dict) -> list:
     """
@@ -19,6 +23,76 @@ def calculate_diff(old: dict, new: dict) -> list:
     return list(dictdiffer.diff(old, new))
 
 
+def compress_sequences(value: Any, key: Union[str, int, None] = None) -> Any:
+    """
+    Replace long `sequence` strings in the passed value with zlib-compressed `bytes`. Nested `dict`, `list`, and
+    `tuple` values are searched. Use :func:`.decompress_sequences` to restore the value.
+
+    :param value: the value to compress sequences in
+    :param key: the key the value is stored under in its parent
+    :return: a copy of the value with compressed sequences
+
+    """
+    if isinstance(value, dict):
+        return {k: compress_sequences(v, k) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(compress_sequences(v) for v in value)
+
+    if key == "sequence" and isinstance(value, str) and len(value) >= COMPRESSED_SEQUENCE_LENGTH:
+        return zlib.compress(value.encode())
+
+    return value
+
+
+def decompress_sequences(value: Any) -> Any:
+    """
+    Restore sequence strings compressed with :func:`.compress_sequences`. OTU documents never contain `bytes`, so any
+    `bytes` found are treated as compressed sequences.
+
+    :param value: the value to decompress sequences in
+    :return: a copy of the value with decompressed sequences
+
+    """
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode()
+
+    if isinstance(value, dict):
+        return {k: decompress_sequences(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(decompress_sequences(v) for v in value)
+
+    return value
+
+
+def compact_diff(diff: list) -> list:
+    """
+    Compress the long sequence strings in a diff calculated with :func:`.calculate_diff`.
+
+    Editing a sequence produces a `change` operation containing the complete old and new sequence strings. Adding or
+    removing a sequence or isolate produces an operation containing the complete documents. These sequences are
+    compressed in place so the diff can still be applied after :func:`.decompress_sequences` is called on it.
+
+    :param diff: the diff to compact
+    :return: the compacted diff
+
+    """
+    compacted = list()
+
+    for action, path, value in diff:
+        if action == "change":
+            last = path[-1] if isinstance(path, (list, tuple)) else path.split(".")[-1]
+            value = type(value)(compress_sequences(v, last) for v in value)
+
+        else:
+            value = [(k, compress_sequences(v, k)) for k, v in value]
+
+        compacted.append((action, path, value))
+
+    return compacted
+
+
 def compose_create_description(document: dict) -> str:
     """
     Compose a change description for the creation of a new OTU given its document.
@@ -40,6 +114,29 @@ def compose_create_description(document: dict) -> str:
     return description
 
 
+def compose_insert_description(verb: str, document: dict) -> str:
+    """
+    Compose a change description for an OTU inserted into a reference by cloning, importing, or installing from a
+    remote (eg. `Imported Tobacco mosaic virus (TMV)`).
+
+    :param verb: the change verb (eg. clone, import, remote)
+    :param document: the OTU document
+    :return: a change description
+
+    """
+    name = document["name"]
+    abbreviation = document.get("abbreviation")
+
+    e = "" if verb[-1] == "e" else "e"
+
+    description = f"{verb.capitalize()}{e}d {name}"
+
+    if abbreviation:
+        return f"{description} ({abbreviation})"
+
+    return description
+
+
 def compose_edit_description(
         name: Union[str, None],
         abbreviation: Union[str, None],
@@ -8,6 +8,7 @@ import virtool.db.utils
 import virtool.errors
 import virtool.github
 import virtool.hmm.db
+import virtool.hmm.utils
 import virtool.http.routes
 import virtool.processes.db
 import virtool.utils
@@ -165,6 +166,11 @@ async def purge(req):
     except FileNotFoundError:
         pass
 
+    await req.app["run_in_thread"](
+        virtool.hmm.utils.remove_pressed_profiles,
+        req.app["settings"]["data_path"]
+    )
+
     await db.status.find_one_and_update({"_id": "hmm"}, {
         "$set": {
             "installed": None,
@@ -3,7 +3,9 @@ import json
 import logging
 import os
 import shutil
+import subprocess
 
+import pymongo
 import pymongo.results
 import aiofiles
 import aiohttp.client_exceptions
@@ -32,6 +34,18 @@ PROJECTION = [
     "families"
 ]
 
+INDEXES = [
+    pymongo.IndexModel("cluster")
+]
+
+#: Indexes for the `hmm_hits` collection, which caches NuVs ``hmmscan`` hits by protein hash and HMM release.
+HIT_INDEXES = [
+    pymongo.IndexModel([
+        ("release_id", pymongo.ASCENDING),
+        ("hash", pymongo.ASCENDING)
+    ], unique=True)
+]
+
 
 async def delete_unreferenced_hmms(db, settings: dict) -> pymongo.results.DeleteResult:
     """
@@ -222,6 +236,7 @@ async def install(app, process_id, release, user_id):
         - downloads the official profiles.hmm.gz file
         - decompresses the vthmm.tar.gz file
         - moves the file to the correct data path
+        - presses the profiles for use by NuVs jobs
         - downloads the official annotations.json.gz file
         - imports the annotations into the database
 
@@ -304,6 +319,16 @@ async def install(app, process_id, release, user_id):
 
         await app["run_in_thread"](shutil.move, os.path.join(decompressed_path, "profiles.hmm"), install_path)
 
+        try:
+            release_id = int(release["id"])
+        except TypeError:
+            release_id = release["id"]
+
+        await press_profiles(app, install_path, release_id)
+
+        # Cached NuVs hits were found with the profiles from previous releases.
+        await db.hmm_hits.delete_many({"release_id": {"$ne": release_id}})
+
         await virtool.processes.db.update(
             db,
             process_id,
@@ -324,17 +349,12 @@ async def install(app, process_id, release, user_id):
             initial=0.8
         )
 
-        for annotation in annotations:
-            await db.hmm.insert_one(dict(annotation, hidden=False))
-            await progress_tracker.add(1)
+        for chunk in virtool.utils.chunk_list(annotations, virtool.db.core.INSERT_MANY_CHUNK_SIZE):
+            await db.hmm.insert_many([dict(annotation, hidden=False) for annotation in chunk])
+            await progress_tracker.add(len(chunk))
 
         logger.debug(f"Inserted {len(annotations)} annotations")
 
-        try:
-            release_id = int(release["id"])
-        except TypeError:
-            release_id = release["id"]
-
         await db.status.update_one({"_id": "hmm", "updates.id": release_id}, {
             "$set": {
                 "installed": virtool.github.create_update_subdocument(release, True, user_id),
@@ -365,6 +385,8 @@ async def purge(db, settings: dict):
     """
     await delete_unreferenced_hmms(db, settings)
 
+    await db.hmm_hits.delete_many({})
+
     await db.hmm.update_many({}, {
         "$set": {
             "hidden": True
@@ -383,3 +405,30 @@ async def refresh(app):
         pass
 
     logging.debug("Stopped HMM refresher")
+
+
+async def press_profiles(app, profiles_path: str, release_id):
+    """
+    Press the installed profile HMMs once for use by all NuVs jobs. Pressed profiles for other releases are removed.
+
+    Failing to press the profiles is logged but doesn't fail the install. NuVs jobs press the profiles themselves when
+    there are no valid pressed profiles.
+
+    :param app: the application object
+    :param profiles_path: the path to the installed `profiles.hmm` file
+    :param release_id: the id of the installed release
+
+    """
+    data_path = app["settings"]["data_path"]
+
+    pressed_path = virtool.hmm.utils.join_pressed_path(data_path, release_id)
+
+    try:
+        await app["run_in_thread"](virtool.hmm.utils.press_profiles, profiles_path, pressed_path)
+    except (OSError, subprocess.CalledProcessError) as err:
+        logger.warning(f"Could not press HMM profiles: {err}")
+        return
+
+    await app["run_in_thread"](virtool.hmm.utils.remove_pressed_profiles, data_path, release_id)
+
+    logger.debug(f"Pressed HMM profiles to {pressed_path}")
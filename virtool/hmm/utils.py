@@ -1,6 +1,19 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from typing import Union
+
 import semver
 import virtool.github
 
+#: The extensions of the binary files written by `hmmpress` for a profile HMM database.
+PRESSED_SUFFIXES = ("h3f", "h3i", "h3m", "h3p")
+
+#: The name of the file listing the SHA-256 checksums of the pressed files.
+CHECKSUMS_FILENAME = "checksums.json"
+
 
 def format_hmm_release(updated, release, installed):
     # The release dict will only be replaced if there is a 200 response from GitHub. A 304 indicates the release
@@ -18,3 +31,111 @@ def format_hmm_release(updated, release, installed):
     )
 
     return formatted
+
+
+def calculate_checksum(path: str) -> str:
+    """
+    Calculate the SHA-256 checksum of the file at `path` without reading it into memory at once.
+
+    :param path: the path to the file
+    :return: the hex digest
+
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def join_pressed_path(data_path: str, release_id: Union[int, str]) -> str:
+    """
+    Get the path to the directory containing the pressed profiles for the HMM release identified by `release_id`.
+
+    :param data_path: the application data path
+    :param release_id: the id of the HMM release
+    :return: the pressed profiles directory
+
+    """
+    return os.path.join(data_path, "hmm", "pressed", str(release_id))
+
+
+def press_profiles(profiles_path: str, pressed_path: str):
+    """
+    Press the profile HMMs at `profiles_path` with `hmmpress` into the directory `pressed_path`. The pressed files are
+    named `profiles.hmm.<suffix>` and are made read-only.
+
+    The checksums of the pressed files are written to :const:`CHECKSUMS_FILENAME` so that they can be validated with
+    :func:`.check_pressed_profiles` before use. The directory is only moved to `pressed_path` once it is complete.
+
+    :param profiles_path: the path to the `profiles.hmm` file
+    :param pressed_path: the directory to press the profiles into
+
+    """
+    temp_path = pressed_path + ".tmp"
+
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    hmm_path = os.path.join(temp_path, "profiles.hmm")
+
+    shutil.copy(profiles_path, hmm_path)
+
+    subprocess.run(["hmmpress", hmm_path], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    os.remove(hmm_path)
+
+    checksums = dict()
+
+    for suffix in PRESSED_SUFFIXES:
+        path = f"{hmm_path}.{suffix}"
+        checksums[os.path.basename(path)] = calculate_checksum(path)
+        os.chmod(path, 0o444)
+
+    with open(os.path.join(temp_path, CHECKSUMS_FILENAME), "w") as f:
+        json.dump(checksums, f)
+
+    shutil.rmtree(pressed_path, ignore_errors=True)
+    os.replace(temp_path, pressed_path)
+
+
+def check_pressed_profiles(pressed_path: str) -> bool:
+    """
+    Check that the pressed profiles in `pressed_path` exist and match the checksums written when they were pressed.
+
+    :param pressed_path: the pressed profiles directory
+    :return: the pressed profiles are usable
+
+    """
+    try:
+        with open(os.path.join(pressed_path, CHECKSUMS_FILENAME), "r") as f:
+            checksums = json.load(f)
+
+        return len(checksums) == len(PRESSED_SUFFIXES) and all(
+            calculate_checksum(os.path.join(pressed_path, filename)) == checksum
+            for filename, checksum in checksums.items()
+        )
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def remove_pressed_profiles(data_path: str, keep: Union[int, str, None] = None):
+    """
+    Remove the pressed profiles for all HMM releases except the one identified by `keep`.
+
+    :param data_path: the application data path
+    :param keep: the id of the release to keep pressed profiles for
+
+    """
+    pressed_root = os.path.join(data_path, "hmm", "pressed")
+
+    try:
+        names = os.listdir(pressed_root)
+    except FileNotFoundError:
+        return
+
+    for name in names:
+        if keep is None or name != str(keep):
+            shutil.rmtree(os.path.join(pressed_root, name), ignore_errors=True)
@@ -59,7 +59,9 @@ class Client:
 
 
 async def can_use_api_key(req):
-    return (req.path[0:4] == "/api" or req.path[0:7] == "/upload") and req.app["settings"]["enable_api"]
+    return (
+        req.path[0:4] == "/api" or req.path[0:7] == "/upload" or req.path == "/metrics"
+    ) and req.app["settings"]["enable_api"]
 
 
 def get_ip(req: web.Request) -> str:
@@ -0,0 +1,78 @@
+import time
+
+from aiohttp import web
+
+import virtool.metrics
+from virtool.api.response import json_response
+
+
+def get_route(req: web.Request) -> str:
+    """
+    Get a label for the route that matched the request. Routes are identified by their canonical path (eg.
+    `/api/otus/{otu_id}`) so that metrics are not split by identifiers in the request path.
+
+    :param req: the request
+    :return: the route label
+
+    """
+    route = req.match_info.route
+
+    if route.resource is None:
+        return "unmatched"
+
+    return route.resource.canonical
+
+
+@web.middleware
+async def middleware(req, handler):
+    """
+    Record the count and duration of handled requests by route and response status. Websocket connections are
+    excluded.
+
+    """
+    metrics = req.app.get("metrics")
+
+    if metrics is None or req.path == "/ws":
+        return await handler(req)
+
+    route = get_route(req)
+    status = 500
+
+    start = time.perf_counter()
+
+    try:
+        resp = await handler(req)
+        status = resp.status
+        return resp
+    except web.HTTPException as err:
+        status = err.status
+        raise
+    finally:
+        metrics.http_requests.inc(method=req.method, route=route, status=status)
+        metrics.http_request_duration.observe(time.perf_counter() - start, method=req.method, route=route)
+
+
+async def handler(req: web.Request) -> web.Response:
+    """
+    Render the application metrics in the Prometheus text exposition format.
+
+    Metrics expose server internals, so they are only available to administrators. Scrapers can authenticate with an
+    administrator's API key using HTTP basic auth.
+
+    """
+    if not req["client"].user_id:
+        return json_response({
+            "id": "requires_authorization",
+            "message": "Requires authorization"
+        }, status=401)
+
+    if not req["client"].administrator:
+        return json_response({
+            "id": "not_permitted",
+            "message": "Requires administrative privilege"
+        }, status=403)
+
+    return web.Response(
+        body=req.app["metrics"].render().encode(),
+        headers={"Content-Type": virtool.metrics.CONTENT_TYPE}
+    )
@@ -0,0 +1,25 @@
+from aiohttp import web
+
+import virtool.db.profiling
+
+
+@web.middleware
+async def middleware(req, handler):
+    """
+    Count the database operations issued while handling API requests and flag requests that issue too many.
+
+    """
+    profiler = req.app.get("db_profiler")
+
+    if profiler is None or not req.path.startswith("/api"):
+        return await handler(req)
+
+    profile = virtool.db.profiling.RequestProfile()
+
+    token = virtool.db.profiling.request_profile.set(profile)
+
+    try:
+        return await handler(req)
+    finally:
+        virtool.db.profiling.request_profile.reset(token)
+        profiler.record_request(req.method, req.path, profile)
@@ -161,14 +161,7 @@ async def create(req):
 
     await db.indexes.insert_one(document)
 
-    await db.history.update_many({"index.id": "unbuilt", "reference.id": ref_id}, {
-        "$set": {
-            "index": {
-                "id": index_id,
-                "version": index_version
-            }
-        }
-    })
+    await virtool.indexes.db.tag_unbuilt_changes(db, ref_id, index_id, index_version)
 
     # A dict of task_args for the rebuild job.
     task_args = {
@@ -4,27 +4,44 @@ from typing import Union
 
 import virtool.api.utils
 import virtool.history.db
+import virtool.references.db
 import virtool.utils
 
 PROJECTION = [
     "_id",
+    "change_count",
     "created_at",
     "has_files",
     "job",
     "otu_count",
     "modification_count",
     "modified_count",
+    "modified_otu_count",
     "user",
     "ready",
     "reference",
     "version"
 ]
 
+INDEXES = [
+    pymongo.IndexModel([
+        ("version", pymongo.ASCENDING),
+        ("reference.id", pymongo.ASCENDING)
+    ], unique=True),
+    pymongo.IndexModel([
+        ("reference.id", pymongo.ASCENDING),
+        ("version", pymongo.DESCENDING)
+    ])
+]
+
 
 async def processor(db, document):
     """
     A processor for index documents. Adds computed data about the index.
 
+    The change and modified OTU counts are stored in the index document when unbuilt changes are tagged with the index.
+    They are computed and stored here for indexes created before the counts were stored.
+
     :param db: the application database client
     :param document: the document to be processed
     :return: the processed document
@@ -32,8 +49,32 @@ async def processor(db, document):
     """
     document = virtool.utils.base_processor(document)
 
+    if "change_count" in document and "modified_otu_count" in document:
+        return document
+
+    counts = await count_changes(db, document["id"])
+
+    await db.indexes.update_one({"_id": document["id"]}, {
+        "$set": counts
+    }, silent=True)
+
+    return {
+        **document,
+        **counts
+    }
+
+
+async def count_changes(db, index_id: str) -> dict:
+    """
+    Count the changes included in the index identified by `index_id` and the number of OTUs they modified.
+
+    :param db: the application database client
+    :param index_id: the id of the index
+    :return: the change count and modified OTU count
+
+    """
     query = {
-        "index.id": document["id"]
+        "index.id": index_id
     }
 
     change_count, otu_ids = await asyncio.gather(
@@ -42,7 +83,6 @@ async def processor(db, document):
     )
 
     return {
-        **document,
         "change_count": change_count,
         "modified_otu_count": len(otu_ids)
     }
@@ -171,6 +211,9 @@ async def tag_unbuilt_changes(db, ref_id, index_id, index_version):
     Update the ``index`` field for all unbuilt history changes for a specific ref to be included in the index described
     the passed ``index_id`` and ``index_version``.
 
+    The change counts for the index are stored in its document and the unbuilt counts in the reference statistics are
+    reset.
+
     :param db: the application database client
     :type db: :class:`~motor.motor_asyncio.AsyncIOMotorClient`
 
@@ -193,11 +236,23 @@ async def tag_unbuilt_changes(db, ref_id, index_id, index_version):
         }
     })
 
+    await db.indexes.update_one({"_id": index_id}, {
+        "$set": await count_changes(db, index_id)
+    }, silent=True)
+
+    await db.references.update_one({"_id": ref_id, "stats": {"$exists": True}}, {
+        "$set": {
+            "stats.unbuilt_change_count": 0,
+            "stats.modified_otu_count": 0
+        }
+    }, silent=True)
+
 
 async def get_unbuilt_stats(db, ref_id: Union[str, None] = None) -> dict:
     """
     Get the number of unbuilt changes and number of OTUs affected by those changes. Used to populate the metadata for a
-    index find request.
+    index find request. The counts are taken from the reference statistics (see
+    :func:`virtool.references.db.get_stats`).
 
     Can search against a specific reference or all references.
 
@@ -206,18 +261,18 @@ async def get_unbuilt_stats(db, ref_id: Union[str, None] = None) -> dict:
     :return: the change count and modified OTU count
 
     """
-    ref_query = dict()
+    query = dict()
 
     if ref_id:
-        ref_query["reference.id"] = ref_id
+        query["_id"] = ref_id
 
-    history_query = {
-        **ref_query,
-        "index.id": "unbuilt"
-    }
+    all_stats = [
+        await virtool.references.db.get_stats(db, document["_id"], document.get("stats"))
+        async for document in db.references.find(query, ["stats"])
+    ]
 
     return {
-        "total_otu_count": await db.otus.count_documents(ref_query),
-        "change_count": await db.history.count_documents(history_query),
-        "modified_otu_count": len(await db.history.distinct("otu.id", history_query))
+        "total_otu_count": sum(stats["otu_count"] for stats in all_stats),
+        "change_count": sum(stats["unbuilt_change_count"] for stats in all_stats),
+        "modified_otu_count": sum(stats["modified_otu_count"] for stats in all_stats)
     }
@@ -1,18 +1,20 @@
 import os
 import shutil
 import sys
-from collections import defaultdict
-
-from Bio import SeqIO
-from Bio.SeqRecord import SeqRecord
+from typing import Dict
 
+import numpy
 
+import virtool.analyses.utils
+import virtool.bio
 import virtool.jobs.analysis
-import virtool.utils
 
 AODP_MAX_HOMOLOGY = 0
 AODP_OLIGO_SIZE = 8
 
+#: The number of tab-separated fields in each line of AODP match output.
+AODP_OUTPUT_FIELD_COUNT = 7
+
 
 class Job(virtool.jobs.analysis.Job):
 
@@ -65,29 +67,26 @@ class Job(virtool.jobs.analysis.Job):
 
         self.run_subprocess(command)
 
-        joined_path = f"{output_prefix}.extendedFrags.fastq"
         remainder_path = f"{output_prefix}.notCombined_1.fastq"
         hist_path = f"{output_prefix}.hist"
 
         self.results = {
             "join_histogram": parse_flash_hist(hist_path),
-            "joined_pair_count": virtool.utils.file_length(joined_path) / 4,
-            "remainder_pair_count": virtool.utils.file_length(remainder_path) / 4
+            "remainder_pair_count": sum(len(batch) for batch in virtool.bio.read_fastq_batches(remainder_path))
         }
 
     def deduplicate_reads(self):
         """
-        Remove duplicate reads. Store the counts for unique reads.
+        Remove duplicate reads. Store the counts for unique reads. The number of joined pairs is counted in the same
+        pass.
 
         """
-        counts = defaultdict(int)
-
         joined_path = os.path.join(self.params["analysis_path"], "flash.extendedFrags.fastq")
         output_path = os.path.join(self.params["analysis_path"], "unique.fa")
 
-        with open(output_path, "w") as f:
-            for record in parse_joined_fastq(joined_path, counts):
-                SeqIO.write(record, f, format="fasta")
+        counts = deduplicate_joined_reads(joined_path, output_path)
+
+        self.results["joined_pair_count"] = sum(counts.values())
 
         self.intermediate["sequence_counts"] = counts
 
@@ -120,57 +119,51 @@ class Job(virtool.jobs.analysis.Job):
 
         self.run_subprocess(command, cwd=cwd)
 
-        parsed = list()
+        columns = read_aodp_output(self.params["aodp_output_path"])
 
-        with open(self.params["aodp_output_path"], "r") as f:
-            for line in f:
-                split = line.rstrip().split("\t")
-                assert len(split) == 7
+        # Look up the OTU and count for each distinct sequence and read id once and expand them to every match.
+        sequence_ids, sequence_indexes = numpy.unique(columns["sequence_id"], return_inverse=True)
 
-                sequence_id = split[1]
+        otu_ids = [self.params["sequence_otu_map"][sequence_id] for sequence_id in sequence_ids.tolist()]
 
-                if sequence_id == "-":
-                    continue
+        columns["otu_id"] = numpy.array(otu_ids, dtype=str)[sequence_indexes]
+        columns["otu_version"] = numpy.array(
+            [self.params["manifest"][otu_id] for otu_id in otu_ids],
+            dtype=numpy.int64
+        )[sequence_indexes]
 
-                identity = split[2]
+        read_ids, read_indexes = numpy.unique(columns["id"], return_inverse=True)
 
-                if identity[0] == "<":
-                    continue
-                else:
-                    identity = float(identity.replace("%", ""))
-
-                read_id = split[0]
-
-                sequence_id = split[1]
+        read_counts = numpy.array(
+            [self.intermediate["sequence_counts"][read_id] for read_id in read_ids.tolist()],
+            dtype=numpy.int64
+        )
 
-                otu_id = self.params["sequence_otu_map"][sequence_id]
-                otu_version = self.params["manifest"][otu_id]
+        columns["count"] = read_counts[read_indexes]
 
-                parsed.append({
-                    "id": read_id,
-                    "sequence_id": sequence_id,
-                    "identity": identity,
-                    "matched_length": int(split[3]),
-                    "read_length": int(split[4]),
-                    "min_cluster": int(split[5]),
-                    "max_cluster": int(split[6]),
-                    "count": self.intermediate["sequence_counts"][read_id],
-                    "otu": {
-                        "version": otu_version,
-                        "id": otu_id
-                    }
-                })
+        self.intermediate["columns"] = columns
 
-        self.results["results"] = parsed
+        self.results["summary"] = {
+            "match_count": len(columns["id"]),
+            "read_count": int(read_counts.sum()),
+            "otu_count": len(set(otu_ids))
+        }
 
     def import_results(self):
         analysis_id = self.params["analysis_id"]
         sample_id = self.params["sample_id"]
 
+        # Matches are written to a columnar file so they don't count toward the MongoDB document size limit.
+        numpy.savez(
+            os.path.join(self.params["analysis_path"], virtool.analyses.utils.AODP_RESULTS_FILENAME),
+            **self.intermediate["columns"]
+        )
+
         # Update the database document with the small data.
         self.db.analyses.update_one({"_id": analysis_id}, {
             "$set": {
                 **self.results,
+                "results": "file",
                 "ready": True
             }
         })
@@ -179,19 +172,74 @@ class Job(virtool.jobs.analysis.Job):
         self.dispatch("samples", "update", [sample_id])
 
 
-def parse_joined_fastq(path: str, counts: defaultdict):
-    sequence_id_map = dict()
+def deduplicate_joined_reads(path: str, output_path: str) -> Dict[str, int]:
+    """
+    Write each unique sequence in the joined FASTQ file at `path` to a FASTA file at `output_path`. Unique sequences are
+    given ids like `read_1` in the order they first appear.
+
+    Sequences are compared as raw bytes and the FASTA records for each batch of reads are written in one block.
+
+    :param path: the path to the joined FASTQ file
+    :param output_path: the path to write the unique sequences to
+    :return: the number of reads with each unique sequence keyed by sequence id
+
+    """
+    sequence_indexes = dict()
+    counts = list()
+
+    with open(output_path, "wb") as f:
+        for batch in virtool.bio.read_fastq_batches(path):
+            block = list()
+
+            for _, sequence, _ in batch:
+                index = sequence_indexes.get(sequence)
+
+                if index is None:
+                    index = sequence_indexes[sequence] = len(counts)
+                    counts.append(0)
+                    block.append(b">read_%d\n%s\n" % (index + 1, sequence))
+
+                counts[index] += 1
+
+            f.write(b"".join(block))
+
+    return {f"read_{index + 1}": count for index, count in enumerate(counts)}
+
+
+def read_aodp_output(path: str) -> Dict[str, numpy.ndarray]:
+    """
+    Read the AODP match output at `path` into an array for each field. Reads that did not match a sequence and matches
+    with an identity below the AODP reporting threshold (eg. `<80%`) are dropped.
+
+    :param path: the path to the AODP match output
+    :return: arrays of match values keyed by field name
+
+    """
+    with open(path, "rb") as f:
+        fields = f.read().replace(b"\n", b"\t").split(b"\t")
+
+    # Drop the empty field after the final newline.
+    if fields[-1] == b"":
+        fields.pop()
+
+    if len(fields) % AODP_OUTPUT_FIELD_COUNT:
+        raise ValueError(f"Expected {AODP_OUTPUT_FIELD_COUNT} fields per line in AODP output")
+
+    table = numpy.array(fields, dtype=bytes).reshape(-1, AODP_OUTPUT_FIELD_COUNT)
 
-    for record in SeqIO.parse(path, format="fastq"):
-        try:
-            sequence_id = sequence_id_map[str(record.seq)]
-        except KeyError:
-            sequence_id = f"read_{len(sequence_id_map) + 1}"
-            sequence_id_map[str(record.seq)] = sequence_id
+    identities = table[:, 2]
 
-            yield SeqRecord(record.seq, id=sequence_id)
+    table = table[(table[:, 1] != b"-") & ~numpy.char.startswith(identities, b"<")]
 
-        counts[sequence_id] += 1
+    return {
+        "id": numpy.char.decode(table[:, 0]),
+        "sequence_id": numpy.char.decode(table[:, 1]),
+        "identity": numpy.char.rstrip(table[:, 2], b"%").astype(numpy.float64),
+        "matched_length": table[:, 3].astype(numpy.int64),
+        "read_length": table[:, 4].astype(numpy.int64),
+        "min_cluster": table[:, 5].astype(numpy.int64),
+        "max_cluster": table[:, 6].astype(numpy.int64)
+    }
 
 
 def parse_flash_hist(path):
@@ -116,11 +116,49 @@ class Job(virtool.jobs.job.Job):
         Replaces the old index with the newly generated one.
 
         """
+        # Find OTUs with changes. This is done before the index is marked as ready so that reference exports cached for
+        # the new index never contain OTUs at their previously indexed versions.
+        pipeline = [
+            {"$project": {
+                "reference": True,
+                "version": True,
+                "last_indexed_version": True,
+                "comp": {"$cmp": ["$version", "$last_indexed_version"]}
+            }},
+            {"$match": {
+                "reference.id": self.params["ref_id"],
+                "comp": {"$ne": 0}
+            }},
+            {"$group": {
+                "_id": "$version",
+                "id_list": {
+                    "$addToSet": "$_id"
+                }
+            }}
+        ]
+
+        id_version_key = {agg["_id"]: agg["id_list"] for agg in self.db.otus.aggregate(pipeline)}
+
+        # For each version number
+        for version, id_list in id_version_key.items():
+            self.db.otus.update_many({"_id": {"$in": id_list}}, {
+                "$set": {
+                    "last_indexed_version": version
+                }
+            })
+
         # Tell the client the index is ready to be used and to no longer show it as building.
-        self.db.indexes.find_one_and_update({"_id": self.params["index_id"]}, {
+        index = self.db.indexes.find_one_and_update({"_id": self.params["index_id"]}, {
             "$set": {
                 "ready": True
             }
+        }, projection=["created_at", "version", "user"])
+
+        # Record the new index as the latest build in the reference statistics.
+        self.db.references.update_one({"_id": self.params["ref_id"], "stats": {"$exists": True}}, {
+            "$set": {
+                "stats.latest_build": virtool.utils.base_processor(index)
+            }
         })
 
         self.dispatch("indexes", "update", [self.params["index_id"]])
@@ -147,36 +185,6 @@ class Job(virtool.jobs.job.Job):
 
         self.dispatch("indexes", "update", id_list)
 
-        # Find OTUs with changes.
-        pipeline = [
-            {"$project": {
-                "reference": True,
-                "version": True,
-                "last_indexed_version": True,
-                "comp": {"$cmp": ["$version", "$last_indexed_version"]}
-            }},
-            {"$match": {
-                "reference.id": self.params["ref_id"],
-                "comp": {"$ne": 0}
-            }},
-            {"$group": {
-                "_id": "$version",
-                "id_list": {
-                    "$addToSet": "$_id"
-                }
-            }}
-        ]
-
-        id_version_key = {agg["_id"]: agg["id_list"] for agg in self.db.otus.aggregate(pipeline)}
-
-        # For each version number
-        for version, id_list in id_version_key.items():
-            self.db.otus.update_many({"_id": {"$in": id_list}}, {
-                "$set": {
-                    "last_indexed_version": version
-                }
-            })
-
     def cleanup(self):
         """
         Cleanup if the job fails.
@@ -212,6 +220,13 @@ class Job(virtool.jobs.job.Job):
 
         self.dispatch("history", "update", id_list)
 
+        # The unbuilt counts in the reference statistics are out of date. They are computed again when next requested.
+        self.db.references.update_one({"_id": self.params["ref_id"]}, {
+            "$unset": {
+                "stats": ""
+            }
+        })
+
         virtool.utils.rm(self.params["index_path"], True)
 
 
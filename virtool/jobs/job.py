@@ -11,7 +11,7 @@ import subprocess
 import sys
 import threading
 import traceback
-from typing import Optional
+from typing import List, Optional
 
 import pymongo
 
@@ -94,6 +94,7 @@ class Job(multiprocessing.Process):
         self._stage = None
         self._error = None
         self._process = None
+        self._pipeline = list()
         self._stage_list = None
         self._log_path = os.path.join(self.settings["data_path"], "logs", "jobs", self.id)
         self._log_buffer = list()
@@ -171,8 +172,7 @@ class Job(multiprocessing.Process):
         except TerminationError:
             self.add_status(state="cancelled")
 
-            if self._process:
-                self._process.kill()
+            self.kill_processes()
 
             self.cleanup()
 
@@ -180,8 +180,7 @@ class Job(multiprocessing.Process):
             self._error = handle_exception()
             self.add_status(state="error")
 
-            if self._process:
-                self._process.kill()
+            self.kill_processes()
 
             self.cleanup()
 
@@ -263,6 +262,75 @@ class Job(multiprocessing.Process):
 
         self._process = None
 
+    def run_pipeline(self, commands: List[list]):
+        """
+        Run the passed `commands` as a pipeline. The STDOUT of each command is connected to the STDIN of the next one
+        and the STDOUT of the last command is discarded. STDERR lines from all commands are written to the job log.
+
+        All commands run at the same time. A :class:`SubprocessError` is raised after they finish if any of them failed.
+
+        :param commands: the commands to run in the order their data flows
+
+        """
+        self.add_log(f"Command: {' | '.join(' '.join(command) for command in commands)}")
+
+        stderr_queue = queue.Queue()
+        stderr_threads = list()
+
+        stdin = None
+
+        for index, command in enumerate(commands):
+            process = subprocess.Popen(
+                command,
+                stdin=stdin,
+                stdout=subprocess.DEVNULL if index == len(commands) - 1 else subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+
+            # Close the copy of the pipe held by this process so the upstream command gets SIGPIPE if the downstream
+            # command exits early.
+            if stdin:
+                stdin.close()
+
+            stdin = process.stdout
+
+            self._pipeline.append(process)
+
+            thread = threading.Thread(target=watch_pipe, args=(process.stderr, stderr_queue), daemon=True)
+            thread.start()
+
+            stderr_threads.append(thread)
+
+        while True:
+            try:
+                self.add_log(stderr_queue.get(timeout=0.1), indent=1)
+            except queue.Empty:
+                pass
+
+            alive = any(thread.is_alive() for thread in stderr_threads)
+            running = any(process.poll() is None for process in self._pipeline)
+
+            if not alive and not running and stderr_queue.empty():
+                break
+
+        failed = [command for command, process in zip(commands, self._pipeline) if process.returncode != 0]
+
+        self._pipeline = list()
+
+        if failed:
+            raise SubprocessError(f"Command failed: {' '.join(failed[0])}. Check job log.")
+
+    def kill_processes(self):
+        """
+        Kill the subprocess or pipeline of subprocesses started by :meth:`.run_subprocess` or :meth:`.run_pipeline`.
+
+        """
+        if self._process:
+            self._process.kill()
+
+        for process in self._pipeline:
+            process.kill()
+
     def add_status(self, state=None, stage=None):
         """
         Add a status entry to the job database document that describes this job.
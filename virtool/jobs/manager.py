@@ -49,8 +49,6 @@ class IntegratedManager:
 
         self.db_name = app["settings"]["db_name"]
 
-        self.process_executor = app["process_executor"]
-
         #: The settings dict.
         self.settings = app["settings"]
 
@@ -60,6 +58,9 @@ class IntegratedManager:
         #: A dict to store all the tracked job objects in.
         self._jobs = dict()
 
+        if "metrics" in app:
+            app["metrics"].add_collector(self.update_metrics)
+
     async def run(self):
         logging.debug("Started job manager")
 
@@ -135,6 +136,25 @@ class IntegratedManager:
         async for document in collection.find({"_id": {"$in": id_list}}, projection=projection):
             await self._dispatch(interface, operation, await apply_processor(document))
 
+    def update_metrics(self, metrics):
+        """
+        Update job counts and resource use in the passed :class:`~virtool.metrics.Metrics` registry. Used as a metrics
+        collector.
+
+        :param metrics: the application metrics registry
+
+        """
+        running = len([j for j in self._jobs.values() if j["process"]])
+
+        metrics.jobs.set(running, state="running")
+        metrics.jobs.set(len(self._jobs) - running, state="waiting")
+
+        used = get_used_resources(self._jobs)
+
+        for key in ["proc", "mem"]:
+            metrics.job_resources_used.set(used[key], resource=key)
+            metrics.job_resources_limit.set(self.settings[key], resource=key)
+
     async def cancel(self, job_id):
         """
         Cancel the job with the given `job_id` if it is in the `_jobs_dict`.
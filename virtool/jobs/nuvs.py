@@ -3,16 +3,31 @@ Job class and functions for NuVs.
 
 """
 import collections
+import concurrent.futures
+import hashlib
+import itertools
 import os
 import shlex
 import shutil
 import tempfile
 
+import numpy
+import pymongo.errors
+
 import virtool.bio
+import virtool.config
 import virtool.db.sync
+import virtool.hmm.utils
 import virtool.jobs.analysis
 
 
+#: The number of contigs sent to a worker process at once when finding ORFs.
+ORF_BATCH_SIZE = 50
+
+#: The number of reads checked against the unmapped read ids at once when reuniting pairs.
+REUNITE_BATCH_SIZE = 100000
+
+
 class SubprocessError(Exception):
     pass
 
@@ -26,6 +41,10 @@ class Job(virtool.jobs.analysis.Job):
        unaligned reads.
     2. Eliminate known host reads by mapping the reads remaining from the previous stage to the sample's subtraction
        host using ``bowtie2`` and saving the unaligned reads.
+
+       If the `nuvs_stream_reads` setting is enabled, the first two steps run at the same time in
+       :meth:`.eliminate_reads` with the unaligned reads from step 1 piped directly into step 2.
+
     3. Generate an assembly from the remaining reads using SPAdes.
     4. Extract all significant open reading frames (ORF) from the assembled contigs.
     5. Using HMMER/vFAM, identify possible viral domains in the ORFs.
@@ -35,11 +54,17 @@ class Job(virtool.jobs.analysis.Job):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        stream_reads = self.settings.get("nuvs_stream_reads", virtool.config.SCHEMA["nuvs_stream_reads"]["default"])
+
+        if stream_reads:
+            elimination_stages = [self.eliminate_reads]
+        else:
+            elimination_stages = [self.eliminate_otus, self.eliminate_subtraction]
+
         self._stage_list = [
             self.make_analysis_dir,
             self.prepare_reads,
-            self.eliminate_otus,
-            self.eliminate_subtraction,
+            *elimination_stages,
             self.reunite_pairs,
             self.assemble,
             self.process_fasta,
@@ -57,53 +82,103 @@ class Job(virtool.jobs.analysis.Job):
         ``--very-fast-local`` and retain unaligned reads to the FASTA file ``unmapped_otus.fq``.
 
         """
-        command = [
+        self.run_subprocess(self.get_otu_elimination_command(
+            os.path.join(self.params["analysis_path"], "unmapped_otus.fq"),
+            self.proc
+        ))
+
+    def eliminate_subtraction(self):
+        """
+        Maps unaligned reads from :meth:`.map_otus` to the sample's subtraction host using ``bowtie2``. Bowtie2 is
+        set to use the search parameter ``--very-fast-local`` and retain unaligned reads to the FASTA file
+        ``unmapped_host.fq``.
+
+        """
+        self.run_subprocess(self.get_subtraction_elimination_command(
+            os.path.join(self.params["analysis_path"], "unmapped_otus.fq"),
+            self.proc
+        ))
+
+    def eliminate_reads(self):
+        """
+        Run the ``bowtie2`` commands from :meth:`.eliminate_otus` and :meth:`.eliminate_subtraction` as a pipeline.
+        Reads that do not align to the otu reference are written to STDOUT and read from STDIN by the subtraction
+        mapping, so ``unmapped_otus.fq`` is never written to disk and both mappings run at the same time.
+
+        The processors reserved for the job are split between the two mappings.
+
+        """
+        proc = max(1, self.proc // 2)
+
+        self.run_pipeline([
+            self.get_otu_elimination_command("/dev/stdout", proc) + ["-S", os.devnull],
+            self.get_subtraction_elimination_command("-", proc)
+        ])
+
+    def get_otu_elimination_command(self, unmapped_path: str, proc: int) -> list:
+        """
+        Get the ``bowtie2`` command for mapping the sample reads to the otu reference.
+
+        :param unmapped_path: the path to write unaligned reads to
+        :param proc: the number of threads for ``bowtie2`` to use
+        :return: the command
+
+        """
+        return [
             "bowtie2",
-            "-p", str(self.proc),
+            "-p", str(proc),
             "-k", str(1),
             "--very-fast-local",
             "-x", self.params["index_path"],
-            "--un", os.path.join(self.params["analysis_path"], "unmapped_otus.fq"),
+            "--un", unmapped_path,
             "-U", ",".join(self.params["read_paths"])
         ]
 
-        self.run_subprocess(command)
-
-    def eliminate_subtraction(self):
+    def get_subtraction_elimination_command(self, read_path: str, proc: int) -> list:
         """
-        Maps unaligned reads from :meth:`.map_otus` to the sample's subtraction host using ``bowtie2``. Bowtie2 is
-        set to use the search parameter ``--very-fast-local`` and retain unaligned reads to the FASTA file
-        ``unmapped_host.fq``.
+        Get the ``bowtie2`` command for mapping the reads at `read_path` to the subtraction host. Unaligned reads are
+        written to ``unmapped_hosts.fq``.
+
+        :param read_path: the path to the reads that were not aligned to the otu reference
+        :param proc: the number of threads for ``bowtie2`` to use
+        :return: the command
 
         """
-        command = [
+        return [
             "bowtie2",
             "--very-fast-local",
             "-k", str(1),
-            "-p", str(self.proc),
+            "-p", str(proc),
             "-x", shlex.quote(self.params["subtraction_path"]),
             "--un", os.path.join(self.params["analysis_path"], "unmapped_hosts.fq"),
-            "-U", os.path.join(self.params["analysis_path"], "unmapped_otus.fq"),
+            "-U", read_path,
         ]
 
-        self.run_subprocess(command)
-
     def reunite_pairs(self):
-        if self.params["paired"]:
-            unmapped_path = os.path.join(self.params["analysis_path"], "unmapped_hosts.fq")
-            headers = virtool.bio.read_fastq_headers(unmapped_path)
-
-            unmapped_roots = {h.split(" ")[0] for h in headers}
+        """
+        Write the mates of paired reads that were not eliminated by :meth:`.eliminate_otus` or
+        :meth:`.eliminate_subtraction` to ``unmapped_1.fq`` and ``unmapped_2.fq``. Does nothing for unpaired samples.
 
-            with open(os.path.join(self.params["analysis_path"], "unmapped_1.fq"), "w") as f:
-                for header, seq, quality in virtool.bio.read_fastq_from_path(self.params["read_paths"][0]):
-                    if header.split(" ")[0] in unmapped_roots:
-                        f.write("\n".join([header, seq, "+", quality]) + "\n")
+        The ids of the unmapped reads are stored as a sorted array of hashes and the two read files are filtered in
+        separate processes.
 
-            with open(os.path.join(self.params["analysis_path"], "unmapped_2.fq"), "w") as f:
-                for header, seq, quality in virtool.bio.read_fastq_from_path(self.params["read_paths"][1]):
-                    if header.split(" ")[0] in unmapped_roots:
-                        f.write("\n".join([header, seq, "+", quality]) + "\n")
+        """
+        if self.params["paired"]:
+            unmapped_ids = read_unmapped_ids(os.path.join(self.params["analysis_path"], "unmapped_hosts.fq"))
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(
+                        write_unmapped_mates,
+                        read_path,
+                        os.path.join(self.params["analysis_path"], f"unmapped_{suffix}.fq"),
+                        unmapped_ids
+                    )
+                    for suffix, read_path in enumerate(self.params["read_paths"], start=1)
+                ]
+
+                for future in futures:
+                    future.result()
 
     def assemble(self):
         """
@@ -168,47 +243,82 @@ class Job(virtool.jobs.analysis.Job):
         Finds ORFs in the contigs assembled by :meth:`.assemble`. Only ORFs that are 100+ amino acids long are recorded.
         Contigs with no acceptable ORFs are discarded.
 
+        Contigs are streamed from the assembly and ORFs are found for batches of contigs in a pool of `proc` processes.
+        Results are collected in contig order, so the result indexes and `orfs.fa` don't depend on which batches finish
+        first.
+
         """
         assembly_path = os.path.join(self.params["analysis_path"], "assembly.fa")
 
-        assembly = virtool.bio.read_fasta(assembly_path)
+        # Don't consider sequences shorter than 300 bp.
+        sequences = (sequence for _, sequence in virtool.bio.iter_fasta(assembly_path) if len(sequence) >= 300)
 
-        for _, sequence in assembly:
+        # Write the ORFs to a FASTA file so that they can be analyzed using HMMER and vFAM.
+        with open(os.path.join(self.params["analysis_path"], "orfs.fa"), "w") as f:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.proc) as executor:
+                pending = collections.deque()
 
-            sequence_length = len(sequence)
+                while True:
+                    batch = list(itertools.islice(sequences, ORF_BATCH_SIZE))
 
-            # Don't consider the sequence if it is shorter than 300 bp.
-            if sequence_length < 300:
-                continue
+                    if batch:
+                        pending.append((batch, executor.submit(find_orfs, batch)))
+
+                    # Keep enough batches submitted to occupy every worker without reading the whole assembly.
+                    while pending and (not batch or len(pending) > self.proc * 2):
+                        self.add_orfs(f, *pending.popleft())
 
-            orfs = virtool.bio.find_orfs(sequence)
+                    if not batch:
+                        break
 
+    def add_orfs(self, f, batch: list, future: concurrent.futures.Future):
+        """
+        Add the contigs in `batch` that have ORFs to the results and write their ORFs to the open `orfs.fa` file `f`.
+
+        :param f: the `orfs.fa` file object
+        :param batch: the contig sequences
+        :param future: the future for the ORFs found for the batch with :func:`.find_orfs`
+
+        """
+        for sequence, orfs in zip(batch, future.result()):
             # Don't consider the sequence if it has no ORFs.
             if len(orfs) == 0:
                 continue
 
-            # Add an index field to each orf dict.
-            orfs = [dict(o, index=i) for i, o in enumerate(orfs)]
-
-            for orf in orfs:
-                orf.pop("nuc")
-                orf["hits"] = list()
+            index = len(self.results)
 
             # Make an entry for the nucleotide sequence containing a unique integer index, the sequence itself, and
             # all ORFs in the sequence.
             self.results.append({
-                "index": len(self.results),
+                "index": index,
                 "sequence": sequence,
                 "orfs": orfs
             })
 
-        # Write the ORFs to a FASTA file so that they can be analyzed using HMMER and vFAM.
-        with open(os.path.join(self.params["analysis_path"], "orfs.fa"), "w") as f:
-            for entry in self.results:
-                for orf in entry["orfs"]:
-                    f.write(f">sequence_{entry['index']}.{orf['index']}\n{orf['pro']}\n")
+            for orf in orfs:
+                f.write(f">sequence_{index}.{orf['index']}\n{orf['pro']}\n")
 
     def prepare_hmm(self):
+        """
+        Find the profile HMMs to search with in :meth:`.vfam`.
+
+        The profiles pressed when the installed HMM release was installed are used if they pass checksum validation.
+        Otherwise, the profiles are copied to the analysis directory and pressed there.
+
+        """
+        status = self.db.status.find_one("hmm", ["installed"])
+
+        # Cached hmmscan hits are only valid for the release they were found with.
+        self.params["hmm_release_id"] = None
+
+        if status and status.get("installed"):
+            self.params["hmm_release_id"] = status["installed"]["id"]
+
+            pressed_path = virtool.hmm.utils.join_pressed_path(self.settings["data_path"], status["installed"]["id"])
+
+            if virtool.hmm.utils.check_pressed_profiles(pressed_path):
+                self.params["hmm_path"] = os.path.join(pressed_path, "profiles.hmm")
+                return
 
         shutil.copy(os.path.join(self.settings["data_path"], "hmm", "profiles.hmm"), self.params["analysis_path"])
 
@@ -223,55 +333,50 @@ class Job(virtool.jobs.analysis.Job):
 
         os.remove(hmm_path)
 
+        self.params["hmm_path"] = hmm_path
+
     def vfam(self):
         """
-        Searches for viral motifs in ORF translations generated by :meth:`.process_fasta`. Calls ``hmmscan`` and
-        searches against ``candidates.fa`` using the profile HMMs in ``data_path/hmm/vFam.hmm``.
+        Searches for viral motifs in ORF translations generated by :meth:`.process_fasta`. Calls ``hmmscan`` using the
+        pressed profile HMMs found by :meth:`.prepare_hmm`.
 
-        Saves two files:
+        Hits are cached in the `hmm_hits` collection by the hash of the ORF protein sequence and the installed HMM
+        release. Only proteins without cached hits are written to ``uncached_orfs.fa`` and searched.
 
-        - ``hmm.tsv`` contains the raw output of `hmmer`
-        - ``hits.tsv`` contains the `hmmer` results formatted and annotated with the annotations from the Virtool HMM
-          database collection
+        Saves ``hmm.tsv``, which contains the raw output of `hmmer` for the uncached proteins.
 
         """
-        # The path to output the hmmer results to.
-        tsv_path = os.path.join(self.params["analysis_path"], "hmm.tsv")
+        protein_hashes = {
+            orf["pro"]: hash_protein(orf["pro"]) for sequence in self.results for orf in sequence["orfs"]
+        }
 
-        command = [
-            "hmmscan",
-            "--tblout", tsv_path,
-            "--noali",
-            "--cpu", str(self.proc - 1),
-            os.path.join(self.params["analysis_path"], "profiles.hmm"),
-            os.path.join(self.params["analysis_path"], "orfs.fa")
-        ]
+        protein_hits = self.get_cached_hits(set(protein_hashes.values()))
 
-        self.run_subprocess(command)
+        uncached = {
+            protein_hash: protein
+            for protein, protein_hash in protein_hashes.items()
+            if protein_hash not in protein_hits
+        }
 
-        hits = collections.defaultdict(lambda: collections.defaultdict(list))
+        if uncached:
+            protein_hits.update(self.scan_proteins(uncached))
 
-        # Go through the raw HMMER results and annotate the HMM hits with data from the database.
-        with open(tsv_path, "r") as hmm_file:
-            for line in hmm_file:
-                if line.startswith("vFam"):
-                    line = line.split()
+        clusters = {hit["cluster"] for hits in protein_hits.values() for hit in hits}
 
-                    cluster_id = int(line[0].split("_")[1])
-                    annotation_id = (self.db.hmm.find_one({"cluster": int(cluster_id)}, {"_id": True}))["_id"]
+        # Get the ids of the HMM annotations for all hit clusters in one query.
+        annotation_ids = {
+            document["cluster"]: document["_id"]
+            for document in self.db.hmm.find({"cluster": {"$in": list(clusters)}}, ["cluster"])
+        }
 
-                    # Expecting sequence_0.0
-                    sequence_index, orf_index = (int(x) for x in line[2].split("_")[1].split("."))
+        hits = collections.defaultdict(lambda: collections.defaultdict(list))
 
-                    hits[sequence_index][orf_index].append({
-                        "hit": annotation_id,
-                        "full_e": float(line[4]),
-                        "full_score": float(line[5]),
-                        "full_bias": float(line[6]),
-                        "best_e": float(line[7]),
-                        "best_bias": float(line[8]),
-                        "best_score": float(line[9])
-                    })
+        # Annotate the HMM hits for each ORF with data from the database.
+        for sequence_index, sequence in enumerate(self.results):
+            for orf_index, orf in enumerate(sequence["orfs"]):
+                for hit in protein_hits[protein_hashes[orf["pro"]]]:
+                    hit = dict(hit)
+                    hits[sequence_index][orf_index].append({"hit": annotation_ids[hit.pop("cluster")], **hit})
 
         for sequence_index in hits:
             for orf_index in hits[sequence_index]:
@@ -282,6 +387,88 @@ class Job(virtool.jobs.analysis.Job):
             if all(len(o["hits"]) == 0 for o in sequence["orfs"]):
                 self.results.remove(sequence)
 
+    def get_cached_hits(self, protein_hashes: set) -> dict:
+        """
+        Get cached hmmscan hits for the installed HMM release for the proteins with the passed `protein_hashes`.
+
+        :param protein_hashes: the hashes of the proteins to get hits for
+        :return: lists of hits keyed by the hashes of proteins that have cached hits
+
+        """
+        release_id = self.params.get("hmm_release_id")
+
+        if release_id is None:
+            return dict()
+
+        cursor = self.db.hmm_hits.find({
+            "release_id": release_id,
+            "hash": {"$in": list(protein_hashes)}
+        }, ["hash", "hits"])
+
+        return {document["hash"]: document["hits"] for document in cursor}
+
+    def scan_proteins(self, proteins: dict) -> dict:
+        """
+        Search the passed `proteins` with ``hmmscan`` and cache the hits for the installed HMM release. Proteins without
+        hits are cached with an empty hit list.
+
+        :param proteins: protein sequences keyed by their hashes
+        :return: lists of hits keyed by protein hash
+
+        """
+        fasta_path = os.path.join(self.params["analysis_path"], "uncached_orfs.fa")
+
+        # The path to output the hmmer results to.
+        tsv_path = os.path.join(self.params["analysis_path"], "hmm.tsv")
+
+        with open(fasta_path, "w") as f:
+            for protein_hash, protein in proteins.items():
+                f.write(f">{protein_hash}\n{protein}\n")
+
+        command = [
+            "hmmscan",
+            "--tblout", tsv_path,
+            "--noali",
+            "--cpu", str(self.proc - 1),
+            self.params["hmm_path"],
+            fasta_path
+        ]
+
+        self.run_subprocess(command)
+
+        protein_hits = {protein_hash: list() for protein_hash in proteins}
+
+        with open(tsv_path, "r") as hmm_file:
+            for line in hmm_file:
+                if not line.startswith("vFam"):
+                    continue
+
+                row = line.split()
+
+                protein_hits[row[2]].append({
+                    "cluster": int(row[0].split("_")[1]),
+                    "full_e": float(row[4]),
+                    "full_score": float(row[5]),
+                    "full_bias": float(row[6]),
+                    "best_e": float(row[7]),
+                    "best_bias": float(row[8]),
+                    "best_score": float(row[9])
+                })
+
+        release_id = self.params.get("hmm_release_id")
+
+        if release_id is not None:
+            try:
+                self.db.hmm_hits.insert_many([
+                    {"hash": protein_hash, "release_id": release_id, "hits": hits}
+                    for protein_hash, hits in protein_hits.items()
+                ], ordered=False)
+            except pymongo.errors.BulkWriteError:
+                # Another job cached some of the same proteins first.
+                pass
+
+        return protein_hits
+
     def import_results(self):
         """
         Save the results to the analysis document and set the ``ready`` field to ``True``.
@@ -312,3 +499,102 @@ class Job(virtool.jobs.analysis.Job):
             self.temp_dir.cleanup()
         except AttributeError:
             pass
+
+
+def find_orfs(sequences: list) -> list:
+    """
+    Find the ORFs in a batch of contig sequences and format them for inclusion in the results. Runs in a worker process
+    started by :meth:`.Job.process_fasta`.
+
+    :param sequences: the contig sequences
+    :return: a list of formatted ORFs for each sequence
+
+    """
+    formatted = list()
+
+    for orfs in virtool.bio.find_orfs_in_sequences(sequences):
+        # Add an index field to each orf dict.
+        orfs = [dict(o, index=i) for i, o in enumerate(orfs)]
+
+        for orf in orfs:
+            orf.pop("nuc")
+            orf["hits"] = list()
+
+        formatted.append(orfs)
+
+    return formatted
+
+
+def hash_protein(sequence: str) -> str:
+    """
+    Hash a protein sequence for looking up cached ``hmmscan`` hits.
+
+    :param sequence: the protein sequence
+    :return: the hex digest of the sequence
+
+    """
+    return hashlib.blake2b(sequence.encode(), digest_size=16).hexdigest()
+
+
+def hash_read_id(header: bytes) -> int:
+    """
+    Hash the id of a read to an unsigned 64-bit integer. The id is the FASTQ header up to the first space, which is the
+    same for both mates of a pair.
+
+    A stable hash is used so the same hashes are calculated in every process.
+
+    :param header: the FASTQ header without the trailing newline
+    :return: the hash of the read id
+
+    """
+    return int.from_bytes(hashlib.blake2b(header.split(b" ", 1)[0], digest_size=8).digest(), "little")
+
+
+def read_unmapped_ids(path: str) -> numpy.ndarray:
+    """
+    Get the sorted, unique hashes of the read ids in the FASTQ file at `path`.
+
+    :param path: the path to the FASTQ file
+    :return: the read id hashes
+
+    """
+    hashes = numpy.fromiter((
+        hash_read_id(header)
+        for batch in virtool.bio.read_fastq_batches(path)
+        for header, _, _ in batch
+    ), dtype=numpy.uint64)
+
+    return numpy.unique(hashes)
+
+
+def write_unmapped_mates(read_path: str, output_path: str, unmapped_ids: numpy.ndarray) -> int:
+    """
+    Write the reads in the FASTQ file at `read_path` with ids in `unmapped_ids` to a new FASTQ file at `output_path`.
+    The read file can be GZIP-compressed. Runs in a worker process started by :meth:`.Job.reunite_pairs`.
+
+    :param read_path: the path to the sample read file
+    :param output_path: the path to write the matching reads to
+    :param unmapped_ids: sorted read id hashes from :func:`.read_unmapped_ids`
+    :return: the number of reads written
+
+    """
+    count = 0
+
+    with open(output_path, "wb") as out:
+        if not len(unmapped_ids):
+            return count
+
+        for batch in virtool.bio.read_fastq_batches(read_path, REUNITE_BATCH_SIZE):
+            hashes = numpy.fromiter((hash_read_id(header) for header, _, _ in batch), dtype=numpy.uint64)
+
+            # Find where each hash would be in the sorted ids and check if it is there.
+            indexes = numpy.minimum(numpy.searchsorted(unmapped_ids, hashes), len(unmapped_ids) - 1)
+
+            matches = numpy.flatnonzero(unmapped_ids[indexes] == hashes)
+
+            for i in matches:
+                out.write(b"%s\n%s\n+\n%s\n" % batch[i])
+
+            count += len(matches)
+
+    return count
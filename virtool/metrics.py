@@ -0,0 +1,321 @@
+"""
+Server metrics exported in the Prometheus text exposition format.
+
+Metrics are held in a :class:`Metrics` registry stored in the application state as `app["metrics"]`. Values that are
+cheaper to read than to track continuously, such as job manager resource use, are updated by collector functions that
+run each time the metrics are rendered.
+
+"""
+import math
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import virtool.db.profiling
+
+#: Upper bounds in seconds of the buckets in request and task latency histograms.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+#: The content type of the text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def format_labels(label_names: Tuple[str, ...], label_values: Tuple, extra: str = "") -> str:
+    """
+    Format label names and values as a label set (eg. `{method="GET",route="/api/otus"}`).
+
+    :param label_names: the label names
+    :param label_values: the label values in the same order as `label_names`
+    :param extra: an additional preformatted label, such as the `le` label for histogram buckets
+    :return: the formatted label set
+
+    """
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+
+    if extra:
+        pairs.append(extra)
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+class Metric:
+    """
+    The base class for metrics. Values are stored by a tuple of label values ordered like `label_names`.
+
+    """
+
+    type = None
+
+    def __init__(self, name: str, description: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values = dict()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Expected labels {self.label_names} for {self.name}. Got {tuple(labels)}")
+
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def clear(self):
+        self._values.clear()
+
+    def render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+            *self.render_samples()
+        ]
+
+
+class Counter(Metric):
+    """
+    A value that only increases.
+
+    """
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that can be set, increased, or decreased.
+
+    """
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Counts observations in cumulative buckets and tracks their sum and count.
+
+    Each value is stored as a list of non-cumulative bucket counts with a final `+Inf` bucket, the sum of the
+    observations, and the count of observations.
+
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, label_names: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+
+        try:
+            bucket_counts, total, count = self._values[key]
+        except KeyError:
+            bucket_counts, total, count = [0] * (len(self.buckets) + 1), 0, 0
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[index] += 1
+                break
+        else:
+            bucket_counts[-1] += 1
+
+        self._values[key] = (bucket_counts, total + value, count + 1)
+
+    def load(self, bucket_counts: List[int], total: float, count: int, **labels):
+        """
+        Replace the value for the passed labels with one aggregated elsewhere.
+
+        :param bucket_counts: non-cumulative counts for each bucket followed by the count for the `+Inf` bucket
+        :param total: the sum of the observations
+        :param count: the number of observations
+
+        """
+        if len(bucket_counts) != len(self.buckets) + 1:
+            raise ValueError("Bucket counts do not match histogram buckets")
+
+        self._values[self._key(labels)] = (list(bucket_counts), total, count)
+
+    def render_samples(self) -> List[str]:
+        lines = list()
+
+        for key, (bucket_counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {cumulative}")
+
+            labels = format_labels(self.label_names, key)
+
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+
+        return lines
+
+
+class Metrics:
+    """
+    A registry of all metrics exported by the server.
+
+    """
+
+    def __init__(self):
+        self._collectors = list()
+
+        self.http_requests = Counter(
+            "virtool_http_requests_total",
+            "HTTP requests handled by route and response status.",
+            ("method", "route", "status")
+        )
+
+        self.http_request_duration = Histogram(
+            "virtool_http_request_duration_seconds",
+            "Time spent handling HTTP requests by route.",
+            ("method", "route")
+        )
+
+        self.websocket_connections = Gauge(
+            "virtool_websocket_connections",
+            "Open websocket connections."
+        )
+
+        self.dispatches = Counter(
+            "virtool_dispatches_total",
+            "Websocket messages dispatched by interface and operation.",
+            ("interface", "operation")
+        )
+
+        self.executor_tasks = Counter(
+            "virtool_executor_tasks_total",
+            "Tasks submitted to executors.",
+            ("executor",)
+        )
+
+        self.executor_queued = Gauge(
+            "virtool_executor_queued_tasks",
+            "Tasks waiting for a free executor worker.",
+            ("executor",)
+        )
+
+        self.executor_active = Gauge(
+            "virtool_executor_active_tasks",
+            "Tasks running in executors.",
+            ("executor",)
+        )
+
+        self.executor_wait_duration = Histogram(
+            "virtool_executor_wait_duration_seconds",
+            "Time tasks spent waiting for a free executor worker.",
+            ("executor",)
+        )
+
+        self.executor_task_duration = Histogram(
+            "virtool_executor_task_duration_seconds",
+            "Time tasks spent running in executors.",
+            ("executor",)
+        )
+
+        self.jobs = Gauge(
+            "virtool_jobs",
+            "Jobs tracked by the job manager by state.",
+            ("state",)
+        )
+
+        self.job_resources_used = Gauge(
+            "virtool_job_resources_used",
+            "Processors and memory (GB) reserved by running jobs.",
+            ("resource",)
+        )
+
+        self.job_resources_limit = Gauge(
+            "virtool_job_resources_limit",
+            "Processors and memory (GB) available to jobs.",
+            ("resource",)
+        )
+
+        self.patched_otu_cache_requests = Counter(
+            "virtool_patched_otu_cache_requests_total",
+            "Lookups in the patched OTU cache by result (hit or miss).",
+            ("result",)
+        )
+
+        self.patched_otu_cache_entries = Gauge(
+            "virtool_patched_otu_cache_entries",
+            "Patched OTUs held in the patched OTU cache."
+        )
+
+        self.patched_otu_cache_bytes = Gauge(
+            "virtool_patched_otu_cache_bytes",
+            "Size of the encoded OTUs held in the patched OTU cache."
+        )
+
+        self.db_operation_duration = Histogram(
+            "virtool_db_operation_duration_seconds",
+            "Duration of MongoDB commands by collection and command.",
+            ("collection", "command"),
+            buckets=[bound / 1000 for bound in virtool.db.profiling.LATENCY_BUCKETS]
+        )
+
+    @property
+    def metrics(self) -> List[Metric]:
+        return [value for value in vars(self).values() if isinstance(value, Metric)]
+
+    def add_collector(self, collector: Callable[["Metrics"], None]):
+        """
+        Add a function that is called with the registry to update metric values before they are rendered.
+
+        :param collector: the collector function
+
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Run all collectors and render the metrics in the Prometheus text exposition format.
+
+        :return: the rendered metrics
+
+        """
+        for collector in self._collectors:
+            collector(self)
+
+        lines = list()
+
+        for metric in self.metrics:
+            lines += metric.render()
+
+        return "\n".join(lines) + "\n"
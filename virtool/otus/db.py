@@ -1,5 +1,7 @@
+import collections
+import pymongo
 import pymongo.results
-from typing import Union
+from typing import List, Union
 import virtool.history.db
 import virtool.db.utils
 import virtool.errors
@@ -27,6 +29,28 @@ SEQUENCE_PROJECTION = [
     "segment"
 ]
 
+INDEXES = [
+    pymongo.IndexModel([
+        ("reference.id", pymongo.ASCENDING),
+        ("remote.id", pymongo.ASCENDING)
+    ]),
+    pymongo.IndexModel("name"),
+    pymongo.IndexModel("nickname"),
+    pymongo.IndexModel("abbreviation")
+]
+
+SEQUENCE_INDEXES = [
+    pymongo.IndexModel([
+        ("otu_id", pymongo.ASCENDING),
+        ("isolate_id", pymongo.ASCENDING)
+    ]),
+    pymongo.IndexModel([
+        ("reference.id", pymongo.ASCENDING),
+        ("remote.id", pymongo.ASCENDING)
+    ]),
+    pymongo.IndexModel("name")
+]
+
 
 async def check_name_and_abbreviation(
         db,
@@ -266,6 +290,26 @@ async def join(db, query, document=None):
     return virtool.otus.utils.merge_otu(document, [d async for d in cursor])
 
 
+async def join_many(db, query: dict) -> List[dict]:
+    """
+    Join all OTUs matching the passed `query` with their sequences. Uses one query for each collection instead of one
+    query per OTU as in :func:`join`.
+
+    :param db: the application database client
+    :param query: a Mongo query for the OTUs to join
+    :return: the joined OTU documents
+
+    """
+    otus = [otu async for otu in db.otus.find(query)]
+
+    sequences = collections.defaultdict(list)
+
+    async for sequence in db.sequences.find({"otu_id": {"$in": [otu["_id"] for otu in otus]}}):
+        sequences[sequence["otu_id"]].append(sequence)
+
+    return [virtool.otus.utils.merge_otu(otu, sequences[otu["_id"]]) for otu in otus]
+
+
 async def join_and_format(
         db, otu_id: str,
         joined: Union[dict, None] = None,
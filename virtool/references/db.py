@@ -1,8 +1,9 @@
 import asyncio
+import collections
 import json.decoder
 import logging
 import os
-from typing import List, Union
+from typing import AsyncIterator, List, Tuple, Union
 
 import aiohttp
 import aiojobs.aiohttp
@@ -39,12 +40,19 @@ PROJECTION = [
     "process",
     "release",
     "remotes_from",
+    "stats",
     "unbuilt_count",
     "updates",
     "updating",
     "user"
 ]
 
+#: The number of OTUs to compose in memory and write together when importing OTUs into a reference.
+IMPORT_BATCH_SIZE = 250
+
+#: The maximum number of batches of imported OTUs that can be validated in the process pool at once.
+IMPORT_VALIDATION_BATCHES = 4
+
 
 class CloneReferenceProcess(virtool.processes.process.Process):
 
@@ -52,11 +60,15 @@ class CloneReferenceProcess(virtool.processes.process.Process):
         super().__init__(app, process_id)
 
         self.steps = [
-            self.copy_otus,
-            self.create_history
+            self.copy_otus
         ]
 
     async def copy_otus(self):
+        """
+        Copy the source OTUs in the manifest into the new reference in batches. The OTUs, sequences, and clone history
+        for each batch are written together by :func:`insert_joined_otus`.
+
+        """
         manifest = self.context["manifest"]
         created_at = self.context["created_at"]
         ref_id = self.context["ref_id"]
@@ -66,55 +78,29 @@ class CloneReferenceProcess(virtool.processes.process.Process):
 
         inserted_otu_ids = list()
 
-        for source_otu_id, version in manifest.items():
-            _, patched, _ = await virtool.history.db.patch_to_version(
-                self.app,
-                source_otu_id,
-                version
-            )
+        for otu_ids in virtool.utils.chunk_list(list(manifest), IMPORT_BATCH_SIZE):
+            otus = await get_manifest_otus(self.app, {otu_id: manifest[otu_id] for otu_id in otu_ids})
 
-            otu_id = await insert_joined_otu(
-                self.db,
-                patched,
+            inserted_otu_ids += await insert_joined_otus(
+                self.app,
+                otus,
                 created_at,
                 ref_id,
-                user_id
+                user_id,
+                "clone",
+                progress_handler=tracker.add
             )
 
-            inserted_otu_ids.append(otu_id)
-
-            await tracker.add(1)
-
         await self.update_context({
             "inserted_otu_ids": inserted_otu_ids
         })
 
-    async def create_history(self):
-        user_id = self.context["user_id"]
-        inserted_otu_ids = self.context["inserted_otu_ids"]
-
-        tracker = self.get_tracker(len(inserted_otu_ids))
-
-        for otu_id in inserted_otu_ids:
-            await insert_change(self.app, otu_id, "clone", user_id)
-            await tracker.add(1)
-
     async def cleanup(self):
         ref_id = self.context["ref_id"]
 
-        query = {"reference.id": ref_id}
-
-        diff_file_change_ids = await self.db.history.distinct("_id", {
-            **query,
-            "diff": "file"
-        })
-
         await asyncio.gather(
             self.db.references.delete_one({"_id": ref_id}),
-            self.db.history.delete_many(query),
-            self.db.otus.delete_many(query),
-            self.db.sequences.delete_many(query),
-            virtool.history.utils.remove_diff_files(self.app, diff_file_change_ids)
+            remove_otus_and_history(self.app, ref_id)
         )
 
 
@@ -124,26 +110,34 @@ class ImportReferenceProcess(virtool.processes.process.Process):
         super().__init__(app, process_id)
 
         self.steps = [
-            self.load_file,
-            self.set_metadata,
-            self.validate,
             self.import_otus,
-            self.create_history
+            self.set_metadata
         ]
 
         self.import_data = None
 
-    async def load_file(self):
+    async def import_otus(self):
         path = self.context["path"]
 
+        tracker = self.get_tracker(os.path.getsize(path))
+
         try:
-            self.import_data = await self.run_in_thread(virtool.references.utils.load_reference_file, path)
+            self.import_data, errors = await import_reference_file(
+                self.app,
+                path,
+                self.context["ref_id"],
+                self.context["created_at"],
+                self.context["user_id"],
+                "import",
+                strict=False,
+                progress_handler=tracker.add
+            )
         except json.decoder.JSONDecodeError as err:
             return await self.error([{
                 "id": "json_error",
-                "message": str(err).split("JSONDecodeError: ")[1]
+                "message": str(err)
             }])
-        except OSError as err:
+        except (EOFError, OSError) as err:
             if "Not a gzipped file" in str(err):
                 return await self.error([{
                     "id": "not_gzipped",
@@ -155,6 +149,9 @@ class ImportReferenceProcess(virtool.processes.process.Process):
                     "message": str(err)
                 }])
 
+        if errors:
+            return await self.error(errors)
+
     async def set_metadata(self):
         ref_id = self.context["ref_id"]
 
@@ -185,52 +182,6 @@ class ImportReferenceProcess(virtool.processes.process.Process):
             "$set": update_dict
         })
 
-    async def validate(self):
-        errors = virtool.references.utils.check_import_data(
-            self.import_data,
-            strict=False,
-            verify=True
-        )
-
-        if errors:
-            return await self.error(errors)
-
-    async def import_otus(self):
-        created_at = self.context["created_at"]
-        ref_id = self.context["ref_id"]
-        user_id = self.context["user_id"]
-
-        otus = self.import_data["otus"]
-
-        tracker = self.get_tracker(len(otus))
-
-        inserted_otu_ids = list()
-
-        for otu in otus:
-            otu_id = await insert_joined_otu(self.db, otu, created_at, ref_id, user_id)
-            inserted_otu_ids.append(otu_id)
-            await tracker.add(1)
-
-        await self.update_context({
-            "inserted_otu_ids": inserted_otu_ids
-        })
-
-    async def create_history(self):
-        inserted_otu_ids = self.context["inserted_otu_ids"]
-        user_id = self.context["user_id"]
-
-        tracker = self.get_tracker(len(inserted_otu_ids))
-
-        for otu_id in inserted_otu_ids:
-            await insert_change(
-                self.app,
-                otu_id,
-                "import",
-                user_id
-            )
-
-            await tracker.add(1)
-
 
 class RemoveReferenceProcess(virtool.processes.process.Process):
 
@@ -306,7 +257,6 @@ class UpdateRemoteReferenceProcess(virtool.processes.process.Process):
         self.steps = [
             self.download_and_extract,
             self.update_otus,
-            self.create_history,
             self.remove_otus,
             self.update_reference
         ]
@@ -349,49 +299,18 @@ class UpdateRemoteReferenceProcess(virtool.processes.process.Process):
         # The remote ids in the update otus.
         otu_ids_in_update = {otu["_id"] for otu in update_data["otus"]}
 
-        updated_list = list()
-
-        for otu in update_data["otus"]:
-            old_or_id = await update_joined_otu(
-                self.db,
-                otu,
+        for otus in virtool.utils.chunk_list(update_data["otus"], IMPORT_BATCH_SIZE):
+            await update_remote_otus(
+                self.app,
+                otus,
                 self.context["created_at"],
                 self.context["ref_id"],
                 self.context["user_id"]
             )
 
-            if old_or_id is not None:
-                updated_list.append(old_or_id)
+            await tracker.add(len(otus))
 
-            await tracker.add(1)
-
-        self.intermediate.update({
-            "otu_ids_in_update": otu_ids_in_update,
-            "updated_list": updated_list
-        })
-
-    async def create_history(self):
-        updated_list = self.intermediate["updated_list"]
-
-        tracker = self.get_tracker(len(updated_list))
-
-        for old_or_id in updated_list:
-            try:
-                otu_id = old_or_id["_id"]
-                old = old_or_id
-            except TypeError:
-                otu_id = old_or_id
-                old = None
-
-            await insert_change(
-                self.app,
-                otu_id,
-                "update" if old else "remote",
-                self.context["user_id"],
-                old
-            )
-
-            await tracker.add(1)
+        self.intermediate["otu_ids_in_update"] = otu_ids_in_update
 
     async def remove_otus(self):
         # Delete OTUs with remote ids that were not in the update.
@@ -447,16 +366,12 @@ async def processor(db, document: dict) -> dict:
     except KeyError:
         ref_id = document["id"]
 
-    latest_build, otu_count, unbuilt_count = await asyncio.gather(
-        virtool.references.db.get_latest_build(db, ref_id),
-        virtool.references.db.get_otu_count(db, ref_id),
-        virtool.references.db.get_unbuilt_count(db, ref_id)
-    )
+    stats = await get_stats(db, ref_id, document.pop("stats", None))
 
     document.update({
-        "latest_build": latest_build,
-        "otu_count": otu_count,
-        "unbuilt_change_count": unbuilt_count
+        "latest_build": stats["latest_build"],
+        "otu_count": stats["otu_count"],
+        "unbuilt_change_count": stats["unbuilt_change_count"]
     })
 
     try:
@@ -757,26 +672,28 @@ async def attach_computed(db, document: dict) -> dict:
     except (KeyError, TypeError):
         internal_control_id = None
 
-    contributors, internal_control, latest_build, otu_count, unbuilt_count = await asyncio.gather(
+    contributors, internal_control, stats = await asyncio.gather(
         get_contributors(db, ref_id),
         get_internal_control(db, internal_control_id, ref_id),
-        get_latest_build(db, ref_id),
-        get_otu_count(db, ref_id),
-        get_unbuilt_count(db, ref_id)
+        get_stats(db, ref_id, document.get("stats"))
     )
 
     users = await virtool.users.db.attach_identicons(db, document["users"])
 
-    return {
+    document = {
         **document,
         "contributors": contributors,
         "internal_control": internal_control or None,
-        "latest_build": latest_build,
-        "otu_count": otu_count,
-        "unbuilt_change_count": unbuilt_count,
+        "latest_build": stats["latest_build"],
+        "otu_count": stats["otu_count"],
+        "unbuilt_change_count": stats["unbuilt_change_count"],
         "users": users
     }
 
+    document.pop("stats", None)
+
+    return document
+
 
 async def get_contributors(db, ref_id: str) -> Union[None, List[dict]]:
     """
@@ -865,6 +782,32 @@ async def get_manifest(db, ref_id: str) -> dict:
     return manifest
 
 
+async def get_manifest_otus(app, manifest: dict) -> List[dict]:
+    """
+    Get the joined OTUs in `manifest` at the versions it specifies, in manifest order.
+
+    The OTUs and their sequences are read with one query per collection. Only OTUs that have been changed or removed
+    since the manifest was created are patched back to their manifest version using their history.
+
+    :param app: the application object
+    :param manifest: a manifest of OTU ids and versions
+    :return: the joined OTUs
+
+    """
+    otu_ids = list(manifest)
+
+    joined = {
+        otu["_id"]: otu for otu in await virtool.otus.db.join_many(app["db"], {"_id": {"$in": otu_ids}})
+        if otu["version"] == manifest[otu["_id"]]
+    }
+
+    for otu_id in otu_ids:
+        if otu_id not in joined:
+            _, joined[otu_id], _ = await virtool.history.db.patch_to_version(app, otu_id, manifest[otu_id])
+
+    return [joined[otu_id] for otu_id in otu_ids]
+
+
 async def get_otu_count(db, ref_id: str) -> int:
     """
     Get the number of OTUs associated with the given `ref_id`.
@@ -879,6 +822,59 @@ async def get_otu_count(db, ref_id: str) -> int:
     })
 
 
+async def get_stats(db, ref_id: str, stats: Union[dict, None] = None) -> dict:
+    """
+    Get the statistics for the reference identified by `ref_id`. These are stored in the `stats` field of the reference
+    document and are kept up to date as OTUs, history, and indexes change:
+
+    - `latest_build`: a subset of fields for the latest ready index build
+    - `otu_count`: the number of OTUs in the reference
+    - `unbuilt_change_count`: the number of history changes not included in an index build
+    - `modified_otu_count`: the number of OTUs with unbuilt changes
+
+    The statistics are computed from the OTUs, history, and indexes and stored if they are missing. This happens for
+    references created before statistics were stored and after :func:`.clear_stats` is called.
+
+    :param db: the application database client
+    :param ref_id: the id of the reference
+    :param stats: the `stats` field of a reference document that has already been fetched
+    :return: the reference statistics
+
+    """
+    if stats is None:
+        document = await db.references.find_one(ref_id, ["stats"])
+
+        if document:
+            stats = document.get("stats")
+
+    if stats is not None:
+        return stats
+
+    latest_build, otu_count, unbuilt_count, modified_otu_ids = await asyncio.gather(
+        get_latest_build(db, ref_id),
+        get_otu_count(db, ref_id),
+        get_unbuilt_count(db, ref_id),
+        db.history.distinct("otu.id", {"reference.id": ref_id, "index.id": "unbuilt"})
+    )
+
+    stats = {
+        "latest_build": latest_build,
+        "otu_count": otu_count,
+        "unbuilt_change_count": unbuilt_count,
+        "modified_otu_count": len(modified_otu_ids)
+    }
+
+    # Only store the statistics if they are still missing. Statistics stored or incremented while these were computed
+    # are more recent and must not be overwritten.
+    await db.references.update_one({"_id": ref_id, "stats": {"$exists": False}}, {
+        "$set": {
+            "stats": stats
+        }
+    }, silent=True)
+
+    return stats
+
+
 async def get_unbuilt_count(db, ref_id: str) -> int:
     """
     Return a count of unbuilt history changes associated with a given `ref_id`.
@@ -894,6 +890,22 @@ async def get_unbuilt_count(db, ref_id: str) -> int:
     })
 
 
+async def clear_stats(db, ref_id: str):
+    """
+    Remove the stored statistics for the reference identified by `ref_id`. They are computed again the next time they
+    are requested. Used after operations that change many OTUs or history changes at once.
+
+    :param db: the application database client
+    :param ref_id: the id of the reference
+
+    """
+    await db.references.update_one({"_id": ref_id}, {
+        "$unset": {
+            "stats": ""
+        }
+    }, silent=True)
+
+
 async def create_clone(db, settings: dict, name: str, clone_from: str, description: str, user_id: str) -> dict:
     source = await db.references.find_one(clone_from)
 
@@ -1039,26 +1051,6 @@ async def create_remote(db, settings: dict, release: dict, remote_from: str, use
     }
 
 
-async def download_and_parse_release(app, url: str, process_id: str, progress_handler: callable):
-    db = app["db"]
-
-    with virtool.utils.get_temp_dir() as tempdir:
-        temp_path = str(tempdir)
-
-        download_path = os.path.join(temp_path, "reference.tar.gz")
-
-        await virtool.http.utils.download_file(
-            app,
-            url,
-            download_path,
-            progress_handler
-        )
-
-        await virtool.processes.db.update(db, process_id, progress=0.3, step="unpack")
-
-        return await app["run_in_thread"](virtool.references.utils.load_reference_file, download_path)
-
-
 async def edit(db, ref_id: str, data: dict) -> dict:
     """
     Edit and existing reference using the passed update `data`.
@@ -1105,11 +1097,16 @@ async def edit(db, ref_id: str, data: dict) -> dict:
     return virtool.utils.base_processor(document)
 
 
-async def export(app, ref_id):
-    db = app["db"]
+async def iter_export(app, ref_id: str) -> AsyncIterator[List[dict]]:
+    """
+    Yield the indexed OTUs in the reference identified by `ref_id` as joined OTUs patched to their last indexed
+    versions. OTUs are read in batches of :const:`IMPORT_BATCH_SIZE` using :func:`get_manifest_otus`.
 
-    otu_list = list()
+    :param app: the application object
+    :param ref_id: the id of the reference to export
+    :return: batches of joined OTUs
 
+    """
     query = {
         "reference.id": ref_id,
         "last_indexed_version": {
@@ -1117,16 +1114,13 @@ async def export(app, ref_id):
         }
     }
 
-    async for document in db.otus.find(query):
-        _, joined, _ = await virtool.history.db.patch_to_version(
-            app,
-            document["_id"],
-            document["last_indexed_version"]
-        )
-
-        otu_list.append(joined)
+    manifest = {
+        document["_id"]: document["last_indexed_version"]
+        async for document in app["db"].otus.find(query, ["last_indexed_version"])
+    }
 
-    return virtool.references.utils.clean_export_list(otu_list)
+    for otu_ids in virtool.utils.chunk_list(list(manifest), IMPORT_BATCH_SIZE):
+        yield await get_manifest_otus(app, {otu_id: manifest[otu_id] for otu_id in otu_ids})
 
 
 async def finish_remote(app, release, ref_id: str, created_at: str, process_id: str, user_id: str):
@@ -1140,212 +1134,357 @@ async def finish_remote(app, release, ref_id: str, created_at: str, process_id:
         increment=0.02
     )
 
-    try:
-        import_data = await download_and_parse_release(
-            app,
-            release["download_url"],
+    with virtool.utils.get_temp_dir() as tempdir:
+        download_path = os.path.join(str(tempdir), "reference.tar.gz")
+
+        try:
+            await virtool.http.utils.download_file(
+                app,
+                release["download_url"],
+                download_path,
+                progress_tracker.add
+            )
+        except (aiohttp.ClientConnectorError, virtool.errors.GitHubError):
+            return await virtool.processes.db.update(
+                db,
+                process_id,
+                errors=["Could not download reference data"]
+            )
+
+        await virtool.processes.db.update(
+            db,
             process_id,
-            progress_tracker.add
+            progress=0.3,
+            step="import"
         )
-    except (aiohttp.ClientConnectorError, virtool.errors.GitHubError):
-        return await virtool.processes.db.update(
+
+        progress_tracker = virtool.processes.process.ProgressTracker(
             db,
             process_id,
-            errors=["Could not download reference data"]
+            os.path.getsize(download_path),
+            factor=0.7,
+            initial=0.3
         )
 
-    try:
-        data_type = import_data["data_type"]
-    except KeyError:
+        import_data, errors = await import_reference_file(
+            app,
+            download_path,
+            ref_id,
+            created_at,
+            user_id,
+            "remote",
+            remote=True,
+            progress_handler=progress_tracker.add
+        )
+
+    if "data_type" not in import_data:
         return await virtool.processes.db.update(
             db,
             process_id,
             errors=["Could not infer data type"]
         )
 
+    if errors:
+        return await virtool.processes.db.update(db, process_id, errors=errors)
+
     await db.references.update_one({"_id": ref_id}, {
         "$set": {
-            "data_type": data_type,
+            "data_type": import_data["data_type"],
             "organism": import_data.get("organism", "Unknown")
         }
     })
 
-    errors = virtool.references.utils.check_import_data(
-        import_data,
-        strict=True,
-        verify=True
-    )
+    await db.references.update_one({"_id": ref_id, "updates.id": release["id"]}, {
+        "$set": {
+            "installed": virtool.github.create_update_subdocument(release, True, user_id),
+            "updates.$.ready": True,
+            "updating": False
+        }
+    })
 
-    if errors:
-        return await virtool.processes.db.update(db, process_id, errors=errors)
+    await fetch_and_update_release(app, ref_id)
 
-    await virtool.processes.db.update(
-        db,
-        process_id,
-        progress=0.4,
-        step="import"
-    )
+    await virtool.processes.db.update(db, process_id, progress=1)
 
-    otus = import_data["otus"]
 
-    progress_tracker = virtool.processes.process.ProgressTracker(
-        db,
-        process_id,
-        len(otus),
-        factor=0.3,
-        initial=0.4
-    )
+async def import_reference_file(
+        app,
+        path: str,
+        ref_id: str,
+        created_at,
+        user_id: str,
+        verb: str,
+        remote: bool = False,
+        strict: bool = True,
+        progress_handler: Union[callable, None] = None
+) -> Tuple[dict, List[dict]]:
+    """
+    Stream the OTUs in the compressed reference file at `path` into the reference identified by `ref_id`.
 
-    inserted_otu_ids = list()
+    The file is decompressed and parsed in batches of :const:`IMPORT_BATCH_SIZE` OTUs in a thread. Each batch is
+    validated with :func:`~virtool.references.utils.check_otus` in the process pool and then written in order with
+    :func:`insert_joined_otus`. Parsing, validation of up to :const:`IMPORT_VALIDATION_BATCHES` batches, and writing
+    overlap, so only a few batches are held in memory at once.
 
-    for otu in otus:
-        otu_id = await insert_joined_otu(
-            db,
-            otu,
-            created_at,
-            ref_id,
-            user_id,
-            remote=True
-        )
-        inserted_otu_ids.append(otu_id)
-        await progress_tracker.add(1)
+    Nothing more is written once an invalid OTU is found, but the rest of the file is still checked so that all errors
+    can be reported. The file is checked for duplicates and an invalid schema once it has been read completely. If
+    errors are found, all of the OTUs, sequences, and history that were inserted are removed.
 
-    await virtool.processes.db.update(
-        db,
-        process_id,
-        progress=0.7,
-        step="create_history"
-    )
+    Errors encountered when decompressing or parsing the file are raised after the inserted documents are removed.
 
-    progress_tracker = virtool.processes.process.ProgressTracker(
+    :param app: the application object
+    :param path: the path to the compressed reference file
+    :param ref_id: the id of the reference to import the OTUs into
+    :param created_at: the creation timestamp for the OTUs
+    :param user_id: the id of the user importing the OTUs
+    :param verb: the change verb to record in history (eg. import, remote)
+    :param remote: the OTUs are being installed from a remote reference
+    :param strict: require the `data_type` and `organism` fields
+    :param progress_handler: an async function called with the number of compressed bytes read after each batch
+    :return: the top-level fields of the file other than `otus`, and any errors found in the file
+
+    """
+    run_in_process = app["run_in_process"]
+    run_in_thread = app["run_in_thread"]
+
+    metadata = dict()
+
+    # Summaries of the imported OTUs used to detect duplicates once the whole file has been read.
+    summaries = list()
+    found_otus = False
+
+    invalid_otus = list()
+
+    # Batches of OTUs being validated in the process pool, in the order they were read from the file.
+    pending = collections.deque()
+
+    read_position = 0
+    position = 0
+
+    with open(path, "rb") as handle:
+        fields = virtool.references.utils.iter_reference_file(handle, IMPORT_BATCH_SIZE)
+
+        next_field = asyncio.ensure_future(run_in_thread(next, fields, None))
+
+        try:
+            while True:
+                field = await next_field
+
+                if field is not None:
+                    # Parse the next batch while the current ones are validated and written.
+                    next_field = asyncio.ensure_future(run_in_thread(next, fields, None))
+
+                    key, value, position = field
+
+                    if key == "otus":
+                        found_otus = True
+
+                        pending.append((
+                            value,
+                            asyncio.ensure_future(run_in_process(virtool.references.utils.check_otus, value, strict)),
+                            position
+                        ))
+                    else:
+                        metadata[key] = value
+
+                # Write validated batches in order. Wait for the oldest batch if too many are in flight or if the
+                # whole file has been read.
+                while pending and (field is None or len(pending) >= IMPORT_VALIDATION_BATCHES or pending[0][1].done()):
+                    otus, checked, batch_position = pending.popleft()
+
+                    batch_summaries, issues, invalid = await checked
+
+                    summaries += batch_summaries
+                    invalid_otus += invalid
+
+                    if not invalid_otus:
+                        await insert_joined_otus(
+                            app,
+                            otus,
+                            created_at,
+                            ref_id,
+                            user_id,
+                            verb,
+                            remote=remote,
+                            issues=issues
+                        )
+
+                    if progress_handler:
+                        await progress_handler(batch_position - read_position)
+                        read_position = batch_position
+
+                if field is None:
+                    break
+
+        except Exception:
+            unfinished = [future for future in [next_field] + [p[1] for p in pending] if not future.done()]
+
+            if unfinished:
+                await asyncio.wait(unfinished)
+
+            await remove_otus_and_history(app, ref_id)
+
+            raise
+
+    if progress_handler and position > read_position:
+        await progress_handler(position - read_position)
+
+    import_data = {**metadata, "otus": summaries} if found_otus else metadata
+
+    errors = virtool.references.utils.detect_duplicates(summaries)
+    errors += virtool.references.utils.check_import_schema(import_data, strict)
+
+    if invalid_otus:
+        errors.append(virtool.references.utils.compose_invalid_otus_error(invalid_otus))
+
+    if errors:
+        await remove_otus_and_history(app, ref_id)
+
+    return metadata, errors
+
+
+async def increment_stats(
         db,
-        process_id,
-        len(otus),
-        factor=0.3,
-        initial=0.7
-    )
+        ref_id: str,
+        otu_count: int = 0,
+        unbuilt_change_count: int = 0,
+        modified_otu_count: Union[int, None] = None
+):
+    """
+    Increment the stored statistics for the reference identified by `ref_id`. Nothing is changed if the statistics are
+    not stored. They will be computed from scratch when they are next requested.
 
-    for otu_id in inserted_otu_ids:
-        await insert_change(
-            app,
-            otu_id,
-            "remote",
-            user_id
-        )
+    The number of modified OTUs can't be safely incremented because concurrent changes to the same OTU would each count
+    it as newly modified. Pass a recomputed value instead. It is stored as is.
 
-        await progress_tracker.add(1)
+    :param db: the application database client
+    :param ref_id: the id of the reference
+    :param otu_count: the change in the OTU count
+    :param unbuilt_change_count: the change in the unbuilt change count
+    :param modified_otu_count: the recomputed number of OTUs with unbuilt changes, left unchanged if `None`
 
-    await db.references.update_one({"_id": ref_id, "updates.id": release["id"]}, {
-        "$set": {
-            "installed": virtool.github.create_update_subdocument(release, True, user_id),
-            "updates.$.ready": True,
-            "updating": False
+    """
+    update = {
+        "$inc": {
+            "stats.otu_count": otu_count,
+            "stats.unbuilt_change_count": unbuilt_change_count
         }
-    })
+    }
 
-    await fetch_and_update_release(app, ref_id)
+    if modified_otu_count is not None:
+        update["$set"] = {
+            "stats.modified_otu_count": modified_otu_count
+        }
 
-    await virtool.processes.db.update(db, process_id, progress=1)
+    await db.references.update_one({"_id": ref_id, "stats": {"$exists": True}}, update, silent=True)
 
 
-async def insert_change(app, otu_id: str, verb: str, user_id: str, old: Union[None, dict] = None):
+async def insert_joined_otus(
+        app,
+        otus: List[dict],
+        created_at,
+        ref_id: str,
+        user_id: str,
+        verb: str,
+        remote: bool = False,
+        progress_handler: Union[callable, None] = None,
+        issues: Union[List[Union[dict, None]], None] = None
+) -> List[str]:
     """
-    Insert a history document for the OTU identified by `otu_id` and the passed `verb`.
+    Insert many joined OTUs from import data into a reference and create a history change for each one.
+
+    OTUs are handled in batches of :const:`IMPORT_BATCH_SIZE`. The OTU, sequence, and change documents for each batch
+    are composed in memory and written with one :meth:`~virtool.db.core.Collection.insert_many` call per collection.
 
     :param app: the application object
-    :param otu_id: the ID of the OTU the change is for
-    :param verb: the change verb (eg. remove, insert)
-    :param user_id: the ID of the requesting user
-    :param old: the old joined OTU document
+    :param otus: the joined OTUs to insert
+    :param created_at: the creation timestamp for the OTUs
+    :param ref_id: the id of the reference to insert the OTUs into
+    :param user_id: the id of the user inserting the OTUs
+    :param verb: the change verb to record in history (eg. import, remote)
+    :param remote: the OTUs are being installed from a remote reference
+    :param progress_handler: an async function called with the number of OTUs inserted after each batch
+    :param issues: verification issues for each of the `otus` found by :func:`~virtool.references.utils.check_otus`
+    :return: the ids of the inserted OTUs
 
     """
     db = app["db"]
 
-    # Join the otu document into a complete otu record. This will be used for recording history.
-    joined = await virtool.otus.db.join(db, otu_id)
+    inserted_otu_ids = list()
 
-    name = joined["name"]
+    if issues is None:
+        issues = [False] * len(otus)
 
-    e = "" if verb[-1] == "e" else "e"
+    for offset, batch in enumerate(virtool.utils.chunk_list(otus, IMPORT_BATCH_SIZE)):
+        batch_issues = issues[offset * IMPORT_BATCH_SIZE:(offset + 1) * IMPORT_BATCH_SIZE]
 
-    # Build a ``description`` field for the otu creation change document.
-    description = f"{verb.capitalize()}{e}d {name}"
+        prepared = [
+            virtool.references.utils.prepare_otu(otu, created_at, ref_id, user_id, remote=remote, issues=otu_issues)
+            for otu, otu_issues in zip(batch, batch_issues)
+        ]
 
-    abbreviation = joined.get("abbreviation")
+        # Inserting assigns ids to the OTU documents in place.
+        await db.otus.insert_many([otu for otu, _ in prepared], silent=True)
 
-    # Add the abbreviation to the description if there is one.
-    if abbreviation:
-        description = f"{description} ({abbreviation})"
+        all_sequences = list()
 
-    await virtool.history.db.add(
-        app,
-        verb,
-        old,
-        joined,
-        description,
-        user_id,
-        silent=True
-    )
+        for otu, sequences in prepared:
+            for sequence in sequences:
+                sequence["otu_id"] = otu["_id"]
 
+            all_sequences += sequences
 
-async def insert_joined_otu(db, otu, created_at, ref_id, user_id, remote=False):
-    all_sequences = list()
+        await db.sequences.insert_many(all_sequences, silent=True)
 
-    issues = virtool.otus.utils.verify(otu)
+        changes = list()
 
-    otu.update({
-        "created_at": created_at,
-        "lower_name": otu["name"].lower(),
-        "last_indexed_version": None,
-        "issues": issues,
-        "verified": issues is None,
-        "imported": True,
-        "version": 0,
-        "reference": {
-            "id": ref_id
-        },
-        "user": {
-            "id": user_id
-        }
-    })
+        for otu, sequences in prepared:
+            joined = virtool.otus.utils.merge_otu(otu, sequences)
 
-    if "schema" not in otu:
-        otu["schema"] = list()
+            changes.append(virtool.history.db.compose_change(
+                verb,
+                None,
+                joined,
+                virtool.history.utils.compose_insert_description(verb, joined),
+                user_id
+            ))
 
-    remote_id = otu.pop("_id")
+        await virtool.history.db.add_many(app, changes, silent=True)
 
-    if remote:
-        otu["remote"] = {
-            "id": remote_id
-        }
+        inserted_otu_ids += [otu["_id"] for otu, _ in prepared]
 
-    for isolate in otu["isolates"]:
-        for sequence in isolate.pop("sequences"):
-            try:
-                remote_sequence_id = sequence["remote"]["id"]
-                sequence.pop("_id")
-            except KeyError:
-                remote_sequence_id = sequence.pop("_id")
-
-            all_sequences.append({
-                **sequence,
-                "accession": sequence["accession"],
-                "isolate_id": isolate["id"],
-                "segment": sequence.get("segment", ""),
-                "reference": {
-                    "id": ref_id
-                },
-                "remote": {
-                    "id": remote_sequence_id
-                }
-            })
+        if progress_handler:
+            await progress_handler(len(batch))
 
-    document = await db.otus.insert_one(otu, silent=True)
+    return inserted_otu_ids
 
-    for sequence in all_sequences:
-        await db.sequences.insert_one(dict(sequence, otu_id=document["_id"]), silent=True)
 
-    return document["_id"]
+async def remove_otus_and_history(app, ref_id: str):
+    """
+    Remove all OTUs, sequences, and history associated with the reference identified by `ref_id`. Used to clean up
+    after failed imports and clones.
+
+    :param app: the application object
+    :param ref_id: the id of the reference
+
+    """
+    db = app["db"]
+
+    query = {"reference.id": ref_id}
+
+    diff_file_change_ids = await db.history.distinct("_id", {
+        **query,
+        "diff": "file"
+    })
+
+    await asyncio.gather(
+        db.history.delete_many(query, silent=True),
+        db.otus.delete_many(query, silent=True),
+        db.sequences.delete_many(query, silent=True),
+        virtool.history.utils.remove_diff_files(app, diff_file_change_ids)
+    )
+
+    await clear_stats(db, ref_id)
 
 
 async def refresh_remotes(app):
@@ -1398,20 +1537,87 @@ async def update(req, created_at, process_id, ref_id, release, user_id):
     return release, update_subdocument
 
 
-async def update_joined_otu(db, otu, created_at, ref_id, user_id):
-    remote_id = otu["_id"]
+async def update_remote_otus(app, otus: List[dict], created_at, ref_id: str, user_id: str) -> List[str]:
+    """
+    Apply OTUs from a remote reference release to the reference identified by `ref_id`.
+
+    The content hashes of `otus` are compared to the hashes stored on the existing OTUs using a single query. OTUs that
+    have not changed since they were last synced, and have not been edited locally since, are skipped. Changed OTUs
+    are updated with one :meth:`bulk_write` per collection and new OTUs are inserted with :func:`insert_joined_otus`.
+    History is recorded for every inserted or updated OTU.
+
+    Existing OTUs without a stored hash are compared using :func:`~virtool.references.utils.check_will_change`. They
+    are given a hash if they have not changed.
 
-    old = await virtool.otus.db.join(db, {"reference.id": ref_id, "remote.id": remote_id})
+    :param app: the application object
+    :param otus: joined OTUs in export format from the release
+    :param created_at: the creation timestamp for new OTUs
+    :param ref_id: the id of the reference to update
+    :param user_id: the id of the user updating the reference
+    :return: the ids of the inserted and updated OTUs
+
+    """
+    db = app["db"]
+
+    hashes = await app["run_in_process"](virtool.references.utils.compute_otu_hashes, otus)
+
+    existing = dict()
+
+    async for document in db.otus.find({"reference.id": ref_id, "remote.id": {"$in": [otu["_id"] for otu in otus]}}):
+        existing[document["remote"]["id"]] = document
+
+    new = list()
+    candidates = list()
+
+    for otu, otu_hash in zip(otus, hashes):
+        document = existing.get(otu["_id"])
+
+        if document is None:
+            new.append(dict(otu, hash=otu_hash))
+            continue
+
+        remote = document["remote"]
+
+        if remote.get("hash") != otu_hash or remote.get("last_synced_version") != document["version"]:
+            candidates.append((otu, otu_hash))
+
+    inserted_otu_ids = await insert_joined_otus(app, new, created_at, ref_id, user_id, "remote", remote=True)
+
+    if not candidates:
+        return inserted_otu_ids
+
+    old_otus = {
+        otu["remote"]["id"]: otu for otu in await virtool.otus.db.join_many(db, {
+            "reference.id": ref_id,
+            "remote.id": {"$in": [otu["_id"] for otu, _ in candidates]}
+        })
+    }
+
+    otu_updates = list()
+    sequences = list()
+    changed = list()
+
+    for otu, otu_hash in candidates:
+        old = old_otus[otu["_id"]]
 
-    if old:
         if not virtool.references.utils.check_will_change(old, otu):
-            return None
+            # Store the hash so the OTU can be skipped without being joined next time.
+            otu_updates.append(pymongo.UpdateOne({"_id": old["_id"]}, {
+                "$set": {
+                    "remote.hash": otu_hash,
+                    "remote.last_synced_version": old["version"]
+                }
+            }))
+
+            continue
 
-        sequence_updates = list()
+        isolates = list()
 
         for isolate in otu["isolates"]:
-            for sequence in isolate.pop("sequences"):
-                sequence_updates.append({
+            isolates.append({key: value for key, value in isolate.items() if key != "sequences"})
+
+            for sequence in isolate["sequences"]:
+                sequences.append({
                     "accession": sequence["accession"],
                     "definition": sequence["definition"],
                     "host": sequence["host"],
@@ -1427,7 +1633,7 @@ async def update_joined_otu(db, otu, created_at, ref_id, user_id):
                     }
                 })
 
-        await db.otus.update_one({"_id": old["_id"]}, {
+        otu_updates.append(pymongo.UpdateOne({"_id": old["_id"]}, {
             "$inc": {
                 "version": 1
             },
@@ -1435,28 +1641,58 @@ async def update_joined_otu(db, otu, created_at, ref_id, user_id):
                 "abbreviation": otu["abbreviation"],
                 "name": otu["name"],
                 "lower_name": otu["name"].lower(),
-                "isolates": otu["isolates"],
-                "schema": otu.get("schema", list())
+                "isolates": isolates,
+                "schema": otu.get("schema", list()),
+                "remote.hash": otu_hash,
+                "remote.last_synced_version": old["version"] + 1
             }
-        })
+        }))
 
-        for sequence_update in sequence_updates:
-            remote_sequence_id = sequence_update["remote"]["id"]
+        changed.append(old)
 
-            update_result = await db.sequences.update_one({"reference.id": ref_id, "remote.id": remote_sequence_id}, {
-                "$set": sequence_update
-            })
+    await db.otus.bulk_write(otu_updates, ordered=False)
 
-            if not update_result.matched_count:
-                await db.sequences.insert_one(sequence_update)
+    if not changed:
+        return inserted_otu_ids
 
-        return old
+    # The bulk write bypasses the dispatching collection methods, so dispatch each changed OTU like update_one would.
+    async for document in db.otus.find({"_id": {"$in": [old["_id"] for old in changed]}}, db.otus.projection):
+        await db.dispatch("otus", "update", await db.otus.apply_processor(document))
 
-    return await insert_joined_otu(
-        db,
-        otu,
-        created_at,
-        ref_id,
-        user_id,
-        remote=True
-    )
+    existing_sequence_ids = set(await db.sequences.distinct("remote.id", {
+        "reference.id": ref_id,
+        "remote.id": {"$in": [sequence["remote"]["id"] for sequence in sequences]}
+    }))
+
+    sequence_updates = [
+        pymongo.UpdateOne({"reference.id": ref_id, "remote.id": sequence["remote"]["id"]}, {"$set": sequence})
+        for sequence in sequences if sequence["remote"]["id"] in existing_sequence_ids
+    ]
+
+    if sequence_updates:
+        await db.sequences.bulk_write(sequence_updates, ordered=False)
+
+    new_sequences = [s for s in sequences if s["remote"]["id"] not in existing_sequence_ids]
+
+    if new_sequences:
+        await db.sequences.insert_many(new_sequences, silent=True)
+
+    updated = await virtool.otus.db.join_many(db, {"_id": {"$in": [old["_id"] for old in changed]}})
+    updated = {otu["_id"]: otu for otu in updated}
+
+    changes = list()
+
+    for old in changed:
+        joined = updated[old["_id"]]
+
+        changes.append(virtool.history.db.compose_change(
+            "update",
+            old,
+            joined,
+            virtool.history.utils.compose_insert_description("update", joined),
+            user_id
+        ))
+
+    await virtool.history.db.add_many(app, changes, silent=True)
+
+    return inserted_otu_ids + [old["_id"] for old in changed]
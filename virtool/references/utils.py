@@ -1,9 +1,13 @@
 import gzip
+import hashlib
 import json
+import os
+from typing import Any, BinaryIO, Iterator, List, Tuple, Union
 
 from cerberus import Validator
 from operator import itemgetter
 
+import virtool.api.json
 import virtool.otus.utils
 
 ISOLATE_KEYS = [
@@ -33,42 +37,284 @@ SEQUENCE_KEYS = [
     "sequence"
 ]
 
+#: The number of characters to read from a decompressed reference file at once when streaming it.
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def check_import_data(import_data, strict=True, verify=True):
-    errors = detect_duplicates(import_data["otus"])
+JSON_WHITESPACE = " \t\n\r"
 
+
+class ExportWriter:
+    """
+    Builds a gzip-compressed reference export one batch of OTUs at a time. The compressed data is returned for
+    streaming and is also written to the file at `path` if one is given.
+
+    Each part of the export is encoded and compressed as a separate gzip member using `run_in_compression`.
+    Concatenated gzip members are a valid gzip file, so the parts don't share compressor state and can be compressed in
+    another process. Files are written using `run_in_thread`.
+
+    :param path: the path of a file to write the compressed export to
+    :param run_in_compression: a coroutine function that runs a function and its arguments in the compression pool
+    :param run_in_thread: a coroutine function that runs a function and its arguments in a thread
+
+    """
+
+    def __init__(self, path: Union[str, None], run_in_compression, run_in_thread):
+        self._path = path
+        self._run_in_compression = run_in_compression
+        self._run_in_thread = run_in_thread
+        self._handle = None
+        self._otu_count = 0
+
+    async def _write(self, data: bytes) -> bytes:
+        if self._path:
+            if self._handle is None:
+                self._handle = await self._run_in_thread(open, self._path, "wb")
+
+            await self._run_in_thread(self._handle.write, data)
+
+        return data
+
+    async def write_start(self, metadata: dict) -> bytes:
+        """
+        Start the export document with the passed metadata fields (eg. `data_type`).
+
+        :param metadata: the top-level fields of the export
+        :return: compressed data
+
+        """
+        return await self._write(await self._run_in_compression(compress_export_start, metadata))
+
+    async def write_otus(self, otus: List[dict]) -> bytes:
+        """
+        Clean the passed joined OTUs with :func:`clean_export_list` and add them to the export.
+
+        :param otus: joined OTUs
+        :return: compressed data
+
+        """
+        if not otus:
+            return b""
+
+        data = await self._run_in_compression(compress_export_otus, otus, not self._otu_count)
+
+        self._otu_count += len(otus)
+
+        return await self._write(data)
+
+    async def write_end(self) -> bytes:
+        """
+        End the export document.
+
+        :return: compressed data
+
+        """
+        return await self._write(await self._run_in_compression(compress_export_end))
+
+    async def close(self):
+        if self._handle:
+            await self._run_in_thread(self._handle.close)
+
+
+def compress_export_start(metadata: dict) -> bytes:
+    """
+    Start an export document with the passed metadata fields and compress it as a single gzip member.
+
+    :param metadata: the top-level fields of the export
+    :return: compressed data
+
+    """
+    encoded = json.dumps(metadata, cls=virtool.api.json.CustomEncoder)
+
+    return gzip.compress((encoded[:-1] + (", " if metadata else "") + '"otus": [').encode())
+
+
+def compress_export_otus(otus: List[dict], first: bool) -> bytes:
+    """
+    Clean the passed joined OTUs with :func:`clean_export_list`, encode them, and compress them as a single gzip member.
+
+    :param otus: joined OTUs
+    :param first: the OTUs are the first in the export, so no separating comma is needed
+    :return: compressed data
+
+    """
+    encoded = ", ".join(json.dumps(otu, cls=virtool.api.json.CustomEncoder) for otu in clean_export_list(otus))
+
+    if not first:
+        encoded = ", " + encoded
+
+    return gzip.compress(encoded.encode())
+
+
+def compress_export_end() -> bytes:
+    """
+    End an export document and compress it as a single gzip member.
+
+    :return: compressed data
+
+    """
+    return gzip.compress(b"]}")
+
+
+class JSONStream:
+    """
+    Decodes consecutive JSON values from a text stream without reading the whole stream into memory.
+
+    Values are decoded with :meth:`json.JSONDecoder.raw_decode` from a buffer that grows until it contains a complete
+    value. Consumed text is dropped from the buffer when more text is read.
+
+    :param handle: a text file-like object
+    :param chunk_size: the number of characters to read at once
+
+    """
+
+    def __init__(self, handle, chunk_size: int = STREAM_CHUNK_SIZE):
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+
+    def _read(self, size: int) -> bool:
+        if self._exhausted:
+            return False
+
+        chunk = self._handle.read(size)
+
+        if not chunk:
+            self._exhausted = True
+            return False
+
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        """
+        Create a :class:`json.JSONDecodeError` for the current position in the stream.
+
+        :param message: the error message
+        :return: the error
+
+        """
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it. Returns an empty string at the end of the
+        stream.
+
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in JSON_WHITESPACE:
+                self._position += 1
+
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            if not self._read(self._chunk_size):
+                return ""
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next non-whitespace character, which must be one of `characters`.
+
+        :param characters: the allowed characters
+        :return: the consumed character
+
+        """
+        character = self.peek()
+
+        if not character or character not in characters:
+            raise self.error(f"Expecting one of '{characters}'")
+
+        self._position += 1
+
+        return character
+
+    def decode(self) -> Any:
+        """
+        Decode and consume the next complete JSON value.
+
+        :return: the decoded value
+
+        """
+        self.peek()
+
+        size = self._chunk_size
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self._buffer) or self._exhausted:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._exhausted:
+                    raise
+
+            # Grow reads geometrically so values much larger than a chunk aren't re-parsed too many times.
+            if not self._read(size):
+                continue
+
+            size = max(size, len(self._buffer))
+
+
+def check_import_schema(import_data: dict, strict: bool = True) -> List[dict]:
+    """
+    Validate the top-level fields of reference import data.
+
+    :param import_data: the import data
+    :param strict: require the `data_type` and `organism` fields
+    :return: a list containing a `file` error if the data is invalid
+
+    """
     v = Validator(get_import_schema(require_meta=strict), allow_unknown=True)
 
-    v.validate(import_data)
+    if v.validate(import_data):
+        return []
 
-    if v.errors:
-        errors.append({
-            "id": "file",
-            "issues": v.errors
-        })
+    return [{
+        "id": "file",
+        "issues": v.errors
+    }]
 
-    otus = dict()
 
-    for otu in import_data["otus"]:
-        verification = None
+def check_otus(otus: List[dict], strict: bool = True) -> Tuple[List[dict], List[Union[dict, None]], List[dict]]:
+    """
+    Validate and verify a batch of imported OTUs. This is CPU-bound and is run in a process pool during imports.
 
-        if verify:
-            verification = virtool.otus.utils.verify(otu)
+    OTUs that fail validation are not verified or summarized.
 
-        validation = validate_otu(otu, strict)
+    :param otus: joined OTUs from import data
+    :param strict: require OTU, isolate, and sequence ids
+    :return: summaries of the valid OTUs, verification issues for each OTU, and reports for the invalid OTUs
 
-        issues = dict()
+    """
+    summaries = list()
+    issues = list()
+    invalid = list()
 
-        if verification:
-            issues["verification"] = verification
+    for otu in otus:
+        validation = validate_otu(otu, strict)
 
         if validation:
-            issues["validation"] = validation
+            invalid.append({
+                "_id": otu.get("_id"),
+                "name": otu.get("name"),
+                "issues": validation
+            })
 
-        if issues:
-            otus[otu["_id"]] = issues
+            issues.append(None)
+            continue
 
-    return errors
+        summaries.append(summarize_otu(otu))
+        issues.append(virtool.otus.utils.verify(otu))
+
+    return summaries, issues, invalid
 
 
 def check_will_change(old, imported):
@@ -129,7 +375,10 @@ def clean_export_list(otus):
                 except KeyError:
                     pass
 
-        cleaned.append(clean_otu(otu, otu_keys, sequence_keys))
+        cleaned_otu = clean_otu(otu, otu_keys, sequence_keys)
+        cleaned_otu["hash"] = compute_otu_hash(cleaned_otu)
+
+        cleaned.append(cleaned_otu)
 
     return cleaned
 
@@ -165,6 +414,54 @@ def clean_otu(otu, otu_keys=None, sequence_keys=None):
     return cleaned
 
 
+def compose_invalid_otus_error(invalid: List[dict]) -> dict:
+    """
+    Compose an import error listing the OTUs that failed validation in :func:`check_otus`.
+
+    :param invalid: reports for the invalid OTUs
+    :return: the error
+
+    """
+    return {
+        "id": "invalid_otus",
+        "message": "Invalid OTUs found",
+        "otus": invalid
+    }
+
+
+def compute_otu_hash(otu: dict) -> str:
+    """
+    Compute a hash of the content of an OTU in export format. The hash covers the fields compared by
+    :func:`check_will_change` and does not depend on the order of isolates or sequences.
+
+    :param otu: a joined OTU in export format
+    :return: the hex digest of the hash
+
+    """
+    cleaned = clean_otu(otu, OTU_KEYS, SEQUENCE_KEYS + ["_id"])
+
+    for isolate in cleaned["isolates"]:
+        isolate["sequences"].sort(key=itemgetter("_id"))
+
+    cleaned["isolates"].sort(key=itemgetter("id"))
+
+    encoded = json.dumps(cleaned, sort_keys=True, separators=(",", ":")).encode()
+
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def compute_otu_hashes(otus: List[dict]) -> List[str]:
+    """
+    Get the content hash for each of the passed OTUs in export format. Hashes included in the OTUs by
+    :func:`clean_export_list` are used instead of being recomputed.
+
+    :param otus: joined OTUs in export format
+    :return: the hashes in the same order as `otus`
+
+    """
+    return [otu.get("hash") or compute_otu_hash(otu) for otu in otus]
+
+
 def detect_duplicate_abbreviation(joined, duplicates, seen):
     abbreviation = joined.get("abbreviation", "")
 
@@ -398,6 +695,117 @@ def get_sequence_schema(require_id):
     }
 
 
+def join_export_path(settings: dict, ref_id: str, index_id: str, metadata: dict) -> str:
+    """
+    Get the path of the cached export of a reference. Exports are stored in the directory of the index they were
+    generated for so that they are removed along with the index files. The name includes a digest of the export
+    metadata so that the cache is not used after the metadata is edited.
+
+    :param settings: the application settings
+    :param ref_id: the id of the reference
+    :param index_id: the id of the latest ready index for the reference
+    :param metadata: the top-level fields of the export
+    :return: the path
+
+    """
+    digest = hashlib.sha256(json.dumps(metadata, sort_keys=True).encode()).hexdigest()[:12]
+
+    return os.path.join(settings["data_path"], "references", ref_id, index_id, f"reference.{digest}.json.gz")
+
+
+def iter_json_object(
+        handle,
+        stream_key: str,
+        batch_size: int,
+        chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate through the members of the JSON object in the text stream `handle`. Yields `(key, value)` tuples.
+
+    The array under `stream_key` is not decoded at once. Instead, its items are yielded in lists of up to
+    `batch_size` items, each as `(stream_key, items)`.
+
+    :param handle: a text file-like object containing a JSON object
+    :param stream_key: the key of the array to stream
+    :param batch_size: the maximum number of array items to yield at once
+    :param chunk_size: the number of characters to read from `handle` at once
+    :return: the members of the object
+
+    """
+    stream = JSONStream(handle, chunk_size)
+
+    stream.expect("{")
+
+    if stream.peek() == "}":
+        stream.expect("}")
+    else:
+        yield from iter_json_members(stream, stream_key, batch_size)
+
+    if stream.peek():
+        raise stream.error("Extra data")
+
+
+def iter_json_members(stream: JSONStream, stream_key: str, batch_size: int) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate through the members of a JSON object that has already been opened in `stream`. See
+    :func:`iter_json_object`.
+
+    """
+    while True:
+        key = stream.decode()
+
+        if not isinstance(key, str):
+            raise stream.error("Expecting property name")
+
+        stream.expect(":")
+
+        if key == stream_key:
+            stream.expect("[")
+
+            batch = list()
+            yielded = False
+
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    batch.append(stream.decode())
+
+                    if len(batch) == batch_size:
+                        yield key, batch
+                        batch = list()
+                        yielded = True
+
+                    if stream.expect(",]") == "]":
+                        break
+
+            # An empty array is yielded once so that callers know the key was present.
+            if batch or not yielded:
+                yield key, batch
+        else:
+            yield key, stream.decode()
+
+        if stream.expect(",}") == "}":
+            return
+
+
+def iter_reference_file(handle: BinaryIO, batch_size: int) -> Iterator[Tuple[str, Any, int]]:
+    """
+    Iterate through an open, gzip-compressed reference file without loading it into memory.
+
+    Yields `(key, value, position)` for each top-level field, where `position` is the number of compressed bytes read
+    so far. OTUs are yielded in lists of at most `batch_size` OTUs as `("otus", otus, position)`.
+
+    :param handle: the compressed reference file opened in binary mode
+    :param batch_size: the maximum number of OTUs to yield at once
+    :return: the fields of the reference file
+
+    """
+    with gzip.open(handle, "rt") as gzip_file:
+        for key, value in iter_json_object(gzip_file, "otus", batch_size):
+            yield key, value, handle.tell()
+
+
 def load_reference_file(path):
     """
     Load a list of merged otus documents from a file associated with a Virtool reference file.
@@ -414,6 +822,110 @@ def load_reference_file(path):
             return json.load(gzip_file)
 
 
+def prepare_otu(
+        otu: dict,
+        created_at,
+        ref_id: str,
+        user_id: str,
+        remote: bool = False,
+        issues: Union[dict, None, bool] = False
+) -> Tuple[dict, List[dict]]:
+    """
+    Prepare an imported OTU for insertion into a reference. Returns the OTU document and its sequence documents. The
+    sequence documents do not have `otu_id` fields because the OTU has not been assigned an id yet.
+
+    The passed `otu` is modified in place and its isolates lose their `sequences` fields.
+
+    :param otu: a joined OTU from import data
+    :param created_at: the creation timestamp for the OTU
+    :param ref_id: the id of the reference the OTU is being inserted into
+    :param user_id: the id of the user inserting the OTU
+    :param remote: the OTU is being installed from a remote reference
+    :param issues: verification issues for the OTU if they have already been found by :func:`check_otus`
+    :return: the OTU document and its sequence documents
+
+    """
+    if issues is False:
+        issues = virtool.otus.utils.verify(otu)
+
+    otu_hash = otu.pop("hash", None)
+
+    if remote and otu_hash is None:
+        otu_hash = compute_otu_hash(otu)
+
+    otu.update({
+        "created_at": created_at,
+        "lower_name": otu["name"].lower(),
+        "last_indexed_version": None,
+        "issues": issues,
+        "verified": issues is None,
+        "imported": True,
+        "version": 0,
+        "reference": {
+            "id": ref_id
+        },
+        "user": {
+            "id": user_id
+        }
+    })
+
+    if "schema" not in otu:
+        otu["schema"] = list()
+
+    remote_id = otu.pop("_id")
+
+    if remote:
+        otu["remote"] = {
+            "id": remote_id,
+            "hash": otu_hash,
+            "last_synced_version": 0
+        }
+
+    sequences = list()
+
+    for isolate in otu["isolates"]:
+        for sequence in isolate.pop("sequences"):
+            try:
+                remote_sequence_id = sequence["remote"]["id"]
+                sequence.pop("_id")
+            except KeyError:
+                remote_sequence_id = sequence.pop("_id")
+
+            sequences.append({
+                **sequence,
+                "accession": sequence["accession"],
+                "isolate_id": isolate["id"],
+                "segment": sequence.get("segment", ""),
+                "reference": {
+                    "id": ref_id
+                },
+                "remote": {
+                    "id": remote_sequence_id
+                }
+            })
+
+    return otu, sequences
+
+
+def summarize_otu(otu: dict) -> dict:
+    """
+    Get a copy of an imported OTU containing only the fields needed to detect duplicates with
+    :func:`detect_duplicates`. Summaries are kept in place of whole OTUs when streaming reference files.
+
+    :param otu: a joined OTU from import data
+    :return: the OTU summary
+
+    """
+    summary = {key: otu[key] for key in ("_id", "name", "abbreviation") if key in otu}
+
+    summary["isolates"] = [{
+        "id": isolate["id"],
+        "sequences": [{"_id": sequence["_id"]} for sequence in isolate.get("sequences", [])]
+    } for isolate in otu["isolates"]]
+
+    return summary
+
+
 def validate_otu(otu, strict):
     report = {
         "otu": None,
@@ -434,12 +946,12 @@ def validate_otu(otu, strict):
 
         for isolate in otu["isolates"]:
             if not isolate_validator.validate(isolate):
-                report["isolates"][isolate["id"]] = isolate_validator.errors
+                report["isolates"][isolate.get("id")] = isolate_validator.errors
 
             if "sequences" in isolate:
                 for sequence in isolate["sequences"]:
                     if not sequence_validator.validate(sequence):
-                        report["sequences"][sequence["_id"]] = isolate_validator.errors
+                        report["sequences"][sequence.get("_id")] = sequence_validator.errors
 
     if any(value for value in report.values()):
         return report
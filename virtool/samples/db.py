@@ -4,6 +4,7 @@ import aiohttp.web
 import asyncio
 import logging
 import os
+import pymongo
 import pymongo.results
 
 import virtool.jobs.db
@@ -58,6 +59,10 @@ RIGHTS_PROJECTION = {
     "user": True
 }
 
+INDEXES = [
+    pymongo.IndexModel([("created_at", pymongo.DESCENDING)])
+]
+
 
 async def attempt_file_replacement(app, sample_id, user_id):
     db = app["db"]
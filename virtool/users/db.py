@@ -1,5 +1,7 @@
 from typing import Union
 
+import pymongo
+
 import virtool.groups.db
 import virtool.db.utils
 import virtool.errors
@@ -17,6 +19,16 @@ PROJECTION = [
     "primary_group"
 ]
 
+API_KEY_INDEXES = [
+    pymongo.IndexModel("id", unique=True),
+    pymongo.IndexModel("user.id")
+]
+
+SESSION_INDEXES = [
+    # Expire sessions automatically at the time stored in `expiresAt`.
+    pymongo.IndexModel("expiresAt", expireAfterSeconds=0)
+]
+
 
 async def attach_identicons(db, users: Union[dict, list]):
     """
@@ -9,7 +9,7 @@ import tarfile
 import tempfile
 from random import choice
 from string import ascii_letters, ascii_lowercase, digits
-from typing import Iterable, Union
+from typing import Iterable, Iterator, Union
 
 import arrow
 
@@ -59,6 +59,22 @@ def base_processor(document: Union[dict, None]) -> Union[dict, None]:
     return document
 
 
+def chunk_list(items: list, size: int) -> Iterator[list]:
+    """
+    Yield successive slices of `items` containing at most `size` items.
+
+    :param items: the list to split into chunks
+    :param size: the maximum size of each chunk
+    :return: a generator of chunks
+
+    """
+    if size < 1:
+        raise ValueError("Chunk size must be greater than zero")
+
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 def compress_file(path: str, target: str, processes: int = 1):
     """
     Compress the file at `path` to a gzipped file at `target`.